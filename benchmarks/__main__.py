@@ -0,0 +1,98 @@
+"""
+Admin yo'llari uchun benchmark.
+
+    python -m benchmarks --days 365
+    DJANGO_DB=sqlite python -m benchmarks --days 365 --update-baseline
+
+Alohida test bazasi yaratiladi (asosiy baza o'zgarmaydi), unga deterministik
+ma'lumot yoziladi va changelist, formset saqlash, jamilarni qayta hisoblash
+holatlari o'lchanadi. Natija baseline.json dagi shu DB turi (sqlite,
+postgresql) natijalari bilan solishtiriladi; regressiya bo'lsa chiqish kodi 1.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Admin yo'llari benchmarki")
+    parser.add_argument("--days", type=int, default=365, help="Necha kunlik ma'lumot yaratish")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="Har bir holat necha marta o'lchanadi")
+    parser.add_argument("--only", help="Faqat shu prefiks bilan boshlanadigan holatlar (masalan, changelist.)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--output", type=Path, help="Natijani JSON faylga yozish")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Ruxsat etilgan vaqt o'sishi (ulush)")
+    parser.add_argument("--query-tolerance", type=int, default=0, help="Ruxsat etilgan SQL soni o'sishi")
+    parser.add_argument("--update-baseline", action="store_true", help="Natijani baseline ga yozish")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    import django
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from .cases import Bench, CASES
+    from .factory import seed
+    from .runner import compare, run_cases
+
+    # Benchmark ataylab og'ir so'rovlar yuboradi - instrumentatsiya ogohlantirishlari kerak emas
+    logging.getLogger("config.instrumentation").setLevel(logging.ERROR)
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        end = datetime.date(2026, 1, 1)
+        volumes = seed(args.days, seed=args.seed, end=end)
+        client = Client()
+        client.force_login(get_user_model().objects.create_superuser("bench_admin", password=None))
+
+        cases = [case for case in CASES if not args.only or case[0].startswith(args.only)]
+        results = run_cases(Bench(client, end), cases, repeat=args.repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    vendor = connection.vendor
+    report = {"vendor": vendor, "volumes": volumes, "results": results}
+    for name, result in results.items():
+        print(f"{name:45} {result['min_ms']:>10.2f} ms (median {result['median_ms']:.2f}) {result['queries']:>6} SQL")
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if args.update_baseline:
+        baselines[vendor] = {"volumes": volumes, "results": {**baselines.get(vendor, {}).get("results", {}), **results}}
+        args.baseline.write_text(json.dumps(baselines, indent=2, ensure_ascii=False, sort_keys=True) + "\n")
+        print(f"Baseline yangilandi: {args.baseline} ({vendor})")
+        return 0
+
+    baseline = baselines.get(vendor)
+    if baseline is None:
+        print(f"{vendor} uchun baseline yo'q - --update-baseline bilan yarating.")
+        return 0
+    if baseline["volumes"] != volumes:
+        print(f"Ogohlantirish: baseline hajmi boshqa ({baseline['volumes']['days']} kun) - solishtirish taxminiy.")
+
+    regressions = compare(results, baseline["results"], args.tolerance, args.query_tolerance)
+    for regression in regressions:
+        print(f"REGRESSIYA {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
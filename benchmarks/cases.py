@@ -0,0 +1,200 @@
+"""
+O'lchanadigan admin yo'llari. Har bir holat `(nomi, funksiya)`; funksiya
+`Bench` obyektini oladi va bitta takrorlashni bajaradi.
+"""
+import datetime
+import itertools
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.urls import reverse
+
+from expenses.models import Expenses, FoodProducts, RawMaterials
+from config.pagination import SeekPaginator
+from reports.models import ROLLUP_SOURCES, DailySummary, MonthlyRollup
+from salary.models import Employee, Salary
+from sales.models import Buyer, BuyerBalance, Product, Sale, SaleItem
+
+CHANGELISTS = (
+    ("changelist.sale", "admin:sales_sale_changelist", {}),
+    ("changelist.saleitem", "admin:sales_saleitem_changelist", {}),
+    ("changelist.saleitem.open_orders", "admin:sales_saleitem_changelist", {"stats": "open_orders"}),
+    ("changelist.saleitem.unpaid_orders", "admin:sales_saleitem_changelist", {"stats": "unpaid_orders"}),
+    ("changelist.saleitem.payment_status", "admin:sales_saleitem_changelist", {"payment_status__exact": "partial"}),
+    # Arxiv jadvali bilan birga - ikkala jadvaldan kursor sahifasi
+    ("changelist.saleitem.include_archived", "admin:sales_saleitem_changelist", {"archived": "include"}),
+    ("changelist.opensaleitem", "admin:sales_opensaleitem_changelist", {}),
+    ("changelist.unpaidsaleitem", "admin:sales_unpaidsaleitem_changelist", {}),
+    ("changelist.buyerbalance", "admin:sales_buyerbalance_changelist", {}),
+    ("changelist.expenses", "admin:expenses_expenses_changelist", {}),
+    ("changelist.fooditem", "admin:expenses_fooditem_changelist", {}),
+    ("changelist.rawitem", "admin:expenses_rawitem_changelist", {}),
+    ("changelist.salary", "admin:salary_salary_changelist", {}),
+    ("changelist.salaryitem", "admin:salary_salaryitem_changelist", {}),
+    ("changelist.dailysummary", "admin:reports_dailysummary_changelist", {}),
+    ("search.buyer", "admin:sales_buyer_changelist", {"q": "харидор 12"}),
+    ("search.autocomplete_product", "admin:autocomplete", {"term": "meb 1", "app_label": "sales", "model_name": "saleitem", "field_name": "product"}),
+)
+
+# Formset holatlari uchun saqlanadigan qatorlar soni
+FORMSET_ROWS = 20
+
+
+def formset_data(prefix, rows):
+    data = {
+        f"{prefix}-TOTAL_FORMS": str(len(rows)),
+        f"{prefix}-INITIAL_FORMS": "0",
+        f"{prefix}-MIN_NUM_FORMS": "0",
+        f"{prefix}-MAX_NUM_FORMS": "1000",
+    }
+    for index, row in enumerate(rows):
+        for key, value in row.items():
+            data[f"{prefix}-{index}-{key}"] = value
+    return data
+
+
+class Bench:
+    """Holatlar uchun umumiy holat: kirgan client va yangi hujjatlar uchun bo'sh sanalar."""
+
+    def __init__(self, client, end):
+        self.client = client
+        # Seed qilingan davrdan keyingi sanalar - har bir saqlash yangi hujjat yaratadi
+        self.dates = (end + datetime.timedelta(days=offset) for offset in itertools.count(1))
+        self.product = str(Product.objects.order_by("product_name").values_list("pk", flat=True).first())
+        self.buyer = str(Buyer.objects.order_by("name").values_list("pk", flat=True).first())
+        self.food = str(FoodProducts.objects.order_by("food_product_name").values_list("pk", flat=True).first())
+        self.raw = str(RawMaterials.objects.order_by("raw_material_name").values_list("pk", flat=True).first())
+        self.employees = [str(pk) for pk in Employee.objects.order_by("full_name").values_list("pk", flat=True)]
+        # Jadval o'rtasidagi qator - chuqur sahifa kursori
+        items = SaleItem.objects.order_by("-created_at", "-pk")
+        self.deep_cursor = SeekPaginator(items, 1).encode(items[items.count() // 2])
+        # Xuddi shu chuqurlikdagi OFFSET sahifa (p 1 dan) - har qanday --days da mavjud
+        per_page = admin.site.get_model_admin(SaleItem).list_per_page
+        self.deep_page = str(max(1, items.count() // 2 // per_page + 1))
+        # Seed qilingan davr o'rtasidagi hujjat va qator - tahrirlash sahifalari uchun
+        middle = Sale.objects.order_by("date")[Sale.objects.count() // 2]
+        self.sale_id = str(middle.pk)
+        self.sale_item_id = str(middle.sotuvlar.values_list("pk", flat=True).first())
+
+    def get(self, url_name, params, args=()):
+        response = self.client.get(reverse(url_name, args=args), params)
+        if response.status_code != 200:
+            raise AssertionError(f"{url_name}: {response.status_code}")
+
+    def post(self, url_name, data):
+        response = self.client.post(reverse(url_name), data)
+        if response.status_code != 302:
+            raise AssertionError(f"{url_name}: {response.status_code}")
+
+
+def changelist_case(url_name, params):
+    def run(bench):
+        bench.get(url_name, params)
+    return run
+
+
+def saleitem_offset_deep(bench):
+    # created_at ustuni bo'yicha tartib - OFFSET sahifalash, keyset bilan solishtirish uchun
+    bench.get("admin:sales_saleitem_changelist", {"o": "-9", "p": bench.deep_page})
+
+
+def saleitem_deep_seek(bench):
+    bench.get("admin:sales_saleitem_changelist", {"after": bench.deep_cursor})
+
+
+def change_form(url_name, attr):
+    """Tahrirlash sahifasi: master qiymatlar (mahsulot, xaridor) config.mastercache dan."""
+    def run(bench):
+        bench.get(url_name, {}, args=[getattr(bench, attr)])
+    return run
+
+
+def save_sale(bench):
+    rows = [
+        {"product": bench.product, "buyer": bench.buyer, "quantity": "2", "price": "1000", "payment_status": "unpaid", "buyers_paid": "0", "order_status": "open"}
+        for _ in range(FORMSET_ROWS)
+    ]
+    bench.post("admin:sales_sale_add", {"date": next(bench.dates).isoformat(), "description": "", **formset_data("sotuvlar", rows)})
+
+
+def save_expenses(bench):
+    food_rows = [{"food_product": bench.food, "quantity": "2", "price": "100"} for _ in range(FORMSET_ROWS // 2)]
+    raw_rows = [{"raw_material": bench.raw, "quantity": "3", "price": "500"} for _ in range(FORMSET_ROWS // 2)]
+    bench.post("admin:expenses_expenses_add", {
+        "date": next(bench.dates).isoformat(),
+        "description": "",
+        **formset_data("food_items", food_rows),
+        **formset_data("raw_items", raw_rows),
+    })
+
+
+def save_salary(bench):
+    rows = [{"employee": employee, "earned_amount": "100", "paid_amount": "50"} for employee in bench.employees]
+    bench.post("admin:salary_salary_add", {
+        "date": next(bench.dates).isoformat(),
+        "total_earned_salary": "0",
+        "total_paid_salary": "0",
+        **formset_data("salary_items", rows),
+    })
+
+
+def rebuild_sale_totals(bench):
+    Sale.objects.rebuild_total_price()
+
+
+def rebuild_expense_totals(bench):
+    Expenses.objects.rebuild_total_cost()
+
+
+def rebuild_salary_totals(bench):
+    Salary.objects.rebuild_totals()
+
+
+def sale_total_mismatch(bench):
+    list(Sale.objects.with_total_mismatch())
+
+
+def refresh_daily_summary(bench):
+    DailySummary.objects.refresh_dates(Sale.objects.values_list("date", flat=True))
+
+
+def compute_buyer_balances(bench):
+    list(BuyerBalance.objects.compute())
+
+
+def rollup_report(params, cached):
+    """Davr hisoboti: `cached=False` - har safar keshsiz (kun birinchi ochilgandagi holat)."""
+    def run(bench):
+        if not cached:
+            cache.clear()
+        bench.get("admin:reports_monthlyrollup_changelist", params)
+    return run
+
+
+def refresh_rollups(bench):
+    months = {date.replace(day=1) for date in Sale.objects.values_list("date", flat=True)}
+    for source in ROLLUP_SOURCES:
+        MonthlyRollup.objects.refresh_months(source, months)
+
+
+CASES = [
+    *((name, changelist_case(url_name, params)) for name, url_name, params in CHANGELISTS),
+    ("changelist.saleitem.offset_deep", saleitem_offset_deep),
+    ("changelist.saleitem.seek_deep", saleitem_deep_seek),
+    ("changeform.sale", change_form("admin:sales_sale_change", "sale_id")),
+    ("changeform.saleitem", change_form("admin:sales_saleitem_change", "sale_item_id")),
+    ("formset.sale", save_sale),
+    ("formset.expenses", save_expenses),
+    ("formset.salary", save_salary),
+    ("totals.sale_rebuild", rebuild_sale_totals),
+    ("totals.sale_mismatch", sale_total_mismatch),
+    ("totals.expenses_rebuild", rebuild_expense_totals),
+    ("totals.salary_rebuild", rebuild_salary_totals),
+    ("reports.daily_summary_refresh", refresh_daily_summary),
+    ("reports.buyer_balances", compute_buyer_balances),
+    ("reports.rollup_refresh", refresh_rollups),
+    ("reports.rollup_product_year", rollup_report({"report": "product"}, cached=False)),
+    ("reports.rollup_buyer_all", rollup_report({"report": "buyer", "year": "all"}, cached=False)),
+    ("reports.rollup_summary_all", rollup_report({"report": "summary", "year": "all"}, cached=False)),
+    ("reports.rollup_product_year_cached", rollup_report({"report": "product"}, cached=True)),
+]
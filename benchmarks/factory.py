@@ -0,0 +1,125 @@
+"""
+Benchmark uchun deterministik ma'lumotlar: bir xil `seed` va `days` har doim
+bir xil hajm va qiymatlarni beradi. Yozuvlar bulk_create bilan qo'shiladi,
+jamilar va hisobot jadvallari oxirida bir marta qayta quriladi.
+"""
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from expenses.models import Expenses, FoodItem, FoodProducts, RawItem, RawMaterials
+from reports.models import PRICE_SOURCES, ROLLUP_SOURCES, DailySummary, MonthlyRollup, PriceHistory
+from salary.models import Employee, EmployeeBalance, Salary, SalaryItem
+from sales.models import Buyer, BuyerBalance, Product, Sale, SaleItem
+
+# Bir kunlik o'rtacha hajm
+VOLUMES = {
+    "products": 200,
+    "buyers": 500,
+    "food_products": 60,
+    "raw_materials": 40,
+    "employees": 15,
+    "sale_items_per_day": (4, 12),
+    "food_items_per_day": (2, 6),
+    "raw_items_per_day": (1, 4),
+}
+
+BATCH_SIZE = 2000
+
+
+def money(rng, low, high):
+    return Decimal(rng.randrange(low, high)) * 1000
+
+
+def searchable(objects):
+    """bulk_create save() ni chaqirmaydi - qidiruv matni oldindan to'ldiriladi."""
+    for obj in objects:
+        obj.apply_search_text()
+        yield obj
+
+
+def seed(days, seed=42, end=None):
+    """`end` dan oldingi `days` kun uchun savdo, xarajat va ish haqi yaratadi."""
+    rng = random.Random(seed)
+    end = end or datetime.date.today()
+    dates = [end - datetime.timedelta(days=offset) for offset in range(days, 0, -1)]
+
+    products = Product.objects.bulk_create(searchable(
+        Product(product_name=f"Mebel {index}", measurement_unit=rng.choice(["dona", "komplekt", "m2"]))
+        for index in range(VOLUMES["products"])
+    ))
+    buyers = Buyer.objects.bulk_create(searchable(
+        Buyer(name=f"Xaridor {index}", sign=rng.choice("ABCDEFGH"), phone_number=f"+99890{index:07d}")
+        for index in range(VOLUMES["buyers"])
+    ))
+    foods = FoodProducts.objects.bulk_create(searchable(
+        FoodProducts(food_product_name=f"Oziq-ovqat {index}", measurement_unit="kg")
+        for index in range(VOLUMES["food_products"])
+    ))
+    raws = RawMaterials.objects.bulk_create(searchable(
+        RawMaterials(raw_material_name=f"Xom-ashyo {index}", measurement_unit=rng.choice(["m2", "dona", "kg"]))
+        for index in range(VOLUMES["raw_materials"])
+    ))
+    password = make_password(None)
+    users = get_user_model().objects.bulk_create(searchable(
+        get_user_model()(username=f"bench_ishchi_{index}", is_worker=True, password=password)
+        for index in range(VOLUMES["employees"])
+    ))
+    employees = Employee.objects.bulk_create(searchable(
+        Employee(user=user, full_name=f"Ishchi {index}", position="Usta", salary_type="kunlik")
+        for index, user in enumerate(users)
+    ))
+
+    sales = Sale.objects.bulk_create((Sale(date=date) for date in dates), batch_size=BATCH_SIZE)
+    expenses = Expenses.objects.bulk_create((Expenses(date=date) for date in dates), batch_size=BATCH_SIZE)
+    salaries = Salary.objects.bulk_create((Salary(date=date) for date in dates), batch_size=BATCH_SIZE)
+
+    sale_items, food_items, raw_items, salary_items = [], [], [], []
+    for sale, expense, salary in zip(sales, expenses, salaries):
+        for _ in range(rng.randint(*VOLUMES["sale_items_per_day"])):
+            item = SaleItem(
+                sale=sale,
+                product=rng.choice(products),
+                buyer=rng.choice(buyers),
+                quantity=Decimal(rng.randint(1, 5)),
+                price=money(rng, 200, 5000),
+                payment_status=rng.choice(SaleItem.PaymentStatus.values),
+                order_status=rng.choice(SaleItem.OrderStatus.values),
+            )
+            if item.payment_status == SaleItem.PaymentStatus.PARTIAL:
+                item.buyers_paid = item.quantity * item.price / 2
+            item.apply_derived_fields()
+            sale_items.append(item)
+        for _ in range(rng.randint(*VOLUMES["food_items_per_day"])):
+            food_items.append(FoodItem(expense=expense, food_product=rng.choice(foods), quantity=Decimal(rng.randint(1, 20)), price=money(rng, 5, 100)))
+        for _ in range(rng.randint(*VOLUMES["raw_items_per_day"])):
+            raw_items.append(RawItem(expense=expense, raw_material=rng.choice(raws), quantity=Decimal(rng.randint(1, 50)), price=money(rng, 20, 500)))
+        for employee in employees:
+            earned = money(rng, 100, 400)
+            salary_items.append(SalaryItem(salary=salary, employee=employee, earned_amount=earned, paid_amount=earned if rng.random() < 0.7 else 0))
+
+    for model, objects in ((SaleItem, sale_items), (FoodItem, food_items), (RawItem, raw_items), (SalaryItem, salary_items)):
+        model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+    Sale.objects.rebuild_total_price()
+    Expenses.objects.rebuild_total_cost()
+    Salary.objects.rebuild_totals()
+    DailySummary.objects.refresh_dates(dates)
+    BuyerBalance.objects.refresh_buyers([buyer.pk for buyer in buyers])
+    EmployeeBalance.objects.refresh_employees([employee.pk for employee in employees])
+    for source in PRICE_SOURCES:
+        PriceHistory.objects.refresh_dates(source, dates)
+    for source in ROLLUP_SOURCES:
+        MonthlyRollup.objects.refresh_dates(source, dates)
+
+    return {
+        "days": days,
+        "sales": len(sales),
+        "sale_items": len(sale_items),
+        "food_items": len(food_items),
+        "raw_items": len(raw_items),
+        "salary_items": len(salary_items),
+    }
@@ -0,0 +1,143 @@
+"""
+Ishlayotgan serverga yuklama testi (faqat standart kutubxona):
+
+    python -m benchmarks.loadtest http://127.0.0.1:8000 --username admin --password ... \\
+        --path /admin/ --path /admin/sales/sale/ --concurrency 8 --duration 30 --output before.json
+
+    # DB_POOL=1 bilan serverni qayta ishga tushirib:
+    python -m benchmarks.loadtest ... --output after.json --compare before.json
+
+Natija: so'rovlar/soniya, p50/p95/p99 kechikish va xatolar soni.
+"""
+import argparse
+import http.cookiejar
+import json
+import re
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+
+def build_opener(jar):
+    return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+
+
+def login(base_url, username, password):
+    """Admin login formasi orqali kiradi va sessiya cookie larini qaytaradi."""
+    jar = http.cookiejar.CookieJar()
+    opener = build_opener(jar)
+    login_url = urllib.parse.urljoin(base_url, "/admin/login/")
+    page = opener.open(login_url).read().decode()
+    token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', page).group(1)
+    data = urllib.parse.urlencode({
+        "csrfmiddlewaretoken": token,
+        "username": username,
+        "password": password,
+        "next": "/admin/",
+    }).encode()
+    request = urllib.request.Request(login_url, data=data, headers={"Referer": login_url})
+    opener.open(request).read()
+    if not any(cookie.name == "sessionid" for cookie in jar):
+        raise SystemExit("Kirish muvaffaqiyatsiz: login yoki parol noto'g'ri.")
+    return jar
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def worker(base_url, paths, jar, deadline, latencies, errors, lock):
+    opener = build_opener(jar)
+    urls = [urllib.parse.urljoin(base_url, path) for path in paths]
+    index = 0
+    while time.perf_counter() < deadline:
+        url = urls[index % len(urls)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            with opener.open(url, timeout=30) as response:
+                response.read()
+            ok = True
+        except (urllib.error.URLError, OSError):
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors.append(url)
+
+
+def run(base_url, paths, jar, concurrency, duration, warmup):
+    if warmup:
+        run(base_url, paths, jar, concurrency, warmup, 0)
+
+    latencies, errors, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=worker, args=(base_url, paths, jar, deadline, latencies, errors, lock))
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+    }
+
+
+def print_comparison(before, after):
+    print(f"{'':10} {'oldin':>10} {'keyin':>10} {'farq':>8}")
+    for key in ("rps", "p50_ms", "p95_ms", "p99_ms", "errors"):
+        old, new = before[key], after[key]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else ""
+        print(f"{key:10} {old:>10} {new:>10} {change:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description="Admin sahifalari uchun yuklama testi")
+    parser.add_argument("base_url", help="Masalan, http://127.0.0.1:8000")
+    parser.add_argument("--path", action="append", dest="paths", help="Tekshiriladigan yo'l (bir necha marta berish mumkin)")
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="Soniya")
+    parser.add_argument("--warmup", type=float, default=3, help="Isitish, soniya (natijaga kirmaydi)")
+    parser.add_argument("--output", type=Path, help="Natijani JSON ga yozish")
+    parser.add_argument("--compare", type=Path, help="Oldingi natija fayli bilan solishtirish")
+    args = parser.parse_args(argv)
+
+    jar = login(args.base_url, args.username, args.password) if args.username else http.cookiejar.CookieJar()
+    paths = args.paths or ["/admin/"]
+    result = run(args.base_url, paths, jar, args.concurrency, args.duration, args.warmup)
+    result.update({"paths": paths, "concurrency": args.concurrency, "duration": args.duration})
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2) + "\n")
+    if args.compare:
+        print_comparison(json.loads(args.compare.read_text()), result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import statistics
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def run_cases(bench, cases, repeat=5, warmup=1):
+    """Har bir holatni `warmup` + `repeat` marta bajaradi; median vaqt va SQL sonini qaytaradi."""
+    results = {}
+    for name, case in cases:
+        for _ in range(warmup):
+            case(bench)
+        timings = []
+        queries = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                case(bench)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries = max(queries, len(context.captured_queries))
+        results[name] = {
+            "median_ms": round(statistics.median(timings), 2),
+            "min_ms": round(min(timings), 2),
+            "queries": queries,
+        }
+    return results
+
+
+def compare(results, baseline, tolerance=0.3, query_tolerance=0, min_delta_ms=5.0):
+    """
+    Baseline bilan solishtiradi. Eng yaxshi vaqt (min_ms - shovqinga eng kam
+    sezgir) `tolerance` ulushidan va `min_delta_ms` dan ko'proq oshsa, SQL soni
+    esa `query_tolerance` dan ko'proq oshsa - regressiya.
+    Baseline da yo'q holatlar solishtirilmaydi.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result["queries"] > expected["queries"] + query_tolerance:
+            regressions.append(f"{name}: SQL soni {expected['queries']} -> {result['queries']}")
+        limit = expected["min_ms"] * (1 + tolerance)
+        if result["min_ms"] > limit and result["min_ms"] - expected["min_ms"] > min_delta_ms:
+            regressions.append(f"{name}: vaqt {expected['min_ms']} ms -> {result['min_ms']} ms")
+    return regressions
@@ -1,4 +1,44 @@
-﻿from django.contrib.admin import AdminSite
+﻿import hashlib
+import uuid
+
+from django.conf import settings
+from django.contrib.admin import AdminSite
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.translation import get_language
+
+from . import mastercache
+from .autocomplete import AutocompleteView
+from .instrumentation import DEFAULTS, get_setting, request_log, summarize
+
+APP_LIST_CACHE_TIMEOUT = 60 * 60
+APP_LIST_VERSION_KEY = "admin:app_list:version"
+
+# Shu maydonlar o'zgarsa foydalanuvchi ko'radigan ro'yxat ham o'zgaradi
+USER_PERMISSION_FIELDS = {"is_active", "is_staff", "is_superuser"}
+
+
+def app_list_version():
+    version = cache.get(APP_LIST_VERSION_KEY)
+    if version is None:
+        cache.add(APP_LIST_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(APP_LIST_VERSION_KEY)
+    return version
+
+
+def invalidate_app_list_cache(**kwargs):
+    """Ruxsatlar o'zgarganda barcha keshlangan app ro'yxatlarini eskirgan qiladi."""
+    cache.set(APP_LIST_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_on_user_save(sender, update_fields=None, **kwargs):
+    # Har kirishda last_login saqlanadi - u ruxsatlarga ta'sir qilmaydi
+    if update_fields is not None and not USER_PERMISSION_FIELDS & set(update_fields):
+        return
+    invalidate_app_list_cache()
 
 
 class OrderedAdminSite(AdminSite):
@@ -9,6 +49,7 @@ class OrderedAdminSite(AdminSite):
         "salary": 20,
         "sales": 30,
         "expenses": 40,
+        "reports": 50,
     }
 
     model_order = {
@@ -20,6 +61,10 @@ class OrderedAdminSite(AdminSite):
             "Product": 20,
             "Buyer": 30,
             "SaleItem": 40,
+            "OpenSaleItem": 50,
+            "UnpaidSaleItem": 60,
+            "BuyerBalance": 70,
+            "ArchivedSaleItem": 80,
         },
         "expenses": {
             "Expenses": 10,
@@ -32,6 +77,12 @@ class OrderedAdminSite(AdminSite):
             "Salary": 10,
             "Employee": 20,
             "SalaryItem": 30,
+            "EmployeeBalance": 40,
+        },
+        "reports": {
+            "DailySummary": 10,
+            "MonthlyRollup": 20,
+            "Job": 30,
         },
     }
 
@@ -42,10 +93,89 @@ class OrderedAdminSite(AdminSite):
         # "salary": {"SalaryItem"},
     }
 
+    def get_urls(self):
+        urls = [
+            path("query-log/", self.admin_view(self.query_log_view), name="query_log"),
+            path("query-log/json/", self.admin_view(self.query_log_json), name="query_log_json"),
+        ]
+        return urls + super().get_urls()
+
+    def autocomplete_view(self, request):
+        return AutocompleteView.as_view(admin_site=self)(request)
+
+    def query_log_records(self, request):
+        if not request.user.is_superuser:
+            raise PermissionDenied
+        records = request_log.snapshot()
+        if request.GET.get("flagged"):
+            records = [record for record in records if record["flags"]]
+        return records[::-1]
+
+    def query_log_view(self, request):
+        """Oxirgi admin so'rovlari: SQL soni, DB vaqti, N+1 belgilari va master kesh hit/miss."""
+        records = self.query_log_records(request)
+        context = {
+            **self.each_context(request),
+            "title": "So'rovlar statistikasi",
+            "summary": summarize(records),
+            "records": records[:100],
+            "thresholds": {name: get_setting(name) for name in DEFAULTS},
+            "master_cache": mastercache.stats(),
+            "cache_backend": settings.CACHES["default"]["BACKEND"].rsplit(".", 1)[-1],
+        }
+        return TemplateResponse(request, "admin/query_log.html", context)
+
+    def query_log_json(self, request):
+        records = self.query_log_records(request)
+        return JsonResponse({
+            "thresholds": {name: get_setting(name) for name in DEFAULTS},
+            "summary": summarize(records),
+            "master_cache": mastercache.stats(),
+            "records": records,
+        })
+
     def _is_hidden(self, request, app_label, object_name):
         return object_name in self.hidden_for_non_superusers.get(app_label, set())
 
+    def registry_fingerprint(self):
+        """Ro'yxatdan o'tgan modellar o'zgarsa (yangi deploy), eski kesh ishlatilmaydi."""
+        labels = ",".join(sorted(model._meta.label for model in self._registry))
+        return hashlib.md5(labels.encode(), usedforsecurity=False).hexdigest()[:12]
+
+    def permission_fingerprint(self, request, version):
+        """
+        Foydalanuvchi ruxsatlari to'plamining xeshi. Bir xil ruxsatli foydalanuvchilar
+        bitta keshlangan ro'yxatni bo'lishadi; xeshning o'zi ham foydalanuvchi bo'yicha
+        keshlanadi, shuning uchun har so'rovda ruxsat jadvallari o'qilmaydi.
+        """
+        user = request.user
+        key = f"admin:app_list:user:{version}:{user.pk}"
+        fingerprint = cache.get(key)
+        if fingerprint is None:
+            perms = "*" if user.is_superuser else ",".join(sorted(user.get_all_permissions()))
+            fingerprint = hashlib.md5(
+                f"{user.is_active}:{user.is_staff}:{perms}".encode(),
+                usedforsecurity=False,
+            ).hexdigest()
+            cache.set(key, fingerprint, APP_LIST_CACHE_TIMEOUT)
+        return fingerprint
+
     def get_app_list(self, request, app_label=None):
+        version = app_list_version()
+        key = "admin:app_list:{}:{}:{}:{}:{}".format(
+            version,
+            self.registry_fingerprint(),
+            self.permission_fingerprint(request, version),
+            get_language(),
+            app_label or "",
+        )
+        app_list = cache.get(key)
+        if app_list is None:
+            app_list = self.build_app_list(request, app_label=app_label)
+            cache.set(key, app_list, APP_LIST_CACHE_TIMEOUT)
+        return app_list
+
+    def build_app_list(self, request, app_label=None):
         app_list = super().get_app_list(request, app_label=app_label)
 
         for app in app_list:
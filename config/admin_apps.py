@@ -1,5 +1,27 @@
 ﻿from django.contrib.admin.apps import AdminConfig
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class CustomAdminConfig(AdminConfig):
     default_site = "config.admin.OrderedAdminSite"
+
+    def ready(self):
+        super().ready()
+
+        from django.contrib.auth import get_user_model
+        from django.contrib.auth.models import Group, Permission
+
+        from . import mastercache
+        from .admin import invalidate_app_list_cache, invalidate_on_user_save
+
+        # Keshlangan admin app ro'yxati ruxsatlar o'zgarganda tozalanadi
+        User = get_user_model()
+        post_save.connect(invalidate_on_user_save, sender=User, dispatch_uid="admin_app_list_user_save")
+        post_delete.connect(invalidate_app_list_cache, sender=User, dispatch_uid="admin_app_list_user_delete")
+        for through in (User.groups.through, User.user_permissions.through, Group.permissions.through):
+            m2m_changed.connect(invalidate_app_list_cache, sender=through, dispatch_uid=f"admin_app_list_{through._meta.label}")
+        for model in (Group, Permission):
+            post_delete.connect(invalidate_app_list_cache, sender=model, dispatch_uid=f"admin_app_list_{model._meta.label}_delete")
+
+        # Master jadvallar keshi qator saqlanganda/o'chirilganda tozalanadi
+        mastercache.connect_signals()
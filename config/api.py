@@ -0,0 +1,73 @@
+"""
+Admin formalaridagi JS uchun async JSON endpointlar yordamchilari.
+
+Endpointlar ModelAdmin.get_urls orqali ulanadi (EmployeeAdmin.get_user_details
+kabi), lekin AdminSite.admin_view sync - async view ni o'ray olmaydi, shuning
+uchun tekshiruv shu yerda async bajariladi.
+
+Thread band qilmaslik faqat ASGI serverida: `python -m config.serve_asgi`
+(uvicorn, SERVER_MODE=asgi - middleware zanjiri to'liq async). waitress (WSGI,
+config.serve) ostida ham ishlaydi, lekin har bir so'rov async_to_sync orqali
+o'tadi - oddiy sync view dan biroz sekinroq.
+"""
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.urls import path
+from django.views.decorators.cache import never_cache
+
+# Qiymatlar yozish paytida o'zgaradi, lekin yozish kamdan-kam - qisqa TTL yetarli
+LOOKUP_CACHE_TIMEOUT = 30
+
+
+def async_admin_view(view, permission=None):
+    """Faol xodim va (berilgan bo'lsa) `permission` huquqi tekshiriladigan async view."""
+
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        user = await request.auser()
+        if not (user.is_active and user.is_staff):
+            return JsonResponse({"error": "Kirish taqiqlangan"}, status=403)
+        if permission and not await user.ahas_perm(permission):
+            return JsonResponse({"error": "Ruxsat yo'q"}, status=403)
+        return await view(request, *args, **kwargs)
+
+    return never_cache(inner)
+
+
+async def cached_lookup(key, loader, timeout=LOOKUP_CACHE_TIMEOUT):
+    """`loader()` natijasini `timeout` soniya keshlaydi. None ham keshlanadi."""
+    cached = await cache.aget(key)
+    if cached is not None:
+        return cached["value"]
+    value = await loader()
+    await cache.aset(key, {"value": value}, timeout)
+    return value
+
+
+class LastPriceLookupMixin:
+    """
+    Master admin (Product, FoodProducts, RawMaterials) ga `last-price/<id>/`
+    endpointini qo'shadi. Narx master qatordagi last_price ustunidan PK bo'yicha
+    o'qiladi - elementlar jadvali skanerlanmaydi.
+    """
+
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path(
+                "last-price/<uuid:object_id>/",
+                async_admin_view(self.last_price_view, f"{opts.app_label}.view_{opts.model_name}"),
+                name=f"{opts.app_label}_{opts.model_name}_last_price",
+            ),
+        ] + super().get_urls()
+
+    async def last_price_view(self, request, object_id):
+        async def load():
+            return await self.model._default_manager.filter(pk=object_id).values("last_price", "last_price_date").afirst()
+
+        data = await cached_lookup(f"api:last_price:{self.model._meta.label_lower}:{object_id}", load)
+        if not data or data["last_price"] is None:
+            return JsonResponse({"error": "Narx hali kiritilmagan"}, status=404)
+        return JsonResponse({"price": data["last_price"], "date": data["last_price_date"]})
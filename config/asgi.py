@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler  # noqa: E402
+
+# SERVER_MODE=asgi da WhiteNoise (sync) zanjirda yo'q - statik fayllar zanjirdan oldin beriladi
+if 'whitenoise.middleware.WhiteNoiseMiddleware' not in settings.MIDDLEWARE:
+    application = ASGIStaticFilesHandler(application)
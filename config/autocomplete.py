@@ -0,0 +1,213 @@
+"""
+autocomplete_fields uchun yordamchilar.
+
+Inline formset har bir qatorida tanlangan FK yorlig'ini chiqarish uchun
+AutocompleteSelect alohida SELECT bajaradi, saqlashda esa ModelChoiceField
+har bir qator qiymatini yana alohida o'qiydi. CachedAutocompleteMixin bilan
+formset barcha qatorlardagi qiymatlarni har bir FK uchun bitta so'rovda
+oldindan yuklaydi - sahifa hajmi va so'rovlar soni katalog kattaligiga ham,
+qatorlar soniga ham bog'liq bo'lmaydi. Master jadvallar (config.mastercache)
+uchun bu so'rov ham keshdan.
+"""
+from django.contrib.admin.views.autocomplete import AutocompleteJsonView
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.forms import ModelChoiceField, ModelForm
+from django.forms.models import BaseInlineFormSet
+from django.http import JsonResponse
+from django.utils.functional import cached_property
+
+from . import mastercache
+
+
+def uses_master_cache(field, key):
+    """Tanlov PK bo'yicha va limit_choices_to siz bo'lsa master keshdan olinadi."""
+    model = field.queryset.model
+    return mastercache.is_master(model) and key in ("pk", model._meta.pk.name) and not field.queryset.query.has_filters()
+
+
+def load_choices(field, key, values):
+    """{str(qiymat): obj} - tanlangan qiymatlar bitta so'rovda yoki master keshdan."""
+    if not values:
+        return {}
+    if uses_master_cache(field, key):
+        objects = mastercache.get_many(field.queryset.model, values).values()
+    else:
+        objects = field.queryset.filter(**{f"{key}__in": values})
+    return {str(getattr(obj, key)): obj for obj in objects}
+
+
+class CachedModelChoiceField(ModelChoiceField):
+    """Qiymat formset yuklagan `choice_cache` da bo'lsa, bazaga murojaat qilinmaydi."""
+
+    choice_cache = None
+    # choice_cache dagi bazada mavjudligi tekshirilgan qiymatlar (str)
+    choice_verified = frozenset()
+
+    def to_python(self, value):
+        if self.choice_cache is not None and value not in self.empty_values:
+            obj = self.choice_cache.get(str(value))
+            if obj is not None:
+                return obj
+        key = self.to_field_name or "pk"
+        if self.choice_cache is None and value not in self.empty_values and uses_master_cache(self, key):
+            # Alohida forma (inline emas) - qiymat master keshdan
+            try:
+                obj = load_choices(self, key, [self.queryset.model._meta.pk.to_python(value)]).get(str(value))
+            except ValidationError:
+                obj = None
+            if obj is not None:
+                return obj
+        return super().to_python(value)
+
+
+class CachedAutocompleteSelect(AutocompleteSelect):
+    """Tanlangan variant yorlig'i `choice_cache` dan olinadi (aks holda Django dagi kabi SELECT)."""
+
+    choice_cache = None
+
+    def optgroups(self, name, value, attr=None):
+        field = self.choices.field
+        selected = [str(item) for item in value if str(item) not in field.empty_values]
+        to_field_name = getattr(field, "to_field_name", None) or "pk"
+        choice_cache = self.choice_cache
+        if choice_cache is None and uses_master_cache(field, to_field_name):
+            try:
+                choice_cache = load_choices(field, to_field_name, [field.queryset.model._meta.pk.to_python(item) for item in selected])
+            except ValidationError:
+                choice_cache = None
+        if choice_cache is None or any(item not in choice_cache for item in selected):
+            return super().optgroups(name, value, attr)
+
+        options = []
+        if not self.is_required and not self.allow_multiple_selected:
+            options.append(self.create_option(name, "", "", False, 0))
+        for item in selected:
+            obj = choice_cache[item]
+            options.append(self.create_option(name, getattr(obj, to_field_name), field.label_from_instance(obj), set(selected), len(options)))
+        return [(None, options, 0)]
+
+
+class CachedChoicesForm(ModelForm):
+    """
+    Qiymati `choice_cache` dan olingan FK modelning full_clean() ida qayta
+    tekshirilmaydi (ForeignKey.validate har bir qator uchun EXISTS so'rovi) -
+    mavjudligi va limit_choices_to oldindan yuklashda field.queryset bilan tekshirilgan
+    (`choice_verified`). Master keshdan olingan qiymat boshqa jarayonda o'chirilgan
+    bo'lishi mumkin: u formset da bitta so'rov bilan tekshiriladi, topilmasa oddiy
+    tekshiruv forma xatosini beradi (saqlashda IntegrityError emas).
+    """
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        for name, field in self.fields.items():
+            if not isinstance(field, CachedModelChoiceField) or not field.choice_cache:
+                continue
+            value = self.cleaned_data.get(name)
+            if value is None:
+                continue
+            key = str(getattr(value, field.to_field_name or "pk"))
+            if key in field.choice_verified and field.choice_cache.get(key) is value:
+                exclude.add(name)
+        return exclude
+
+
+class CachedChoicesInlineFormSet(BaseInlineFormSet):
+    @cached_property
+    def forms(self):
+        forms = super().forms
+        self.prefetch_choices(forms)
+        return forms
+
+    def prefetch_choices(self, forms):
+        """Har bir CachedModelChoiceField uchun barcha qatorlar qiymati bitta so'rovda."""
+        if not forms:
+            return
+        for name, field in forms[0].fields.items():
+            if not isinstance(field, CachedModelChoiceField):
+                continue
+            # ForeignKey.formfield() to_field_name ni doim beradi (odatda "id")
+            key = field.to_field_name or "pk"
+            key_field = field.queryset.model._meta.pk if key == "pk" else field.queryset.model._meta.get_field(key)
+            values = set()
+            for form in forms:
+                value = form[name].value()
+                if value in field.empty_values:
+                    continue
+                try:
+                    values.add(key_field.to_python(value))
+                except ValidationError:
+                    # Noto'g'ri qiymat - oddiy tekshiruv xato beradi
+                    continue
+            cache = load_choices(field, key, values)
+            verified = self.verify_choices(field, key, cache) if forms[0].is_bound else frozenset()
+            for form in forms:
+                form_field = form.fields[name]
+                form_field.choice_cache = cache
+                form_field.choice_verified = verified
+                widget = getattr(form_field.widget, "widget", form_field.widget)
+                widget.choice_cache = cache
+                self.attach_cached(form.instance, name, key, cache)
+
+    @staticmethod
+    def verify_choices(field, key, cache):
+        """Bazada mavjud qiymatlar: field.queryset dan o'qilganlari - o'zi, master keshdagilari - bitta so'rov."""
+        if not uses_master_cache(field, key):
+            return frozenset(cache)
+        pks = [obj.pk for obj in cache.values()]
+        if not pks:
+            return frozenset()
+        return frozenset(str(pk) for pk in field.queryset.filter(pk__in=pks).values_list("pk", flat=True))
+
+    @staticmethod
+    def attach_cached(instance, name, key, cache):
+        """Mavjud qatorning FK obyekti ham keshdan - __str__ (inline sarlavhasi) alohida SELECT qilmaydi."""
+        if instance.pk is None:
+            return
+        model_field = instance._meta.get_field(name)
+        target = getattr(model_field, "target_field", None)
+        if target is None or model_field.is_cached(instance):
+            return
+        obj = cache.get(str(getattr(instance, model_field.attname)))
+        if obj is not None and (key == "pk" or target.name == key):
+            model_field.set_cached_value(instance, obj)
+
+
+class CachedAutocompleteMixin:
+    """
+    Inline va ModelAdmin uchun: autocomplete_fields dagi FK lar keshlanadigan
+    vidjet va maydon bilan chiziladi. Inline da formset ham almashtiriladi.
+    """
+
+    form = CachedChoicesForm
+    formset = CachedChoicesInlineFormSet
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs.setdefault("widget", CachedAutocompleteSelect(db_field, self.admin_site, using=kwargs.get("using")))
+            kwargs.setdefault("form_class", CachedModelChoiceField)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class AutocompleteView(AutocompleteJsonView):
+    """
+    Admin autocomplete endpointi COUNT(*) siz: sahifa uchun `paginate_by + 1`
+    qator o'qiladi, ortiqcha qator "yana bor" degani. Qidiruvning o'zi
+    ModelAdmin.get_search_results (search_text indeksi) orqali.
+    """
+
+    def get(self, request, *args, **kwargs):
+        self.term, self.model_admin, self.source_field, to_field_name = self.process_request(request)
+        if not self.has_perm(request):
+            raise PermissionDenied
+
+        try:
+            page = max(int(request.GET.get("page", 1)), 1)
+        except ValueError:
+            page = 1
+        offset = (page - 1) * self.paginate_by
+        rows = list(self.get_queryset()[offset:offset + self.paginate_by + 1])
+        return JsonResponse({
+            "results": [self.serialize_result(obj, to_field_name) for obj in rows[:self.paginate_by]],
+            "pagination": {"more": len(rows) > self.paginate_by},
+        })
@@ -0,0 +1,49 @@
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import FieldDoesNotExist
+
+
+class QueryChangeList(ChangeList):
+    """Changelist so'rovini ModelAdmin.get_changelist_queryset orqali sozlaydi."""
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters=exclude_parameters)
+        return self.model_admin.get_changelist_queryset(request, queryset)
+
+
+class ChangeListQueryMixin:
+    """
+    Changelist sahifasidagi N+1 so'rovlarni yo'qotadi.
+
+    `list_display_related` - list_display dagi FK nomi va uning __str__ i
+    ishlatadigan ustunlar. Shu FK lar select_related bilan, qolgan ustunlar
+    esa only() bilan bitta so'rovda yuklanadi. Property yoki metod ustunlar
+    kerak bo'lsa, ular `list_only_extra` ga yoziladi.
+    """
+
+    list_display_related = {}
+    list_only_extra = ()
+
+    def get_list_select_related(self, request):
+        if self.list_select_related is False and self.list_display_related:
+            return tuple(self.list_display_related)
+        return self.list_select_related
+
+    def get_changelist_only_fields(self, request):
+        opts = self.model._meta
+        fields = [opts.pk.name, *self.list_only_extra]
+        for name in self.get_list_display(request):
+            try:
+                opts.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            fields.append(name)
+            for related_field in self.list_display_related.get(name, ()):
+                fields.append(f"{name}__{related_field}")
+        return fields
+
+    def get_changelist_queryset(self, request, queryset):
+        """Faqat changelist sahifasi uchun qo'shimcha annotate() shu yerda qo'shiladi."""
+        return queryset.only(*self.get_changelist_only_fields(request))
+
+    def get_changelist(self, request, **kwargs):
+        return QueryChangeList
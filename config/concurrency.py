@@ -0,0 +1,164 @@
+"""
+Bir kunlik hujjatni (Sale, Expenses, Salary) bir vaqtda tahrirlash.
+
+Sana unikal, shuning uchun kun davomida barcha xodimlar bitta hujjatga
+qator qo'shadi. Ikki himoya bor:
+
+- Pessimistik: jamilar qayta hisoblanishidan oldin sarlavha qatori
+  `select_for_update` bilan qulflanadi (`lock_version`). Parallel saqlashlar
+  navbatga turadi va har biri boshqalarning tasdiqlangan qatorlarini ko'rib
+  hisoblaydi - jami yo'qolmaydi. Admin formasi qulfni tekshiruv boshida
+  oladi, u changeform_view tranzaksiyasi oxirigacha turadi.
+- Optimistik: sarlavhadagi `version` ustuni. Forma ochilgandagi versiya
+  yashirin maydonda qaytadi; bazadagi versiya boshqa bo'lsa, hujjatni
+  boshqa foydalanuvchi o'zgartirgan. Faqat yangi qatorlar qo'shilgan bo'lsa
+  ular saqlanadi (parallel zakaz kiritish odatiy holat); sarlavha yoki
+  mavjud qatorlar o'zgartirilgan/o'chirilgan bo'lsa forma 409 holati va
+  tushunarli xato bilan qaytariladi.
+"""
+from functools import lru_cache
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+
+CONFLICT_MESSAGE = (
+    "Bu hujjat siz ochganingizdan keyin boshqa foydalanuvchi tomonidan o'zgartirildi "
+    "(versiya %(submitted)s -> %(current)s). Mavjud qatorlar va sarlavhadagi o'zgarishlaringiz "
+    "saqlanmadi: sahifani yangilab, ularni qayta kiriting. Faqat yangi qatorlar qo'shilsa, "
+    "ular muammosiz saqlanadi."
+)
+DELETED_MESSAGE = "Bu hujjat boshqa foydalanuvchi tomonidan o'chirilgan."
+
+
+def lock_version(model, pk):
+    """Sarlavha qatorini tranzaksiya oxirigacha qulflaydi va versiyasini qaytaradi (yo'q bo'lsa None)."""
+    return model._default_manager.select_for_update().filter(pk=pk).values_list("version", flat=True).first()
+
+
+class VersionedModel(models.Model):
+    """
+    `version` faqat jamilar bilan birga F() UPDATE da oshiriladi
+    (`version_increment()`); oddiy save() uni yozmaydi, aks holda xotiradagi
+    eski qiymat parallel oshirilganini bosib ketadi. `totals_fields` -
+    qatorlardan hisoblanadigan ustunlar, ular ziddiyat tekshiruvida hisobga olinmaydi.
+    """
+
+    version = models.PositiveIntegerField(default=1, editable=False, verbose_name="Versiya")
+
+    totals_fields = ()
+
+    class Meta:
+        abstract = True
+
+    @staticmethod
+    def version_increment():
+        return models.F("version") + 1
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None:
+                deferred = self.get_deferred_fields()
+                update_fields = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.attname not in deferred
+                ]
+            kwargs["update_fields"] = [name for name in update_fields if name != "version"]
+        super().save(*args, **kwargs)
+
+
+def conflict_error(submitted, current):
+    return ValidationError(CONFLICT_MESSAGE, code="conflict", params={"submitted": submitted, "current": current})
+
+
+class VersionedModelForm(forms.ModelForm):
+    """Sarlavha formasi: tekshiruvda qatorni qulflaydi va versiyani solishtiradi."""
+
+    # Model maydoni editable=False, admin uni formaga qo'ymaydi - shuning uchun boshqa nom
+    edit_version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.instance._state.adding:
+            self.fields["edit_version"].initial = self.instance.version
+
+    def clean(self):
+        cleaned_data = super().clean()
+        instance = self.instance
+        # UUID kalit yangi obyektda ham bor - _state.adding bo'yicha tekshiriladi
+        if instance._state.adding:
+            return cleaned_data
+
+        current = lock_version(type(instance), instance.pk)
+        if current is None:
+            instance._edit_conflict_rejected = True
+            raise ValidationError(DELETED_MESSAGE, code="deleted")
+        submitted = cleaned_data.get("edit_version")
+        if submitted is None or submitted == current:
+            return cleaned_data
+
+        # Qatorlar formsetlari ham shu belgiga qarab tekshiriladi (VersionedInlineFormSet)
+        instance._edit_conflict = (submitted, current)
+        ignored = {"edit_version", *instance.totals_fields}
+        if set(self.changed_data) - ignored:
+            instance._edit_conflict_rejected = True
+            raise conflict_error(submitted, current)
+        return cleaned_data
+
+
+class VersionedInlineFormSet:
+    """
+    Inline formset aralashmasi: sarlavha versiyasi eskirgan bo'lsa, mavjud
+    qatorlarni o'zgartirish yoki o'chirish rad etiladi. has_changed() bazadagi
+    joriy qiymat bilan solishtiradi, shuning uchun boshqa foydalanuvchi
+    o'zgartirgan qatorning eski qiymati ham "o'zgarish" deb topiladi.
+    """
+
+    def clean(self):
+        super().clean()
+        conflict = getattr(self.instance, "_edit_conflict", None)
+        if conflict is None:
+            return
+        if any(form.has_changed() or self._should_delete_form(form) for form in self.initial_forms):
+            self.instance._edit_conflict_rejected = True
+            raise conflict_error(*conflict)
+
+
+@lru_cache(maxsize=None)
+def versioned_formset(formset):
+    return type(f"Versioned{formset.__name__}", (VersionedInlineFormSet, formset), {})
+
+
+class VersionedInlineMixin:
+    def get_formset(self, request, obj=None, **kwargs):
+        kwargs.setdefault("formset", versioned_formset(self.formset))
+        return super().get_formset(request, obj, **kwargs)
+
+
+class VersionedAdminMixin:
+    """
+    Hujjat admini uchun: VersionedModelForm, sarlavhada faqat forma
+    o'zgartirgan maydonlar yoziladi va ziddiyatda javob holati 409.
+    """
+
+    form = VersionedModelForm
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        # Eskirgan formadagi o'zgartirilmagan maydonlar boshqalar yozganini bosib ketmasin;
+        # formada yo'q maydonlarni (created_by) admin o'zi belgilaydi, jamilar qayta hisoblanadi
+        obj.save(update_fields=[
+            field.name for field in obj._meta.concrete_fields
+            if not field.primary_key
+            and field.name not in obj.totals_fields
+            and (field.name in form.changed_data or field.name not in form.fields)
+        ])
+
+    def changeform_view(self, request, object_id=None, form_url="", extra_context=None):
+        response = super().changeform_view(request, object_id, form_url, extra_context)
+        adminform = getattr(response, "context_data", {}).get("adminform")
+        if request.method == "POST" and adminform is not None and getattr(adminform.form.instance, "_edit_conflict_rejected", False):
+            response.status_code = 409
+        return response
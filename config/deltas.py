@@ -0,0 +1,44 @@
+"""
+Element qatorlarining bazadagi holatini eslab qolish.
+
+Jamilar (Expenses.total_cost, EmployeeBalance) butun ro'yxatni qayta
+hisoblamasdan farq (delta) bilan yangilanadi. Buning uchun qatorning
+bazadan o'qilgan holati ("saved line") kerak: u from_db() da eslab
+qolinadi, maydonlar .only() bilan o'qilmagan bo'lsa - bitta so'rov bilan
+olinadi.
+"""
+
+
+class SavedLineMixin:
+    """
+    `saved_line_fields` - holatni tashkil qiluvchi ustunlar (attname lar),
+    `make_line(*values)` - ulardan farq hisoblanadigan kortejni quradi.
+    Yangi (hali saqlanmagan) yoki bazada yo'q qator uchun holat None.
+    """
+
+    saved_line_fields = ()
+
+    def make_line(self, *values):
+        return values
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_saved_line()
+        return instance
+
+    def _remember_saved_line(self):
+        data = self.__dict__
+        if all(name in data for name in self.saved_line_fields):
+            self._saved_line = self.make_line(*(data[name] for name in self.saved_line_fields))
+
+    def _get_saved_line(self):
+        if self._state.adding:
+            return None
+        if not hasattr(self, "_saved_line"):
+            row = type(self)._default_manager.filter(pk=self.pk).values_list(*self.saved_line_fields).first()
+            self._saved_line = row and self.make_line(*row)
+        return self._saved_line
+
+    def current_line(self):
+        return self.make_line(*(getattr(self, name) for name in self.saved_line_fields))
@@ -0,0 +1,126 @@
+import csv
+import datetime
+from decimal import Decimal
+
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """csv.writer uchun bufer: yozilgan qatorni darhol qaytaradi."""
+
+    def write(self, value):
+        return value
+
+
+def format_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        return timezone.localtime(value).isoformat() if timezone.is_aware(value) else value.isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return str(value)
+
+
+def excel_value(value):
+    """XLSX katakchasi: summa va sanalar o'z turida yoziladi - Excel ularni yig'a oladi."""
+    if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+        # openpyxl vaqt zonali datetime ni yozmaydi
+        return timezone.make_naive(value)
+    if value is None or isinstance(value, (Decimal, int, float, str, datetime.date)):
+        return value
+    return str(value)
+
+
+class ExportSpec:
+    """
+    Bitta jadvalni eksport qilish tavsifi.
+
+    `columns` - (sarlavha, ORM yo'li) juftliklari; bog'langan jadvallar
+    (xaridor, mahsulot, sana) yo'l orqali bitta JOIN bilan denormalizatsiya
+    qilinadi. Qatorlar values_list().iterator() bilan bo'lak-bo'lak o'qiladi,
+    shuning uchun xotira qatorlar soniga bog'liq emas. Tartib (created_at, id)
+    bo'yicha - to'xtagan joydan davom ettirish shu kalit orqali bo'ladi.
+
+    `archive_model` - ko'chirilgan eski qatorlar jadvali (ArchivedSaleItem) -
+    ustunlari bir xil; to'liq eksport ikkala jadvalni UNION ALL bilan o'qiydi.
+    """
+
+    key_fields = ("created_at", "id")
+
+    def __init__(self, name, model, columns, date_field, archive_model=None):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.date_field = date_field
+        self.archive_model = archive_model
+
+    @property
+    def headers(self):
+        return [header for header, path in self.columns]
+
+    def get_queryset(self, date_from=None, date_to=None, model=None):
+        queryset = (model or self.model)._default_manager.all()
+        if date_from:
+            queryset = queryset.filter(**{f"{self.date_field}__gte": date_from})
+        if date_to:
+            queryset = queryset.filter(**{f"{self.date_field}__lte": date_to})
+        return queryset
+
+    def get_querysets(self, date_from=None, date_to=None):
+        """To'liq eksport uchun: asosiy jadval va (bo'lsa) arxiv jadvali."""
+        models = [self.model] if self.archive_model is None else [self.model, self.archive_model]
+        return [self.get_queryset(date_from, date_to, model) for model in models]
+
+    def rows(self, *querysets, after=None, convert=format_value):
+        """
+        Bir yoki bir nechta (UNION ALL) queryset qatorlari, (created_at, id) tartibida.
+        `after` - oxirgi yozilgan (created_at, id); undan keyingi qatorlar qaytadi.
+        `convert` - qiymatni yozishga tayyorlaydi (CSV uchun matn, XLSX uchun excel_value).
+        """
+        paths = [path for header, path in self.columns]
+        selects = []
+        for queryset in querysets:
+            if after is not None:
+                created_at, pk = after
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            selects.append(queryset.order_by().values_list(*paths))
+        queryset = selects[0].union(*selects[1:], all=True) if len(selects) > 1 else selects[0]
+        queryset = queryset.order_by(*self.key_fields)
+        for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+            yield [convert(value) for value in row]
+
+    def key_from_row(self, row):
+        """Eksport faylidagi qatordan davom ettirish kalitini tiklaydi."""
+        paths = [path for header, path in self.columns]
+        created_at = datetime.datetime.fromisoformat(row[paths.index("created_at")])
+        return created_at, row[paths.index("id")]
+
+    def streaming_response(self, queryset, filename=None):
+        writer = csv.writer(Echo())
+
+        def stream():
+            # Excel UTF-8 ni to'g'ri ochishi uchun BOM
+            yield "\ufeff"
+            yield writer.writerow(self.headers)
+            for row in self.rows(queryset):
+                yield writer.writerow(row)
+
+        response = StreamingHttpResponse(stream(), content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{filename or self.name}.csv"'
+        return response
+
+
+def export_action(spec):
+    """Tanlangan qatorlarni CSV sifatida oqim bilan yuboradigan admin action."""
+
+    def export_csv(modeladmin, request, queryset):
+        return spec.streaming_response(queryset)
+
+    export_csv.short_description = "CSV ga eksport qilish"
+    export_csv.__name__ = "export_csv"
+    return export_csv
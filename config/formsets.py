@@ -0,0 +1,50 @@
+from django.db import transaction
+
+from .signals import formset_saved
+
+
+def bulk_save_formset(formset):
+    """
+    Inline formsetni qatorma-qator save() o'rniga paket bilan yozadi.
+
+    Yangi qatorlar bulk_create, o'zgarganlari bulk_update, o'chirilganlari
+    bitta DELETE bilan saqlanadi. Model `apply_derived_fields()` metodiga ega
+    bo'lsa (masalan, total = quantity * price), u yozishdan oldin xotirada
+    chaqiriladi va `derived_fields` ustunlari ham bulk_update ga qo'shiladi.
+
+    Model save()/delete() chaqirilmaydi: farq bilan yuritiladigan jamilar
+    (xarajat summasi, xaridor va ishchi balanslari) va hosila jadvallar
+    (narx tarixi, oylik yig'indilar) oxirida yuboriladigan `formset_saved`
+    signalini tinglaydi. Sarlavhadagi qayta hisoblanadigan jamilarni
+    (update_total_price, update_totals) chaqiruvchi yangilaydi.
+    (yangi, o'zgargan, o'chirilgan) qaytaradi.
+    """
+    model = formset.model
+    instances = formset.save(commit=False)
+    deleted = list(formset.deleted_objects)
+    created = [instance for instance in instances if instance._state.adding]
+    changed = [instance for instance in instances if not instance._state.adding]
+
+    update_fields = {
+        name
+        for obj, changed_data in formset.changed_objects
+        for name in changed_data
+    }
+    update_fields.update(getattr(model, "derived_fields", ()))
+
+    for instance in instances:
+        if hasattr(instance, "apply_derived_fields"):
+            instance.apply_derived_fields()
+
+    with transaction.atomic():
+        if deleted:
+            model._default_manager.filter(pk__in=[obj.pk for obj in deleted]).delete()
+        if created:
+            model._default_manager.bulk_create(created)
+        if changed:
+            model._default_manager.bulk_update(changed, sorted(update_fields))
+
+    formset.save_m2m()
+    # O'chirilganlar uchun post_delete ham (queryset.delete() yuboradi) kelgan
+    formset_saved.send(sender=model, instance=formset.instance, created=created, changed=changed, deleted=deleted)
+    return created, changed, deleted
@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Kuzatiladigan yo'llar (boshlanishi)
+    "PATH_PREFIXES": ("/admin/",),
+    # Ring bufer hajmi - eng oxirgi N ta so'rov saqlanadi
+    "BUFFER_SIZE": 500,
+    # Shu chegaralardan oshgan so'rovlar belgilanadi va log ga yoziladi
+    "SLOW_MS": 500,
+    "MAX_QUERIES": 50,
+    # Bitta SQL shu marta va undan ko'p takrorlansa - N+1 belgisi
+    "DUPLICATE_THRESHOLD": 5,
+    # Belgilangan so'rovlar log ga ham yoziladi (request_log ga har doim)
+    "LOG_WARNINGS": True,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "QUERY_LOG", {}).get(name, DEFAULTS[name])
+
+
+class RequestLog:
+    """So'rovlar yozuvlari uchun chegaralangan ring bufer (jarayon ichida, thread-safe)."""
+
+    def __init__(self, size):
+        self.records = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def add(self, record):
+        with self.lock:
+            self.records.append(record)
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.records)
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+
+
+request_log = RequestLog(get_setting("BUFFER_SIZE"))
+
+
+class QueryCollector:
+    """
+    connection.execute_wrapper uchun: har bir SQL ni vaqti bilan sanaydi.
+    DEBUG dagi connection.queries dan farqli ravishda parametrlar va SQL matnlari
+    saqlanmaydi - faqat joy belgili (%s) SQL bo'yicha hisoblagich.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.signatures = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.signatures[sql] += 1
+
+    def duplicates(self, threshold):
+        return [
+            {"sql": sql[:500], "count": count}
+            for sql, count in self.signatures.most_common()
+            if count >= threshold
+        ]
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Admin so'rovlari uchun SQL soni, DB vaqti, umumiy vaqt va takroriy SQL larni
+    request_log ga yozadi. Chegaradan oshganlari `flags` bilan belgilanadi.
+    StreamingHttpResponse (CSV eksport) oqim davomidagi so'rovlari hisobga olinmaydi.
+
+    Sync va async: ASGI ostida zanjir async qoladi va so'rov shu middleware da
+    thread ga o'tkazilmaydi. Async ORM so'rovlari sync_to_async thread idagi
+    ulanish orqali bajariladi, shuning uchun wrapper o'sha ulanishga qo'yiladi.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.tracked(request):
+            return self.get_response(request)
+
+        collector = QueryCollector()
+        start = time.perf_counter()
+        with connection.execute_wrapper(collector):
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        self.record(request, response, collector, total_ms)
+        return response
+
+    async def __acall__(self, request):
+        if not self.tracked(request):
+            return await self.get_response(request)
+
+        collector = QueryCollector()
+        start = time.perf_counter()
+        # `connection` thread ichida olinadi - event loop dagi ulanish boshqa obyekt
+        await sync_to_async(lambda: connection.execute_wrappers.append(collector))()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(lambda: connection.execute_wrappers.remove(collector))()
+        total_ms = (time.perf_counter() - start) * 1000
+
+        self.record(request, response, collector, total_ms)
+        return response
+
+    def tracked(self, request):
+        return request.path.startswith(tuple(get_setting("PATH_PREFIXES")))
+
+    def record(self, request, response, collector, total_ms):
+        duplicates = collector.duplicates(get_setting("DUPLICATE_THRESHOLD"))
+        flags = []
+        if total_ms >= get_setting("SLOW_MS"):
+            flags.append("slow")
+        if collector.count >= get_setting("MAX_QUERIES"):
+            flags.append("queries")
+        if duplicates:
+            flags.append("duplicates")
+
+        match = getattr(request, "resolver_match", None)
+        record = {
+            "time": timezone.now().isoformat(),
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else "",
+            "status": response.status_code,
+            "queries": collector.count,
+            "db_ms": round(collector.duration * 1000, 2),
+            "total_ms": round(total_ms, 2),
+            "duplicates": duplicates,
+            "flags": flags,
+        }
+        request_log.add(record)
+
+        if flags and get_setting("LOG_WARNINGS"):
+            logger.warning(
+                "Sekin admin so'rovi %s %s: %s ta SQL, DB %.0f ms, jami %.0f ms (%s)",
+                record["method"], record["path"], record["queries"], record["db_ms"], record["total_ms"], ", ".join(flags),
+            )
+
+
+def summarize(records):
+    """Yozuvlarni view bo'yicha guruhlaydi: eng sekin view lar birinchi."""
+    views = {}
+    for record in records:
+        view = views.setdefault(record["view"] or record["path"], {
+            "view": record["view"] or record["path"],
+            "requests": 0,
+            "flagged": 0,
+            "max_queries": 0,
+            "total_ms": 0.0,
+            "db_ms": 0.0,
+            "max_ms": 0.0,
+        })
+        view["requests"] += 1
+        view["flagged"] += bool(record["flags"])
+        view["max_queries"] = max(view["max_queries"], record["queries"])
+        view["total_ms"] += record["total_ms"]
+        view["db_ms"] += record["db_ms"]
+        view["max_ms"] = max(view["max_ms"], record["total_ms"])
+
+    for view in views.values():
+        view["avg_ms"] = round(view.pop("total_ms") / view["requests"], 2)
+        view["avg_db_ms"] = round(view.pop("db_ms") / view["requests"], 2)
+    return sorted(views.values(), key=lambda view: view["max_ms"], reverse=True)
@@ -0,0 +1,172 @@
+"""
+Master jadvallar (mahsulot, xaridor, oziq-ovqat, xom-ashyo, ishchi) uchun
+read-through kesh.
+
+Bu jadvallar kamdan-kam o'zgaradi, lekin har bir forma, inline qatori va
+__str__ ularni qayta o'qiydi. Qator PK bo'yicha settings.CACHES dagi
+keshdan olinadi; keshda bo'lmaganlari bitta so'rovda o'qilib keshga
+yoziladi. Qator saqlanganda yoki o'chirilganda (va tranzaksiya
+tasdiqlanganda yana bir bor) kalit o'chiriladi. Signal chaqirmaydigan
+queryset.update() dan keyin `invalidate()` qo'lda chaqiriladi
+(masalan PriceHistoryQuerySet.update_last_prices).
+
+`MasterForeignKey` - oddiy ForeignKey, faqat `item.product` kabi murojaat
+avval shu keshga qaraydi. Migratsiyada u ForeignKey bo'lib ko'rinadi.
+
+Hit/miss hisoblagichlari avval jarayon xotirasida yig'iladi va keshga
+STATS_FLUSH_INTERVAL da bir marta (so'rov oxirida) yoziladi - har bir
+murojaatga qo'shimcha kesh so'rovlari qo'shilmaydi. Admin dagi "So'rovlar
+statistikasi" sahifasi ularni ko'rsatadi. locmem da ular jarayon bo'yicha,
+file/redis da barcha jarayonlar uchun umumiy.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.db import models, transaction
+from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
+from django.db.models.signals import post_delete, post_save
+
+MASTER_MODELS = (
+    "sales.Product",
+    "sales.Buyer",
+    "expenses.FoodProducts",
+    "expenses.RawMaterials",
+    "salary.Employee",
+)
+MASTER_CACHE_TIMEOUT = 60 * 60
+# Model tuzilishi o'zgarganda (yangi ustun) eski pickle lar ishlatilmasligi uchun oshiriladi
+MASTER_CACHE_VERSION = 1
+# Hit/miss hisoblagichlari keshga shundan tez-tez yozilmaydi (soniya)
+STATS_FLUSH_INTERVAL = 30
+
+pending_stats = Counter()
+pending_lock = threading.Lock()
+last_flush = time.monotonic()
+
+
+def is_master(model):
+    return model._meta.concrete_model._meta.label in MASTER_MODELS
+
+
+def master_key(model, pk):
+    return f"master:{MASTER_CACHE_VERSION}:{model._meta.concrete_model._meta.label_lower}:{pk}"
+
+
+def stats_key(model, kind):
+    return f"master:stats:{model._meta.label_lower}:{kind}"
+
+
+def count(model, kind, value):
+    if value:
+        with pending_lock:
+            pending_stats[stats_key(model, kind)] += value
+
+
+def flush_stats(force=False):
+    """Yig'ilgan hisoblagichlarni keshga qo'shadi (oxirgi yozuvdan STATS_FLUSH_INTERVAL o'tgan bo'lsa)."""
+    global last_flush
+    with pending_lock:
+        if not pending_stats or (not force and time.monotonic() - last_flush < STATS_FLUSH_INTERVAL):
+            return
+        values = dict(pending_stats)
+        pending_stats.clear()
+        last_flush = time.monotonic()
+    for key, value in values.items():
+        if not cache.add(key, value, None):
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                # Kalit add va incr orasida o'chirilgan
+                cache.set(key, value, None)
+
+
+def flush_stats_on_request_finished(sender, **kwargs):
+    flush_stats()
+
+
+def get_many(model, pks):
+    """{pk: obj} - keshdan, qolganlari bitta so'rovda bazadan. Bazada yo'q PK natijada bo'lmaydi."""
+    pk_field = model._meta.pk
+    pks = {pk_field.to_python(pk) for pk in pks if pk is not None}
+    if not pks:
+        return {}
+    keys = {master_key(model, pk): pk for pk in pks}
+    cached = cache.get_many(keys)
+    result = {keys[key]: obj for key, obj in cached.items()}
+    missing = pks - result.keys()
+    count(model, "hits", len(result))
+    count(model, "misses", len(missing))
+    if missing:
+        loaded = model._default_manager.order_by().in_bulk(missing)
+        cache.set_many({master_key(model, pk): obj for pk, obj in loaded.items()}, MASTER_CACHE_TIMEOUT)
+        result.update(loaded)
+    return result
+
+
+def get(model, pk):
+    if pk is None:
+        return None
+    return get_many(model, [pk]).get(model._meta.pk.to_python(pk))
+
+
+def invalidate(model, pks):
+    keys = [master_key(model, pk) for pk in pks]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    # Tranzaksiya davomida boshqa so'rov eski qiymatni qayta keshlab qo'yishi mumkin
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_instance(sender, instance, **kwargs):
+    invalidate(sender, [instance.pk])
+
+
+def connect_signals():
+    for label in MASTER_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(invalidate_instance, sender=model, dispatch_uid=f"master_cache_{label}_save")
+        post_delete.connect(invalidate_instance, sender=model, dispatch_uid=f"master_cache_{label}_delete")
+    request_finished.connect(flush_stats_on_request_finished, dispatch_uid="master_cache_stats")
+
+
+def stats():
+    """Admin uchun: har bir master model bo'yicha hit, miss va hit ulushi (%)."""
+    flush_stats(force=True)
+    rows = []
+    for label in MASTER_MODELS:
+        model = apps.get_model(label)
+        values = cache.get_many([stats_key(model, "hits"), stats_key(model, "misses")])
+        hits = values.get(stats_key(model, "hits"), 0)
+        misses = values.get(stats_key(model, "misses"), 0)
+        total = hits + misses
+        rows.append({
+            "model": str(model._meta.verbose_name_plural).strip(),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits * 100 / total, 1) if total else None,
+        })
+    return rows
+
+
+class MasterForwardDescriptor(ForwardManyToOneDescriptor):
+    def get_object(self, instance):
+        obj = get(self.field.related_model, getattr(instance, self.field.attname))
+        if obj is None:
+            # Bazada yo'q - Django dagi kabi DoesNotExist
+            return super().get_object(instance)
+        return obj
+
+
+class MasterForeignKey(models.ForeignKey):
+    """Master modelga PK bo'yicha ForeignKey; bog'langan obyekt `get()` orqali olinadi."""
+
+    forward_related_accessor_class = MasterForwardDescriptor
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        return name, "django.db.models.ForeignKey", args, kwargs
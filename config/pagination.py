@@ -0,0 +1,343 @@
+"""
+Katta element jadvallari (SaleItem, FoodItem, RawItem, SalaryItem) uchun
+keyset (seek) sahifalash.
+
+Oddiy admin sahifalashi OFFSET va aniq COUNT(*) ishlatadi - chuqur sahifa va
+sanashning o'zi jadval kattalashgani sari sekinlashadi. Bu yerda sahifa
+chegaradagi qatorning `(created_at, id)` qiymatidan keyin indeks bo'yicha
+izlanadi (WHERE ... ORDER BY ... LIMIT n + 1), shuning uchun istalgan
+chuqurlikdagi sahifa bir xil vaqtda olinadi. Jami soni taxminiy, `?exact=1`
+bilan aniq sanaladi.
+
+Arxiv jadvali bo'lgan changelist (`archive_model`) `?archived=include` bilan
+ikkala jadvalni bitta ro'yxatda ko'rsatadi: har biridan kursor bo'yicha
+`n + 1` qator olinib, xotirada birlashtiriladi.
+"""
+import datetime
+import json
+from collections import namedtuple
+
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.utils import quote
+from django.contrib.admin.views.main import ORDER_VAR
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.functional import cached_property
+
+from .changelist import ChangeListQueryMixin, QueryChangeList
+
+AFTER_VAR = "after"  # shu qatordan eskiroqlar
+BEFORE_VAR = "before"  # shu qatordan yangiroqlar
+LAST_VAR = "last"  # eng eski sahifa
+UPTO_VAR = "upto"  # shu sanagacha yaratilganlar (sana bo'yicha sakrash)
+EXACT_VAR = "exact"  # aniq COUNT(*)
+CURSOR_PARAMS = (AFTER_VAR, BEFORE_VAR, LAST_VAR, UPTO_VAR)
+ARCHIVE_VAR = "archived"
+INCLUDE_ARCHIVED = "include"
+
+# Shu songacha qatorlar aniq sanaladi - LIMIT li COUNT narxi cheklangan
+COUNT_LIMIT = 10000
+
+ResultCount = namedtuple("ResultCount", ("value", "kind"))
+EXACT, ESTIMATE, AT_LEAST = "exact", "estimate", "at_least"
+
+
+def planner_estimate(queryset):
+    """PostgreSQL rejalashtiruvchisining qatorlar bahosi (EXPLAIN, so'rov bajarilmaydi)."""
+    connection = connections[queryset.db]
+    sql, params = queryset.values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(queryset, exact=False, limit=None):
+    """
+    `limit` (COUNT_LIMIT) gacha qatorlar aniq sanaladi. Undan ko'p bo'lsa
+    PostgreSQL da rejalashtiruvchi bahosi, boshqa bazalarda "kamida `limit`".
+    """
+    limit = limit or COUNT_LIMIT
+    queryset = queryset.order_by()
+    if exact:
+        return ResultCount(queryset.count(), EXACT)
+    counted = queryset.values("pk")[:limit + 1].count()
+    if counted <= limit:
+        return ResultCount(counted, EXACT)
+    if connections[queryset.db].vendor == "postgresql":
+        estimate = planner_estimate(queryset)
+        if estimate > limit:
+            return ResultCount(estimate, ESTIMATE)
+    return ResultCount(limit, AT_LEAST)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Oddiy OFFSET sahifalash (boshqa ustun bo'yicha tartiblanganda), lekin soni taxminiy."""
+
+    def __init__(self, *args, exact=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.exact = exact
+
+    @cached_property
+    def result_count(self):
+        return count_rows(self.object_list, exact=self.exact)
+
+    @cached_property
+    def count(self):
+        return self.result_count.value
+
+
+class SeekPage:
+    def __init__(self, paginator, object_list, has_next, has_previous):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    @property
+    def next_cursor(self):
+        return self.paginator.encode(self.object_list[-1]) if self.has_next else None
+
+    @property
+    def previous_cursor(self):
+        return self.paginator.encode(self.object_list[0]) if self.has_previous else None
+
+
+class SeekPaginator:
+    """
+    `queryset` ni `field` va PK bo'yicha kamayish tartibida sahifalaydi.
+    Kursor - `"<field ISO qiymati>_<pk>"`, sahifaning chegaradagi qatori.
+    `extra` - xuddi shu ustunli boshqa querysetlar (arxiv), ularning qatorlari
+    bir tartibda aralashtiriladi.
+    """
+
+    def __init__(self, queryset, per_page, field="created_at", exact=False, extra=()):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+        self.exact = exact
+        self.querysets = (queryset, *extra)
+
+    @cached_property
+    def result_count(self):
+        counts = [count_rows(queryset, exact=self.exact) for queryset in self.querysets]
+        kinds = {count.kind for count in counts}
+        kind = EXACT if kinds == {EXACT} else AT_LEAST if AT_LEAST in kinds else ESTIMATE
+        return ResultCount(sum(count.value for count in counts), kind)
+
+    @cached_property
+    def count(self):
+        return self.result_count.value
+
+    def encode(self, obj):
+        return f"{getattr(obj, self.field).isoformat()}_{obj.pk}"
+
+    def decode(self, cursor):
+        value, _, pk = cursor.rpartition("_")
+        try:
+            value = parse_datetime(value)
+            pk = self.queryset.model._meta.pk.to_python(pk)
+        except (ValueError, ValidationError):
+            value = None
+        if value is None or pk is None:
+            raise IncorrectLookupParameters(f"Noto'g'ri kursor: {cursor}")
+        return value, pk
+
+    def older_than(self, cursor):
+        value, pk = self.decode(cursor)
+        # Birinchi shart indeks diapazonini beradi, ikkinchisi teng qiymatlarni PK bilan ajratadi
+        return Q(**{f"{self.field}__lte": value}) & (Q(**{f"{self.field}__lt": value}) | Q(pk__lt=pk))
+
+    def newer_than(self, cursor):
+        value, pk = self.decode(cursor)
+        return Q(**{f"{self.field}__gte": value}) & (Q(**{f"{self.field}__gt": value}) | Q(pk__gt=pk))
+
+    def descending(self, queryset=None):
+        return (self.queryset if queryset is None else queryset).order_by(f"-{self.field}", "-pk")
+
+    def ascending(self, queryset=None):
+        return (self.queryset if queryset is None else queryset).order_by(self.field, "pk")
+
+    def fetch(self, condition, limit, descending=True):
+        """Har bir querysetdan `limit` tagacha qator, birlashtirilgan tartibda birinchi `limit` tasi."""
+        rows = []
+        for queryset in self.querysets:
+            queryset = self.descending(queryset) if descending else self.ascending(queryset)
+            if condition is not None:
+                queryset = queryset.filter(condition)
+            rows.extend(queryset[:limit])
+        if len(self.querysets) > 1:
+            rows.sort(key=lambda obj: (getattr(obj, self.field), obj.pk), reverse=descending)
+        return rows[:limit]
+
+    def page(self, after=None, before=None, last=False, upto=None):
+        """Querysetga bitta LIMIT `per_page + 1` so'rov; ortiqcha qator keyingi sahifa borligini bildiradi."""
+        size = self.per_page
+        if before or last:
+            rows = self.fetch(self.newer_than(before) if before else None, size + 1, descending=False)
+            has_previous = len(rows) > size
+            if before and not has_previous:
+                # Eng yangi qatorlargacha yetildi - to'liq birinchi sahifa
+                return self.page()
+            return SeekPage(self, rows[:size][::-1], has_next=bool(before), has_previous=has_previous)
+
+        condition = Q()
+        if after:
+            condition &= self.older_than(after)
+        if upto:
+            condition &= Q(**{f"{self.field}__lt": self.day_end(upto)})
+        rows = self.fetch(condition or None, size + 1)
+        return SeekPage(self, rows[:size], has_next=len(rows) > size, has_previous=bool(rows and (after or upto)))
+
+    def day_end(self, value):
+        try:
+            day = parse_date(value) if isinstance(value, str) else value
+        except ValueError:
+            day = None
+        if day is None:
+            raise IncorrectLookupParameters(f"Noto'g'ri sana: {value}")
+        return timezone.make_aware(datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time.min))
+
+
+class SeekChangeList(QueryChangeList):
+    """
+    URL da `o` (ustun bo'yicha tartib) bo'lmasa sahifa kursor bilan olinadi,
+    aks holda oddiy OFFSET sahifalash taxminiy son bilan ishlaydi.
+    """
+
+    def get_queryset(self, request, exclude_parameters=None):
+        # Kursor filtr emas va filtr/tartib havolalariga o'tmasligi kerak (yangi tanlov birinchi sahifadan)
+        for name in CURSOR_PARAMS:
+            self.params.pop(name, None)
+            self.filter_params.pop(name, None)
+        return super().get_queryset(request, exclude_parameters=exclude_parameters)
+
+    def get_filters_params(self, params=None):
+        # `exact` havolalarda saqlanadi, lekin filtr emas
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(EXACT_VAR, None)
+        return lookup_params
+
+    def archive_queryset(self, request, root_queryset):
+        """Changelist filtrlari, qidiruvi va only() qo'llangan arxiv queryseti."""
+        original, self.root_queryset = self.root_queryset, root_queryset
+        try:
+            return self.get_queryset(request)
+        finally:
+            self.root_queryset = original
+
+    def url_for_result(self, result):
+        if isinstance(result, self.model):
+            return super().url_for_result(result)
+        # Arxiv qatori - o'z adminidagi (faqat o'qish) sahifa
+        opts = result._meta
+        return reverse(
+            f"admin:{opts.app_label}_{opts.model_name}_change",
+            args=(quote(result.pk),),
+            current_app=self.model_admin.admin_site.name,
+        )
+
+    def get_results(self, request):
+        self.exact_count = EXACT_VAR in request.GET
+        self.seek_page = None
+        archive = self.model_admin.get_archive_queryset(request)
+        if ORDER_VAR in self.params and archive is None:
+            super().get_results(request)
+            self.count_kind = self.paginator.result_count.kind
+            return
+
+        paginator = SeekPaginator(
+            self.queryset,
+            self.list_per_page,
+            self.model_admin.seek_field,
+            exact=self.exact_count,
+            extra=() if archive is None else (self.archive_queryset(request, archive),),
+        )
+        page = paginator.page(
+            after=request.GET.get(AFTER_VAR),
+            before=request.GET.get(BEFORE_VAR),
+            last=LAST_VAR in request.GET,
+            upto=request.GET.get(UPTO_VAR),
+        )
+        result_count = paginator.result_count
+
+        self.result_count = result_count.value
+        self.count_kind = result_count.kind
+        self.show_full_result_count = False
+        self.full_result_count = None
+        self.show_admin_actions = True
+        self.result_list = page.object_list
+        self.can_show_all = False
+        self.multi_page = page.has_next or page.has_previous
+        self.paginator = paginator
+        self.seek_page = page
+        self.seek_links = {
+            "first": self.get_query_string() if any(name in request.GET for name in CURSOR_PARAMS) else None,
+            "previous": self.get_query_string({BEFORE_VAR: page.previous_cursor}) if page.has_previous else None,
+            "next": self.get_query_string({AFTER_VAR: page.next_cursor}) if page.has_next else None,
+            "last": self.get_query_string({LAST_VAR: 1}) if page.has_next else None,
+        }
+        self.exact_count_link = None if self.exact_count else self.get_query_string({EXACT_VAR: 1})
+        self.upto_value = request.GET.get(UPTO_VAR, "")
+
+
+class ArchiveFilter(admin.SimpleListFilter):
+    """`?archived=include` - ro'yxatga arxiv jadvali qatorlari ham qo'shiladi (SeekChangeList)."""
+
+    title = "Arxiv"
+    parameter_name = ARCHIVE_VAR
+
+    def lookups(self, request, model_admin):
+        return ((INCLUDE_ARCHIVED, "Arxiv bilan birga"),)
+
+    def queryset(self, request, queryset):
+        return queryset
+
+
+class SeekPaginationMixin(ChangeListQueryMixin):
+    """
+    Changelist ni `seek_field` (odatda created_at) va PK bo'yicha keyset
+    sahifalashga o'tkazadi. Modelda `(-seek_field, -id)` indeksi bo'lishi kerak.
+    `archive_model` - xuddi shu ustunli arxiv jadvali (ArchiveFilter bilan ko'rsatiladi).
+    """
+
+    seek_field = "created_at"
+    archive_model = None
+    ordering = ("-created_at",)
+    # Filtrsiz jami soni ham COUNT(*) - katta jadvalda ko'rsatilmaydi
+    show_full_result_count = False
+    change_list_template = "admin/seek_change_list.html"
+
+    def get_changelist_only_fields(self, request):
+        return [*super().get_changelist_only_fields(request), self.seek_field]
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return EstimatedCountPaginator(queryset, per_page, orphans, allow_empty_first_page, exact=EXACT_VAR in request.GET)
+
+    def get_changelist(self, request, **kwargs):
+        return SeekChangeList
+
+    def get_list_filter(self, request):
+        list_filter = super().get_list_filter(request)
+        if self.archive_model is None:
+            return list_filter
+        return (*list_filter, ArchiveFilter)
+
+    def get_archive_queryset(self, request):
+        if self.archive_model is None or request.GET.get(ARCHIVE_VAR) != INCLUDE_ARCHIVED:
+            return None
+        return self.archive_model._default_manager.all()
+
+    def get_sortable_by(self, request):
+        # Arxiv bilan birga faqat kursor tartibi (OFFSET ikki jadvalda ishlamaydi)
+        if self.get_archive_queryset(request) is not None:
+            return ()
+        return super().get_sortable_by(request)
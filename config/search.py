@@ -0,0 +1,155 @@
+"""
+Master jadvallar (xaridor, mahsulot, oziq-ovqat, xom-ashyo, ishchi,
+foydalanuvchi) bo'yicha qidiruv.
+
+Har bir qatorda `search_text` - normalizatsiya qilingan qidiruv matni
+saqlanadi: kichik harf, kirill -> lotin, apostroflarsiz (o'/oʻ/ў -> o),
+telefon raqamlari faqat raqamlar. Qidiruv so'rovi ham shu tarzda
+normalizatsiya qilinadi, shuning uchun "Ғайрат", "G'ayrat" va "gayrat" bir
+xil natija beradi va har bir qatorda LOWER()/UPPER() hisoblanmaydi.
+
+PostgreSQL da `search_text` ga pg_trgm GIN indeksi qo'yiladi - `LIKE '%so'z%'`
+indeks bo'yicha bajariladi. Boshqa bazalarda (SQLite) indeks yo'q: B-tree
+`LIKE ... ESCAPE` ni ham, har qanday so'z boshini qidiradigan OR ni ham
+qamramaydi. Qidiruv jadvalni ko'rib chiqadi, lekin faqat shu tor ustunni
+solishtiradi (LOWER() va bir nechta ustun o'rniga).
+"""
+import re
+import unicodedata
+
+from django.db import migrations, models
+from django.db.models import Q
+
+SEARCH_TEXT_LENGTH = 500
+# pg_trgm uchtadan kam belgili so'zni indeks bo'yicha qidira olmaydi - ular so'z boshidan qidiriladi
+TRIGRAM_MIN_LENGTH = 3
+
+CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "ғ": "g", "д": "d", "е": "e", "ё": "yo",
+    "ж": "j", "з": "z", "и": "i", "й": "y", "к": "k", "қ": "q", "л": "l", "м": "m",
+    "н": "n", "о": "o", "ў": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "x", "ҳ": "h", "ц": "s", "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "",
+    "ы": "i", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+}
+APOSTROPHES = re.compile(r"['`ʻʼ‘’]")
+PHONE = re.compile(r"^[\d\s()+-]+$")
+SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize(value):
+    """Qidiruv uchun matn: "Oʻgʻil Ғайрат-2" -> "ogil gayrat 2"."""
+    text = unicodedata.normalize("NFKC", str(value or "")).casefold()
+    text = "".join(CYRILLIC_TO_LATIN.get(char, char) for char in text)
+    text = APOSTROPHES.sub("", text)
+    return " ".join(SEPARATORS.sub(" ", text).split())
+
+
+def digits(value):
+    return re.sub(r"\D", "", str(value or ""))
+
+
+def build_search_text(values, digit_values=()):
+    parts = [normalize(value) for value in values] + [digits(value) for value in digit_values]
+    return " ".join(part for part in parts if part)[:SEARCH_TEXT_LENGTH]
+
+
+def search_filter(search_term, field="search_text"):
+    """
+    Har bir so'z `field` da bo'lishi kerak (AND). Telefonga o'xshash so'rov
+    ("90 123-45") bitta raqamlar qatori sifatida qidiriladi. Bo'sh so'rov uchun None.
+    """
+    if PHONE.match(search_term or ""):
+        words = [digits(search_term)]
+    else:
+        words = normalize(search_term).split()
+    words = [word for word in words if word]
+    if not words:
+        return None
+    condition = Q()
+    for word in words:
+        if len(word) < TRIGRAM_MIN_LENGTH and not word.isdigit():
+            condition &= Q(**{f"{field}__startswith": word}) | Q(**{f"{field}__contains": f" {word}"})
+        else:
+            condition &= Q(**{f"{field}__contains": word})
+    return condition
+
+
+class SearchTextModel(models.Model):
+    """
+    `search_text` ustuni. Subklass `search_text_fields` (matn) va
+    `search_digit_fields` (telefon) ni belgilaydi; ustun save() da yangilanadi.
+    bulk_create dan oldin `apply_search_text()` chaqiriladi.
+    """
+
+    search_text = models.CharField(max_length=SEARCH_TEXT_LENGTH, blank=True, default="", editable=False, verbose_name="Qidiruv matni")
+
+    search_text_fields = ()
+    search_digit_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def apply_search_text(self):
+        self.search_text = build_search_text(
+            [getattr(self, name) for name in self.search_text_fields],
+            [getattr(self, name) for name in self.search_digit_fields],
+        )
+
+    def save(self, *args, **kwargs):
+        self.apply_search_text()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(update_fields) & {*self.search_text_fields, *self.search_digit_fields}:
+            kwargs["update_fields"] = {*update_fields, "search_text"}
+        super().save(*args, **kwargs)
+
+
+class NormalizedSearchMixin:
+    """
+    ModelAdmin qidiruvi va autocomplete_fields uchun `search_text` bo'yicha
+    qidiruv. Model SearchTextModel dan meros olgan bo'lishi kerak.
+    """
+
+    search_fields = ("search_text",)
+    search_help_text = "Nom, telefon yoki uning bir qismi (lotin yoki kirill)"
+    # Bog'langan model bo'yicha qidirish uchun, masalan "buyer__search_text"
+    search_text_field = "search_text"
+
+    def get_search_results(self, request, queryset, search_term):
+        condition = search_filter(search_term, self.search_text_field)
+        if condition is None:
+            return queryset, False
+        return queryset.filter(condition), False
+
+
+def add_search_text_index(model_name, index_name, text_fields, digit_fields=()):
+    """
+    Migratsiya operatsiyalari: mavjud qatorlar uchun `search_text` ni to'ldiradi
+    va PostgreSQL da pg_trgm GIN indeksini yaratadi (boshqa bazalarda indeks yo'q).
+    Tarixiy modelda `search_text_fields` yo'q, shuning uchun maydonlar shu yerda beriladi.
+    """
+
+    def backfill(apps, schema_editor):
+        model = apps.get_model(model_name)
+        objects = list(model._default_manager.only("pk", *text_fields, *digit_fields))
+        for obj in objects:
+            obj.search_text = build_search_text(
+                [getattr(obj, name) for name in text_fields],
+                [getattr(obj, name) for name in digit_fields],
+            )
+        model._default_manager.bulk_update(objects, ["search_text"], batch_size=1000)
+
+    def create_index(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        table = schema_editor.quote_name(apps.get_model(model_name)._meta.db_table)
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin (search_text gin_trgm_ops)")
+
+    def drop_index(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+    return [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.RunPython(create_index, drop_index),
+    ]
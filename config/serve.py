@@ -0,0 +1,42 @@
+"""
+Ishlab chiqarish uchun waitress serveri:
+
+    DB_POOL=1 DB_POOL_MAX_SIZE=8 python -m config.serve
+
+Thread lar soni DB ulanishlari soniga teng: har bir thread bir vaqtda ko'pi
+bilan bitta ulanish ushlaydi, shuning uchun so'rovlar pool dan ulanish kutib
+qolmaydi va Postgres ga ortiqcha ulanish ochilmaydi.
+"""
+import os
+
+from django.conf import settings
+from waitress import serve
+
+from config.wsgi import application
+
+
+def thread_count():
+    if os.getenv("WAITRESS_THREADS"):
+        return int(os.getenv("WAITRESS_THREADS"))
+    pool = settings.DATABASES["default"].get("OPTIONS", {}).get("pool")
+    if isinstance(pool, dict):
+        return pool.get("max_size", settings.DB_POOL_MAX_SIZE)
+    return settings.DB_POOL_MAX_SIZE
+
+
+def main():
+    threads = thread_count()
+    serve(
+        application,
+        host=os.getenv("WAITRESS_HOST", "0.0.0.0"),
+        port=int(os.getenv("WAITRESS_PORT", 8000)),
+        threads=threads,
+        # Navbatda kutayotgan ulanishlar soni - thread lardan ko'p bo'lishi kerak
+        connection_limit=int(os.getenv("WAITRESS_CONNECTION_LIMIT", threads * 25)),
+        channel_timeout=int(os.getenv("WAITRESS_CHANNEL_TIMEOUT", 120)),
+        ident="mebel",
+    )
+
+
+if __name__ == "__main__":
+    main()
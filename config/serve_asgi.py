@@ -0,0 +1,49 @@
+"""
+ASGI serveri (uvicorn) - admin dagi async JSON endpointlar (config.api) thread
+band qilmasdan ishlashi uchun:
+
+    DB_POOL=1 UVICORN_WORKERS=2 python -m config.serve_asgi
+
+SERVER_MODE=asgi: WhiteNoise (sync) middleware zanjiridan olinadi va statik
+fayllarni config.asgi beradi, qolgan middleware lar async. Sync admin sahifalari
+ham shu serverda ishlaydi (Django ularni thread da bajaradi). Har bir worker -
+alohida jarayon o'z DB pool i bilan: Postgres ulanishlari UVICORN_WORKERS * DB_POOL_MAX_SIZE.
+
+Bir nechta worker uchun kesh umumiy bo'lishi kerak (CACHE_BACKEND=file yoki
+redis): locmem da master qator o'zgarganda faqat yozgan worker keshi
+tozalanadi, qolganlari eskirgan nom va o'chirilgan qatorlarni ko'rsatadi.
+UVICORN_WORKERS>1 locmem bilan ishga tushmaydi.
+"""
+import os
+
+# settings import qilinishidan oldin - worker jarayonlar ham meros oladi
+os.environ.setdefault("SERVER_MODE", "asgi")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import uvicorn  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+LOCMEM_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+
+
+def main():
+    workers = int(os.getenv("UVICORN_WORKERS", 2))
+    if workers > 1 and settings.CACHES["default"]["BACKEND"] == LOCMEM_BACKEND:
+        raise SystemExit(
+            f"UVICORN_WORKERS={workers} va CACHE_BACKEND=locmem: har bir worker o'z keshini ushlaydi, "
+            "master qatorlar o'zgarishi boshqa worker larga yetmaydi. CACHE_BACKEND=file yoki redis "
+            "bilan ishga tushiring, yoki UVICORN_WORKERS=1."
+        )
+    uvicorn.run(
+        "config.asgi:application",
+        host=os.getenv("UVICORN_HOST", "0.0.0.0"),
+        port=int(os.getenv("UVICORN_PORT", 8000)),
+        workers=workers,
+        # Django lifespan hodisalarini ishlatmaydi
+        lifespan="off",
+        server_header=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ https://docs.djangoproject.com/en/6.0/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
+from importlib.util import find_spec
 from pathlib import Path
 import os
 from dotenv import load_dotenv
@@ -40,10 +41,12 @@ INSTALLED_APPS = [
     'salary',
     'sales',
     'expenses',
+    'reports',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.instrumentation.QueryInstrumentationMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -54,12 +57,20 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# SERVER_MODE=asgi - python -m config.serve_asgi (uvicorn). WhiteNoise faqat sync:
+# zanjirda qolsa har bir so'rov thread ga o'tadi va async view lar foydasiz bo'ladi.
+# ASGI da statik fayllarni config.asgi zanjirdan oldin beradi.
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+if SERVER_MODE == "asgi":
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        # config darajasidagi admin shablonlari (seek_change_list, query_log)
+        'DIRS': [BASE_DIR / 'config' / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -84,6 +95,76 @@ DATABASES = {
     }
 }
 
+# Lokal ishlash va benchmark (python -m benchmarks) uchun: DJANGO_DB=sqlite
+if os.getenv("DJANGO_DB") == "sqlite":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            # SQLite select_for_update ni e'tiborsiz qoldiradi: IMMEDIATE tranzaksiya
+            # boshidayoq yozish qulfini oladi, parallel saqlashlar navbat kutadi
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
+            # Test bazasi ham faylda: xotiradagi baza bitta ulanishga bog'liq, parallel
+            # saqlash testi (sales.tests.ConcurrentSaleSaveTests) bir nechta ulanish ochadi
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
+
+# Kesh (admin ro'yxati, hisobotlar, master jadvallar - config.mastercache).
+# CACHE_BACKEND: locmem (standart, jarayon ichida), file (CACHE_LOCATION katalogi,
+# bir serverdagi barcha jarayonlar uchun umumiy) yoki redis (REDIS_URL). REDIS_URL
+# berilgan va redis paketi o'rnatilgan bo'lsa redis standart bo'ladi.
+# Fon vazifalari (manage.py run_jobs) yoki bir nechta server jarayoni
+# (UVICORN_WORKERS>1) bo'lsa locmem yaramaydi - bir jarayondagi kesh tozalash
+# boshqasiga yetmaydi; run_jobs va config.serve_asgi locmem bilan ishga tushmaydi.
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_BACKEND = os.getenv("CACHE_BACKEND") or ("redis" if REDIS_URL and find_spec("redis") else "locmem")
+CACHE_BACKENDS = {
+    "locmem": {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mebel',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    "file": {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv("CACHE_LOCATION", str(BASE_DIR / '.cache')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    "redis": {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL or 'redis://127.0.0.1:6379/1',
+    },
+}
+CACHES = {
+    'default': {**CACHE_BACKENDS[CACHE_BACKEND], 'KEY_PREFIX': 'mebel'},
+}
+
+# Postgres ulanishlari (python -m config.serve yoki config.serve_asgi). DB_POOL=1 - psycopg 3 connection pool;
+# aks holda har bir waitress thread o'z ulanishini CONN_MAX_AGE soniya saqlaydi.
+# Ikkalasi birga ishlamaydi: pool da ulanish so'rov oxirida pool ga qaytadi.
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 8))
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    if os.getenv("DB_POOL") == "1":
+        from psycopg_pool import ConnectionPool
+
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': DB_POOL_MIN_SIZE,
+                'max_size': DB_POOL_MAX_SIZE,
+                # Bo'sh ulanish kutish vaqti va yopilishidan oldingi bo'sh turish vaqti (soniya)
+                'timeout': 10,
+                'max_idle': 300,
+                # Pool dan berishdan oldin ulanish tirikligini tekshirish
+                'check': ConnectionPool.check_connection,
+            },
+        }
+    else:
+        # ASGI da har so'rov o'z thread kontekstida - doimiy ulanishlar qayta ishlatilmaydi
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv("CONN_MAX_AGE", 60 if SERVER_MODE == "wsgi" else 0))
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -117,3 +198,15 @@ STATIC_URL = '/static/'
 # STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 USE_THOUSAND_SEPARATOR = True
+
+# Admin so'rovlari statistikasi (config.instrumentation, /admin/query-log/)
+QUERY_LOG = {
+    "BUFFER_SIZE": 500,
+    "SLOW_MS": 500,
+    "MAX_QUERIES": 50,
+    "DUPLICATE_THRESHOLD": 5,
+    "LOG_WARNINGS": True,
+}
+
+# Testlarda ataylab og'ir so'rovlar ko'p - runner QUERY_LOG ogohlantirishlarini o'chiradi
+TEST_RUNNER = "config.test_runner.TestRunner"
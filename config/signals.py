@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+
+# Sarlavha jamilari (Sale.total_price, Expenses.total_cost, ...) save() ni
+# chetlab o'tib, queryset.update() yoki bulk_update() bilan o'zgarganda
+# yuboriladi. `pks` - o'zgargan sarlavhalar id lari.
+totals_changed = Signal()
+
+# config.formsets.bulk_save_formset tugaganda yuboriladi (bulk_create/bulk_update
+# post_save yubormaydi). `sender` - element modeli, `instance` - sarlavha.
+formset_saved = Signal()
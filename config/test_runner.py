@@ -0,0 +1,22 @@
+"""
+manage.py test uchun runner (settings.TEST_RUNNER).
+
+Testlar ataylab ko'p qatorli va ko'p so'rovli admin sahifalarini ochadi -
+config.instrumentation ularni "sekin" deb log ga yozmasligi uchun
+QUERY_LOG["LOG_WARNINGS"] test davomida o'chiriladi. So'rovlar
+statistikasining o'zi (request_log) ishlayveradi.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.quiet_query_log = override_settings(QUERY_LOG={**settings.QUERY_LOG, "LOG_WARNINGS": False})
+        self.quiet_query_log.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.quiet_query_log.disable()
+        super().teardown_test_environment(**kwargs)
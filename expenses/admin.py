@@ -2,54 +2,82 @@ from django.contrib import admin
 from django.db import models as dj_models
 from django.forms import TextInput, Textarea
 from django.utils.formats import number_format
+from config.api import LastPriceLookupMixin
+from config.autocomplete import CachedAutocompleteMixin
+from config.concurrency import VersionedAdminMixin, VersionedInlineMixin
+from config.export import export_action
+from config.formsets import bulk_save_formset
+from config.pagination import SeekPaginationMixin
+from config.search import NormalizedSearchMixin
+from reports.admin import message_job, price_history_link
+from reports.jobs import submit
+from .exports import food_items_export, raw_items_export
 from .models import FoodProducts, RawMaterials, Expenses, FoodItem, RawItem
 
 # Mahsulotlar va xomashyolarni oddiy ro'yxat sifatida ro'yxatdan o'tkazamiz
 @admin.register(FoodProducts)
-class FoodProductsAdmin(admin.ModelAdmin):
-    list_display = ('food_product_name', 'measurement_unit', 'created_at')
-    # search_fields = ('food_product_name',)
+class FoodProductsAdmin(NormalizedSearchMixin, LastPriceLookupMixin, admin.ModelAdmin):
+    list_display = ('food_product_name', 'measurement_unit', 'last_price', 'last_price_date', 'price_history_link', 'created_at')
+
+    @admin.display(description="Narx tarixi")
+    def price_history_link(self, obj):
+        return price_history_link(obj, "food_product")
 
 @admin.register(RawMaterials)
-class RawMaterialsAdmin(admin.ModelAdmin):
-    list_display = ('raw_material_name', 'measurement_unit', 'created_at')
-    # search_fields = ('raw_material_name',)
+class RawMaterialsAdmin(NormalizedSearchMixin, LastPriceLookupMixin, admin.ModelAdmin):
+    list_display = ('raw_material_name', 'measurement_unit', 'last_price', 'last_price_date', 'price_history_link', 'created_at')
+
+    @admin.display(description="Narx tarixi")
+    def price_history_link(self, obj):
+        return price_history_link(obj, "raw_material")
 
 # ----------------------------------------------------------------------
 @admin.register(FoodItem)
-class FoodItemAdmin(admin.ModelAdmin):
+class FoodItemAdmin(CachedAutocompleteMixin, SeekPaginationMixin, admin.ModelAdmin):
 	list_display = ("food_product", "quantity", "price", "total_item_price", "expense", "created_at" )
+	list_display_related = {
+		"food_product": ("food_product_name", "measurement_unit"),
+		"expense": ("date",),
+	}
 	readonly_fields = ("total_item_price",)
+	actions = (export_action(food_items_export),)
+	autocomplete_fields = ("food_product",)
 
 	formfield_overrides = {
 		dj_models.DecimalField: {'widget': TextInput(attrs={'class': 'thousand-sep'})},
 	}
 
-	def save_model(self, request, obj, form, change):
-		super().save_model(request, obj, form, change)
-		
-		# FoodItem saqlangandan keyin tegishli Expenses ning total_cost ni yangilash
-		if obj.expense:
-			obj.expense.update_total_cost()
+	# FoodItem.save()/delete() Expenses.total_cost ga deltani o'zi qo'llaydi.
+	# Ommaviy o'chirish model delete() ni chaqirmaydi, shuning uchun qayta hisoblaymiz.
+	def delete_queryset(self, request, queryset):
+		expense_ids = set(queryset.values_list("expense_id", flat=True))
+		super().delete_queryset(request, queryset)
+		Expenses.objects.filter(pk__in=expense_ids).rebuild_total_cost()
 
 	class Media:
 		js = ('expenses/js/calculate_total.js', 'expenses/js/decimal_thousands.js',)
 
 @admin.register(RawItem)
-class RawItemAdmin(admin.ModelAdmin):
+class RawItemAdmin(CachedAutocompleteMixin, SeekPaginationMixin, admin.ModelAdmin):
 	list_display = ("raw_material", "quantity", "price", "total_item_price", "expense", "created_at" )
+	list_display_related = {
+		"raw_material": ("raw_material_name", "measurement_unit"),
+		"expense": ("date",),
+	}
 	readonly_fields = ("total_item_price",)
+	actions = (export_action(raw_items_export),)
+	autocomplete_fields = ("raw_material",)
 
 	formfield_overrides = {
 		dj_models.DecimalField: {'widget': TextInput(attrs={'class': 'thousand-sep'})},
 	}
 
-	def save_model(self, request, obj, form, change):
-		super().save_model(request, obj, form, change)
-		
-		# RawItem saqlangandan keyin tegishli Expenses ning total_cost ni yangilash
-		if obj.expense:
-			obj.expense.update_total_cost()
+	# RawItem.save()/delete() Expenses.total_cost ga deltani o'zi qo'llaydi.
+	# Ommaviy o'chirish model delete() ni chaqirmaydi, shuning uchun qayta hisoblaymiz.
+	def delete_queryset(self, request, queryset):
+		expense_ids = set(queryset.values_list("expense_id", flat=True))
+		super().delete_queryset(request, queryset)
+		Expenses.objects.filter(pk__in=expense_ids).rebuild_total_cost()
 
 	class Media:
 		js = ('expenses/js/calculate_total.js', 'expenses/js/decimal_thousands.js',)
@@ -57,10 +85,11 @@ class RawItemAdmin(admin.ModelAdmin):
 # ----------------------------------------------------------------------
 # --- Inlines: Expenses ichida ko'rinadigan qismlar ---
 
-class FoodItemInline(admin.TabularInline):
+class FoodItemInline(VersionedInlineMixin, CachedAutocompleteMixin, admin.TabularInline):
     model = FoodItem
     extra = 0  # Bo'sh qatorlar soni
     fields = ('food_product', 'quantity', 'price', 'total_item_price_display')
+    autocomplete_fields = ('food_product',)
     readonly_fields = ('total_item_price_display',)
 
     formfield_overrides = {
@@ -74,10 +103,11 @@ class FoodItemInline(admin.TabularInline):
     total_item_price_display.short_description = "Total Price"
     total_item_price_display.allow_tags = True
 
-class RawItemInline(admin.TabularInline):
+class RawItemInline(VersionedInlineMixin, CachedAutocompleteMixin, admin.TabularInline):
     model = RawItem
     extra = 0
     fields = ('raw_material', 'quantity', 'price', 'total_item_price_display')
+    autocomplete_fields = ('raw_material',)
     readonly_fields = ('total_item_price_display',)
 
     formfield_overrides = {
@@ -94,11 +124,12 @@ class RawItemInline(admin.TabularInline):
 # --- Expenses Admin ---
 
 @admin.register(Expenses)
-class ExpensesAdmin(admin.ModelAdmin):
+class ExpensesAdmin(VersionedAdminMixin, admin.ModelAdmin):
     list_display = ('date', 'created_by', 'total_cost', 'description', 'created_at')
     # list_filter = ('date', 'created_by')
     # search_fields = ('description',)
     inlines = [FoodItemInline, RawItemInline]
+    actions = ('rebuild_total_cost',)
 
     # total_cost modelda editable=False bo'lgani uchun readonly_fields'ga qo'shish kerak
     readonly_fields = ('food_items_total', 'raw_items_total', 'total_cost')
@@ -110,29 +141,21 @@ class ExpensesAdmin(admin.ModelAdmin):
 	}
 
     class Media:
-        js = ('expenses/js/calculate_total.js', 'expenses/js/decimal_thousands.js',)
+        js = ('expenses/js/calculate_total.js', 'expenses/js/decimal_thousands.js', 'expenses/js/live_lookups.js',)
+
+    @admin.action(description="Umumiy summani qayta hisoblash")
+    def rebuild_total_cost(self, request, queryset):
+        pks = list(queryset.values_list('pk', flat=True))
+        message_job(self, request, submit("expenses.rebuild_total_cost", {"pks": pks}, request.user, size=len(pks)))
 
     def save_formset(self, request, form, formset, change):
         """
-        Inline mahsulotlar saqlangandan so'ng Expenses'ning total_cost'ini
-        avtomatik qayta hisoblash uchun ushbu metoddan foydalanamiz.
+        Inline mahsulotlarni paket bilan saqlaydi. Expenses'ning total_cost'i
+        barcha qatorlar farqining yig'indisi bilan bitta UPDATE da yangilanadi
+        (formset_saved signalida - expenses.signals).
         """
-        instances = formset.save(commit=False)
-        deleted_instances = formset.deleted_objects
-        
-        # O'chirilgan itemlarni saqlash
-        for obj in deleted_instances:
-            obj.delete()
-        
-        # Yangi va o'zgartirilgan itemlarni saqlash
-        for instance in instances:
-            instance.save()
-        
-        formset.save_m2m()
-        
-        # Asosiy Expense obyektini yangilash
-        form.instance.update_total_cost()
-        return instances
+        created, changed, deleted = bulk_save_formset(formset)
+        return created + changed
 
     def save_model(self, request, obj, form, change):
         # Yaratuvchini avtomatik joriy foydalanuvchiga sozlash
@@ -5,3 +5,6 @@ class ExpensesConfig(AppConfig):
     name = 'expenses'
     verbose_name = '4. Xarajatlar'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+
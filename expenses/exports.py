@@ -0,0 +1,33 @@
+from config.export import ExportSpec
+
+from .models import FoodItem, RawItem
+
+food_items_export = ExportSpec(
+    "food_items",
+    FoodItem,
+    columns=[
+        ("ID", "id"),
+        ("Sana", "expense__date"),
+        ("Oziq-ovqat nomi", "food_product__food_product_name"),
+        ("O'lchov birligi", "food_product__measurement_unit"),
+        ("Miqdori", "quantity"),
+        ("Narxi", "price"),
+        ("Yaratilgan sana", "created_at"),
+    ],
+    date_field="expense__date",
+)
+
+raw_items_export = ExportSpec(
+    "raw_items",
+    RawItem,
+    columns=[
+        ("ID", "id"),
+        ("Sana", "expense__date"),
+        ("Xom-ashyo nomi", "raw_material__raw_material_name"),
+        ("O'lchov birligi", "raw_material__measurement_unit"),
+        ("Miqdori", "quantity"),
+        ("Narxi", "price"),
+        ("Yaratilgan sana", "created_at"),
+    ],
+    date_field="expense__date",
+)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from expenses.models import Expenses
+
+
+class Command(BaseCommand):
+    help = "Expenses.total_cost ni FoodItem va RawItem'lardan to'liq qayta hisoblaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Faqat shu sana (YYYY-MM-DD) uchun")
+        parser.add_argument("--check", action="store_true", help="Faqat mos kelmaganlarni ko'rsatish, yozmaslik")
+
+    def handle(self, *args, **options):
+        queryset = Expenses.objects.all()
+        if options["date"]:
+            queryset = queryset.filter(date=options["date"])
+
+        for expense in queryset.with_total_mismatch().order_by("date"):
+            self.stdout.write(f"{expense.date}: saqlangan={expense.total_cost} haqiqiy={expense.items_total}")
+
+        if options["check"]:
+            return
+
+        updated = queryset.rebuild_total_cost()
+        self.stdout.write(self.style.SUCCESS(f"{updated} ta xarajat qayta hisoblandi."))
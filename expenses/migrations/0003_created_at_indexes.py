@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodproducts',
+            index=models.Index(fields=['-created_at'], name='expenses_food_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawmaterials',
+            index=models.Index(fields=['-created_at'], name='expenses_raw_created_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0004_last_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fooditem',
+            index=models.Index(fields=['-created_at', '-id'], name='expenses_fooditem_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rawitem',
+            index=models.Index(fields=['-created_at', '-id'], name='expenses_rawitem_created_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+from config.search import add_search_text_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0005_item_created_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodproducts',
+            name='search_text',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=500, verbose_name='Qidiruv matni'),
+        ),
+        migrations.AddField(
+            model_name='rawmaterials',
+            name='search_text',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=500, verbose_name='Qidiruv matni'),
+        ),
+        *add_search_text_index('expenses.FoodProducts', 'expenses_food_search_trgm', ('food_product_name',)),
+        *add_search_text_index('expenses.RawMaterials', 'expenses_raw_search_trgm', ('raw_material_name',)),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0006_search_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expenses',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Versiya'),
+        ),
+    ]
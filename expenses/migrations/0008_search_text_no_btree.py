@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0007_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='foodproducts',
+            name='search_text',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500, verbose_name='Qidiruv matni'),
+        ),
+        migrations.AlterField(
+            model_name='rawmaterials',
+            name='search_text',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500, verbose_name='Qidiruv matni'),
+        ),
+    ]
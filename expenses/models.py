@@ -1,39 +1,132 @@
 from django.conf import settings
 from django.db import models
 from django.core.exceptions import ValidationError
+from django.db.models.functions import Coalesce, Round
 from django.utils.formats import number_format
+from decimal import ROUND_HALF_UP, Decimal
 import uuid
 
+from config.concurrency import VersionedModel
+from config.deltas import SavedLineMixin
+from config.mastercache import MasterForeignKey
+from config.search import SearchTextModel
+from config.signals import totals_changed
+
+
+CENT = Decimal("0.01")
+
+
+def line_total(quantity, price):
+    """
+    Qator summasi tiyingacha yaxlitlangan - total_cost ga qo'shiladigan farq
+    ham, SUM bilan qayta hisoblash (line_total_expression) ham bir xil qiymatni
+    qo'shadi. Aks holda numeric(20,2) ustun har bir UPDATE da yaxlitlanib,
+    with_total_mismatch buzilmagan xarajatni ham ko'rsatardi.
+    """
+    return (Decimal(quantity or 0) * Decimal(price or 0)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def line_total_expression():
+    # Round: PostgreSQL va SQLite da ham yarmi noldan uzoqqa (ROUND_HALF_UP)
+    return Round(
+        models.F("quantity") * models.F("price"),
+        2,
+        output_field=models.DecimalField(max_digits=20, decimal_places=2),
+    )
+
+
+def items_sum_subquery(item_model):
+    """Bitta Expenses uchun item_model qatorlari yig'indisi (korrelyatsiyalangan subquery)."""
+    sums = (
+        item_model.objects.filter(expense=models.OuterRef("pk"))
+        .order_by()
+        .values("expense")
+        .annotate(total=models.Sum(line_total_expression()))
+        .values("total")
+    )
+    return Coalesce(
+        models.Subquery(sums, output_field=models.DecimalField(max_digits=20, decimal_places=2)),
+        models.Value(0),
+        output_field=models.DecimalField(max_digits=20, decimal_places=2),
+    )
+
 # FoodProducts va RawMaterials alohida qolmoqda
-class FoodProducts(models.Model):
+class FoodProducts(SearchTextModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     food_product_name = models.CharField(max_length=255, verbose_name="Oziq-ovqat nomi")
     measurement_unit = models.CharField(max_length=64, blank=True, verbose_name="O'lchov birligi")
+    # reports.PriceHistory dan yangilanadi
+    last_price = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True, editable=False, verbose_name="Oxirgi narx")
+    last_price_date = models.DateField(null=True, blank=True, editable=False, verbose_name="Oxirgi narx sanasi")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
 
     class Meta:
         verbose_name = "Oziq-ovqat "
         verbose_name_plural = "Oziq-ovqatlar "
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at"], name="expenses_food_created_idx"),
+        ]
+
+    search_text_fields = ("food_product_name",)
 
     def __str__(self):
         return f"{self.food_product_name} ({self.measurement_unit})"
 
-class RawMaterials(models.Model):
+class RawMaterials(SearchTextModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     raw_material_name = models.CharField(max_length=255, verbose_name="Xom-ashyo nomi")
     measurement_unit = models.CharField(max_length=64, blank=True, verbose_name="O'lchov birligi")
+    # reports.PriceHistory dan yangilanadi
+    last_price = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True, editable=False, verbose_name="Oxirgi narx")
+    last_price_date = models.DateField(null=True, blank=True, editable=False, verbose_name="Oxirgi narx sanasi")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
 
     class Meta:
         verbose_name = "Xom-ashyo "
         verbose_name_plural = "Xom-ashyolar "
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at"], name="expenses_raw_created_idx"),
+        ]
+
+    search_text_fields = ("raw_material_name",)
 
     def __str__(self):
         return f"{self.raw_material_name} ({self.measurement_unit})"
 
-class Expenses(models.Model):
+class ExpensesQuerySet(models.QuerySet):
+    def apply_total_delta(self, expense_id, delta):
+        """
+        total_cost ga farqni bitta atomar F() UPDATE bilan qo'shadi. UPDATE qatorni
+        qulflaydi va F() oxirgi tasdiqlangan qiymatga qo'llanadi - parallel
+        farqlar yo'qolmaydi. Farq 0 bo'lsa ham versiya oshiriladi.
+        """
+        if expense_id is None:
+            return
+        if not delta:
+            self.filter(pk=expense_id).update(version=Expenses.version_increment())
+            return
+        self.filter(pk=expense_id).update(total_cost=models.F("total_cost") + delta, version=Expenses.version_increment())
+        totals_changed.send(sender=Expenses, pks=[expense_id])
+
+    def with_total_mismatch(self):
+        """Saqlangan total_cost itemlar yig'indisiga mos kelmaydigan xarajatlar."""
+        return self.annotate(
+            items_total=items_sum_subquery(FoodItem) + items_sum_subquery(RawItem)
+        ).exclude(total_cost=models.F("items_total"))
+
+    def rebuild_total_cost(self):
+        """Tanlangan xarajatlar total_cost ini itemlardan to'liq qayta hisoblaydi (ta'mirlash uchun)."""
+        pks = list(self.values_list("pk", flat=True))
+        updated = Expenses.objects.filter(pk__in=pks).update(
+            total_cost=items_sum_subquery(FoodItem) + items_sum_subquery(RawItem)
+        )
+        totals_changed.send(sender=Expenses, pks=pks)
+        return updated
+
+
+class Expenses(VersionedModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Yaratgan foydalanuvchi")
     date = models.DateField(unique=True, verbose_name="Sana")
@@ -41,18 +134,31 @@ class Expenses(models.Model):
     description = models.TextField(blank=True, verbose_name="Tavsif")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
 
+    objects = ExpensesQuerySet.as_manager()
+
+    totals_fields = ("total_cost",)
+
     def clean(self):
         if self.date and Expenses.objects.filter(date=self.date).exclude(pk=self.pk).exists():
             raise ValidationError({'date': 'Bu sana uchun xarajat allaqachon yaratilgan.'})
 
+    def save(self, *args, **kwargs):
+        # total_cost faqat F() delta yoki update_total_cost orqali yoziladi,
+        # eskirgan xotiradagi qiymat bazadagi summani bosib ketmasligi uchun
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "total_cost"
+            ]
+        super().save(*args, **kwargs)
+
     def update_total_cost(self):
         """
-        Xarajatning umumiy summasini FoodItem va RawItem'lar asosida hisoblaydi.
+        Xarajatning umumiy summasini FoodItem va RawItem'lar asosida to'liq qayta hisoblaydi.
+        Oddiy tahrirlarda kerak emas - itemlar o'zi delta qo'llaydi.
         """
-        food_sum = sum(item.total_item_price for item in self.food_items.all())
-        raw_sum = sum(item.total_item_price for item in self.raw_items.all())
-        self.total_cost = food_sum + raw_sum
-        self.save()
+        Expenses.objects.filter(pk=self.pk).rebuild_total_cost()
+        self.refresh_from_db(fields=["total_cost"])
 
     @property
     def food_items_total(self):
@@ -69,10 +175,59 @@ class Expenses(models.Model):
     def __str__(self):
         return f"Expense - {self.date}"
 
-class FoodItem(models.Model):
+class ExpenseItemTotalMixin(SavedLineMixin):
+    """
+    FoodItem/RawItem saqlanganda yoki o'chirilganda Expenses.total_cost ni
+    butun ro'yxatni qayta hisoblamasdan, faqat farq (delta) bilan yangilaydi.
+    """
+
+    saved_line_fields = ("expense_id", "quantity", "price")
+
+    def make_line(self, expense_id, quantity, price):
+        return expense_id, line_total(quantity, price)
+
+    def _get_saved_line(self):
+        return super()._get_saved_line() or (None, 0)
+
+    @classmethod
+    def total_delta(cls, created, changed, deleted):
+        """
+        Bitta xarajatga tegishli paketli yozuv (bulk_save_formset) uchun
+        total_cost ga qo'llanadigan umumiy farq.
+        """
+        delta = sum(item.total_item_price for item in created)
+        for item in changed:
+            delta += item.total_item_price - item._get_saved_line()[1]
+            item._remember_saved_line()
+        for item in deleted:
+            delta -= item._get_saved_line()[1]
+        for item in created:
+            item._remember_saved_line()
+        return delta
+
+    def save(self, *args, **kwargs):
+        old_expense_id, old_total = self._get_saved_line()
+        super().save(*args, **kwargs)
+        new_total = self.total_item_price
+
+        if old_expense_id == self.expense_id:
+            Expenses.objects.apply_total_delta(self.expense_id, new_total - old_total)
+        else:
+            Expenses.objects.apply_total_delta(old_expense_id, -old_total)
+            Expenses.objects.apply_total_delta(self.expense_id, new_total)
+        self._remember_saved_line()
+
+    def delete(self, *args, **kwargs):
+        expense_id, total = self._get_saved_line()
+        result = super().delete(*args, **kwargs)
+        Expenses.objects.apply_total_delta(expense_id, -total)
+        return result
+
+
+class FoodItem(ExpenseItemTotalMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     expense = models.ForeignKey(Expenses, on_delete=models.CASCADE, related_name="food_items")
-    food_product = models.ForeignKey(FoodProducts, on_delete=models.CASCADE, verbose_name="Oziq-ovqat nomi")
+    food_product = MasterForeignKey(FoodProducts, on_delete=models.CASCADE, verbose_name="Oziq-ovqat nomi")
     quantity = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Miqdori")
     price = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Narxi") # Narx majburiy bo'lgani ma'qul
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
@@ -80,19 +235,22 @@ class FoodItem(models.Model):
     class Meta:
         verbose_name = "[ Oziq-ovqat elementi ] "
         verbose_name_plural = "[ Oziq-ovqat elementlari ] "
+        indexes = [
+            # Changelist keyset sahifalashi: ORDER BY created_at DESC, id DESC
+            models.Index(fields=["-created_at", "-id"], name="expenses_fooditem_created_idx"),
+        ]
 
     @property
     def total_item_price(self):
-        total = self.quantity * self.price
-        return total
+        return line_total(self.quantity, self.price)
 
     def __str__(self):
         return f"{self.food_product.food_product_name} - {self.quantity}"
 
-class RawItem(models.Model):
+class RawItem(ExpenseItemTotalMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     expense = models.ForeignKey(Expenses, on_delete=models.CASCADE, related_name="raw_items")
-    raw_material = models.ForeignKey(RawMaterials, on_delete=models.CASCADE, verbose_name="Xom-ashyo nomi")
+    raw_material = MasterForeignKey(RawMaterials, on_delete=models.CASCADE, verbose_name="Xom-ashyo nomi")
     quantity = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Miqdori")
     price = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Narxi")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
@@ -100,11 +258,14 @@ class RawItem(models.Model):
     class Meta:
         verbose_name = "[ Xom-ashyo elementi ] "
         verbose_name_plural = "[ Xom-ashyo elementlari ] "
+        indexes = [
+            # Changelist keyset sahifalashi: ORDER BY created_at DESC, id DESC
+            models.Index(fields=["-created_at", "-id"], name="expenses_rawitem_created_idx"),
+        ]
 
     @property
     def total_item_price(self):
-        total = self.quantity * self.price
-        return total
+        return line_total(self.quantity, self.price)
 
     def __str__(self):
         return f"{self.raw_material.raw_material_name} - {self.quantity}"
\ No newline at end of file
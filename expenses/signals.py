@@ -0,0 +1,12 @@
+from config.signals import formset_saved
+
+from .models import Expenses, FoodItem, RawItem
+
+
+def apply_on_formset_saved(sender, instance, created, changed, deleted, **kwargs):
+    """Paketli saqlash (config.formsets) save() ni chetlab o'tadi - total_cost bitta farq bilan."""
+    Expenses.objects.apply_total_delta(instance.pk, sender.total_delta(created, changed, deleted))
+
+
+for item_model in (FoodItem, RawItem):
+    formset_saved.connect(apply_on_formset_saved, sender=item_model)
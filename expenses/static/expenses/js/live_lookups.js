@@ -0,0 +1,47 @@
+// Xarajat formasida oziq-ovqat yoki xom-ashyo tanlanganda oxirgi narxni taklif qiladi.
+document.addEventListener('DOMContentLoaded', function () {
+    // autocomplete_fields (select2) tanlovni faqat jQuery hodisasi bilan bildiradi -
+    // quyidagi oddiy 'change' tinglovchilariga yetkazamiz
+    if (window.django && django.jQuery) {
+        django.jQuery(document).on('select2:select select2:clear', 'select', function () {
+            this.dispatchEvent(new Event('change', { bubbles: true }));
+        });
+    }
+
+    const endpoints = {
+        'food_product': '/admin/expenses/foodproducts/last-price/',
+        'raw_material': '/admin/expenses/rawmaterials/last-price/',
+    };
+    const cache = {};
+
+    function formatNumber(value) {
+        const number = parseFloat(value) || 0;
+        return number.toLocaleString('ru-RU', { maximumFractionDigits: 2 });
+    }
+
+    document.addEventListener('change', function (event) {
+        const select = event.target;
+        const field = Object.keys(endpoints).find(name => select.matches(`select[name$="-${name}"]`));
+        if (!field || !select.value) return;
+
+        const row = select.closest('tr');
+        const priceInput = row && row.querySelector('input[name$="-price"]');
+        if (!priceInput) return;
+
+        const url = `${endpoints[field]}${select.value}/`;
+        if (!cache[url]) {
+            cache[url] = fetch(url, { credentials: 'same-origin' })
+                .then(response => response.ok ? response.json() : null)
+                .catch(() => null);
+        }
+        cache[url].then(data => {
+            if (!data) return;
+            priceInput.placeholder = formatNumber(data.price);
+            priceInput.title = `Oxirgi narx: ${formatNumber(data.price)} (${data.date})`;
+            if (!priceInput.value || parseFloat(priceInput.value) === 0) {
+                priceInput.value = data.price;
+                priceInput.dispatchEvent(new Event('input', { bubbles: true }));
+            }
+        });
+    });
+});
@@ -1,3 +1,138 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from expenses.models import Expenses, FoodItem, FoodProducts, RawItem, RawMaterials
+
+
+class ExpensesTotalCostTests(TestCase):
+    def setUp(self):
+        self.expense = Expenses.objects.create(date=datetime.date(2026, 1, 1))
+        self.food = FoodProducts.objects.create(food_product_name="Non", measurement_unit="dona")
+        self.raw = RawMaterials.objects.create(raw_material_name="Taxta", measurement_unit="m")
+
+    def total_cost(self, expense=None):
+        expense = expense or self.expense
+        expense.refresh_from_db()
+        return expense.total_cost
+
+    def test_insert_update_delete_apply_deltas(self):
+        food_item = FoodItem.objects.create(expense=self.expense, food_product=self.food, quantity=Decimal("2"), price=Decimal("10"))
+        RawItem.objects.create(expense=self.expense, raw_material=self.raw, quantity=Decimal("3"), price=Decimal("100"))
+        self.assertEqual(self.total_cost(), Decimal("320"))
+
+        food_item = FoodItem.objects.get(pk=food_item.pk)
+        food_item.quantity = Decimal("5")
+        food_item.save()
+        self.assertEqual(self.total_cost(), Decimal("350"))
+
+        food_item.delete()
+        self.assertEqual(self.total_cost(), Decimal("300"))
+
+    def test_item_save_does_not_read_other_items(self):
+        for _ in range(20):
+            RawItem.objects.create(expense=self.expense, raw_material=self.raw, quantity=Decimal("1"), price=Decimal("1"))
+        item = RawItem.objects.first()
+        item.price = Decimal("2")
+        with CaptureQueriesContext(connection) as context:
+            item.save()
+        queries = [query["sql"] for query in context.captured_queries]
+        # total_cost uchun bitta F() UPDATE, itemlar yig'indisi qayta hisoblanmaydi
+        # (narx tarixi faqat shu kunning qatorlarini o'qiydi, oylik yig'indi - shu oyning)
+        self.assertEqual(len([sql for sql in queries if sql.startswith('UPDATE "expenses_expenses"')]), 1)
+        self.assertFalse([
+            sql for sql in queries
+            if sql.startswith("SELECT") and '"expenses_rawitem"' in sql and "SUM(" in sql and "rollup_month" not in sql
+        ])
+        self.assertEqual(self.total_cost(), Decimal("21"))
+
+    def test_moving_item_to_other_expense(self):
+        other = Expenses.objects.create(date=datetime.date(2026, 1, 2))
+        item = FoodItem.objects.create(expense=self.expense, food_product=self.food, quantity=Decimal("1"), price=Decimal("7"))
+        item.expense = other
+        item.save()
+        self.assertEqual(self.total_cost(), Decimal("0"))
+        self.assertEqual(self.total_cost(other), Decimal("7"))
+
+    def test_stale_header_save_keeps_total_cost(self):
+        stale = Expenses.objects.get(pk=self.expense.pk)
+        FoodItem.objects.create(expense=self.expense, food_product=self.food, quantity=Decimal("1"), price=Decimal("9"))
+        stale.description = "Tahrir"
+        stale.save()
+        self.assertEqual(self.total_cost(), Decimal("9"))
+
+    def test_fractional_lines_round_like_rebuild(self):
+        # 1.5 * 0.11 = 0.165: har bir qator tiyingacha, jami 0.34 (rebuild ham 0.34)
+        for _ in range(2):
+            FoodItem.objects.create(expense=self.expense, food_product=self.food, quantity=Decimal("1.5"), price=Decimal("0.11"))
+        self.assertEqual(self.total_cost(), Decimal("0.34"))
+        self.assertFalse(Expenses.objects.with_total_mismatch().exists())
+        Expenses.objects.filter(pk=self.expense.pk).rebuild_total_cost()
+        self.assertEqual(self.total_cost(), Decimal("0.34"))
+
+    def test_rebuild_repairs_drift(self):
+        FoodItem.objects.create(expense=self.expense, food_product=self.food, quantity=Decimal("4"), price=Decimal("5"))
+        Expenses.objects.filter(pk=self.expense.pk).update(total_cost=Decimal("1"))
+        self.assertTrue(Expenses.objects.with_total_mismatch().exists())
+
+        out = StringIO()
+        call_command("rebuild_expense_totals", stdout=out)
+        self.assertIn("2026-01-01", out.getvalue())
+        self.assertEqual(self.total_cost(), Decimal("20"))
+        self.assertFalse(Expenses.objects.with_total_mismatch().exists())
+
+
+class ExpensesFormsetBulkSaveTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_superuser("admin", password="admin")
+        self.client.force_login(user)
+        self.expense = Expenses.objects.create(date=datetime.date(2026, 1, 1))
+        self.food = FoodProducts.objects.create(food_product_name="Non", measurement_unit="dona")
+        self.raw = RawMaterials.objects.create(raw_material_name="Taxta", measurement_unit="m")
+
+    def formset_data(self, prefix, rows, initial_count=0):
+        data = {
+            f"{prefix}-TOTAL_FORMS": str(len(rows)),
+            f"{prefix}-INITIAL_FORMS": str(initial_count),
+            f"{prefix}-MIN_NUM_FORMS": "0",
+            f"{prefix}-MAX_NUM_FORMS": "1000",
+        }
+        for index, row in enumerate(rows):
+            for key, value in row.items():
+                data[f"{prefix}-{index}-{key}"] = value
+        return data
+
+    def test_formset_applies_one_delta(self):
+        kept = FoodItem.objects.create(expense=self.expense, food_product=self.food, quantity=Decimal("1"), price=Decimal("10"))
+        removed = FoodItem.objects.create(expense=self.expense, food_product=self.food, quantity=Decimal("1"), price=Decimal("5"))
+        food_rows = [
+            {"id": str(kept.pk), "expense": str(self.expense.pk), "food_product": str(self.food.pk), "quantity": "3", "price": "10"},
+            {"id": str(removed.pk), "expense": str(self.expense.pk), "food_product": str(self.food.pk), "quantity": "1", "price": "5", "DELETE": "on"},
+        ]
+        raw_rows = [
+            {"raw_material": str(self.raw.pk), "quantity": "2", "price": "100"}
+            for _ in range(25)
+        ]
+        data = {
+            "date": "2026-01-01",
+            "description": "",
+            **self.formset_data("food_items", food_rows, initial_count=2),
+            **self.formset_data("raw_items", raw_rows),
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse("admin:expenses_expenses_change", args=[self.expense.pk]), data)
+        self.assertEqual(response.status_code, 302)
 
-# Create your tests here.
+        self.expense.refresh_from_db()
+        self.assertEqual(self.expense.raw_items.count(), 25)
+        self.assertEqual(self.expense.total_cost, Decimal("5030"))
+        self.assertFalse(Expenses.objects.with_total_mismatch().exists())
+        raw_inserts = [query for query in context.captured_queries if query["sql"].startswith('INSERT INTO "expenses_rawitem"')]
+        self.assertEqual(len(raw_inserts), 1)
@@ -0,0 +1,275 @@
+import json
+
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils.html import format_html
+
+from config.changelist import ChangeListQueryMixin
+
+from .jobs import launchable_jobs, worker_available
+from .models import PRICE_SOURCES, DailySummary, Job, MonthlyRollup, PriceHistory
+from .rollups import ALL_YEARS, REPORTS, REPORTS_BY_NAME, Period, render_report
+
+# Narx grafigi o'lchamlari (SVG, piksel)
+CHART_WIDTH = 720
+CHART_HEIGHT = 220
+CHART_POINTS = 365
+
+
+def price_history_link(obj, field):
+	"""Master admin ro'yxatidan shu master narx tarixiga (grafik bilan) havola."""
+	url = reverse("admin:reports_pricehistory_changelist")
+	return format_html('<a href="{}?{}__id__exact={}">Grafik</a>', url, field, obj.pk)
+
+
+def job_queued_message(job):
+	"""Admin action dan keyingi xabar: vazifa holati sahifasiga havola."""
+	url = reverse("admin:reports_job_change", args=[job.pk])
+	if job.status == Job.Status.DONE:
+		return format_html('Vazifa bajarildi: <a href="{}">{}</a>', url, job.title)
+	if job.status == Job.Status.FAILED:
+		return format_html('Vazifa xato bilan tugadi: <a href="{}">{}</a>', url, job.title)
+	if not worker_available():
+		return format_html(
+			'Vazifa navbatga qo\'yildi: <a href="{}">{}</a>. Diqqat: CACHE_BACKEND=locmem - '
+			'fon ishchisi (manage.py run_jobs) ishga tushmaydi, vazifa bajarilmaydi.',
+			url, job.title,
+		)
+	return format_html('Vazifa navbatga qo\'yildi: <a href="{}">{}</a> (manage.py run_jobs bajaradi)', url, job.title)
+
+
+def message_job(model_admin, request, job):
+	"""submit() dan keyin: xato bilan tugagan vazifa xato darajasidagi xabar bilan."""
+	level = messages.ERROR if job.status == Job.Status.FAILED else messages.INFO
+	model_admin.message_user(request, job_queued_message(job), level)
+
+
+def price_chart(rows):
+	"""(sana, o'rtacha, eng past, eng yuqori) qatorlaridan SVG polyline nuqtalari."""
+	if len(rows) < 2:
+		return None
+	low = min(row[2] for row in rows)
+	high = max(row[3] for row in rows)
+	span = (high - low) or 1
+	step = CHART_WIDTH / (len(rows) - 1)
+
+	def points(column):
+		return " ".join(
+			f"{index * step:.1f},{CHART_HEIGHT - float((row[column] - low) / span) * CHART_HEIGHT:.1f}"
+			for index, row in enumerate(rows)
+		)
+
+	return {
+		"width": CHART_WIDTH,
+		"height": CHART_HEIGHT,
+		"avg_points": points(1),
+		"min_points": points(2),
+		"max_points": points(3),
+		"low": low,
+		"high": high,
+		"date_from": rows[0][0],
+		"date_to": rows[-1][0],
+	}
+
+
+@admin.register(DailySummary)
+class DailySummaryAdmin(admin.ModelAdmin):
+	"""Faqat o'qish uchun: qatorlar Sale, Expenses va Salary saqlanganda yangilanadi."""
+
+	list_display = ("date", "sales_total", "expenses_total", "salary_earned", "salary_paid", "net_total", "updated_at")
+	date_hierarchy = "date"
+
+	def has_add_permission(self, request):
+		return False
+
+	def has_change_permission(self, request, obj=None):
+		return False
+
+	def has_delete_permission(self, request, obj=None):
+		return False
+
+	def changelist_view(self, request, extra_context=None):
+		response = super().changelist_view(request, extra_context=extra_context)
+		changelist = getattr(response, "context_data", {}).get("cl")
+		if changelist is not None:
+			# Tanlangan oy/yil bo'yicha jami - faqat summary jadvalida diapazon so'rovi
+			response.context_data["period_totals"] = changelist.queryset.aggregate(
+				sales_total=models.Sum("sales_total"),
+				expenses_total=models.Sum("expenses_total"),
+				salary_paid=models.Sum("salary_paid"),
+				net_total=models.Sum("net_total"),
+			)
+		return response
+
+
+@admin.register(PriceHistory)
+class PriceHistoryAdmin(ChangeListQueryMixin, admin.ModelAdmin):
+	"""Faqat o'qish uchun: qatorlar element saqlanganda yangilanadi. Bitta master tanlansa - grafik."""
+
+	list_display = ("date", "item", "last_price", "min_price", "max_price", "avg_price", "quantity", "items_count")
+	list_display_related = {
+		"product": ("product_name", "measurement_unit"),
+		"food_product": ("food_product_name", "measurement_unit"),
+		"raw_material": ("raw_material_name", "measurement_unit"),
+	}
+	# "Nomi" ustuni uchta FK dan birini ko'rsatadi - ular list_display da yo'q
+	list_only_extra = (
+		"product", "product__product_name", "product__measurement_unit",
+		"food_product", "food_product__food_product_name", "food_product__measurement_unit",
+		"raw_material", "raw_material__raw_material_name", "raw_material__measurement_unit",
+	)
+	date_hierarchy = "date"
+	search_fields = ("product__product_name", "food_product__food_product_name", "raw_material__raw_material_name")
+
+	def has_add_permission(self, request):
+		return False
+
+	def has_change_permission(self, request, obj=None):
+		return False
+
+	def has_delete_permission(self, request, obj=None):
+		return False
+
+	@admin.display(description="Nomi")
+	def item(self, obj):
+		return obj.item
+
+	def changelist_view(self, request, extra_context=None):
+		response = super().changelist_view(request, extra_context=extra_context)
+		changelist = getattr(response, "context_data", {}).get("cl")
+		selected = [source.field for source in PRICE_SOURCES if f"{source.field}__id__exact" in request.GET]
+		if changelist is not None and len(selected) == 1:
+			# (master, sana) unikal indeksi bo'yicha oxirgi CHART_POINTS kun
+			rows = list(
+				changelist.queryset.order_by("-date")
+				.values_list("date", "avg_price", "min_price", "max_price")[:CHART_POINTS]
+			)
+			response.context_data["price_chart"] = price_chart(rows[::-1])
+		return response
+
+
+@admin.register(MonthlyRollup)
+class MonthlyRollupAdmin(admin.ModelAdmin):
+	"""
+	Ro'yxat o'rniga davr hisobotlari (reports.rollups). Qatorlar elementlar
+	saqlanganda yangilanadi, qo'lda o'zgartirilmaydi.
+	"""
+
+	def has_add_permission(self, request):
+		return False
+
+	def has_change_permission(self, request, obj=None):
+		return False
+
+	def has_delete_permission(self, request, obj=None):
+		return False
+
+	def changelist_view(self, request, extra_context=None):
+		if not self.has_view_permission(request):
+			raise PermissionDenied
+		report = REPORTS_BY_NAME.get(request.GET.get("report"), REPORTS[0])
+		period = Period.from_params(request.GET)
+		by_month = bool(request.GET.get("by_month"))
+		bounds = DailySummary.objects.aggregate(first=models.Min("date"), last=models.Max("date"))
+		years = range(bounds["last"].year, bounds["first"].year - 1, -1) if bounds["first"] else []
+
+		context = {
+			**self.admin_site.each_context(request),
+			"opts": self.model._meta,
+			"title": report.title,
+			"report": report,
+			"reports": REPORTS,
+			"period": period,
+			"year_value": period.year or ALL_YEARS,
+			"by_month": by_month,
+			"years": years,
+			"months": range(1, 13),
+			"table": render_report(report, period, by_month),
+			**(extra_context or {}),
+		}
+		return TemplateResponse(request, "admin/reports/monthlyrollup/report.html", context)
+
+
+class JobLaunchForm(forms.ModelForm):
+	"""Admin dan faqat parametrsiz (launchable) vazifalar qo'shiladi."""
+
+	name = forms.ChoiceField(label="Vazifa turi", choices=())
+
+	class Meta:
+		model = Job
+		fields = ("name",)
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.fields["name"].choices = [(job_type.name, job_type.title) for job_type in launchable_jobs()]
+
+
+@admin.register(Job)
+class JobAdmin(ChangeListQueryMixin, admin.ModelAdmin):
+	"""
+	Vazifalar navbati: holat sahifasi vazifa tugaguncha o'zini yangilab turadi.
+	Qo'lda o'zgartirilmaydi - `run_jobs` ishchisi yozadi.
+	"""
+
+	list_display = ("__str__", "status", "progress", "message", "created_by", "started_at", "finished_at")
+	list_display_related = {"created_by": ("first_name", "last_name", "username")}
+	list_only_extra = ("name", "created_at", "progress_done", "progress_total")
+	list_filter = ("status",)
+	actions = ("retry",)
+	change_form_template = "admin/reports/job/change_form.html"
+	status_fields = (
+		"title", "status", "progress", "message", "result_display", "error",
+		"attempts", "worker", "created_by", "created_at", "started_at", "finished_at", "heartbeat_at",
+	)
+
+	def has_change_permission(self, request, obj=None):
+		return False
+
+	def get_form(self, request, obj=None, **kwargs):
+		if obj is None:
+			kwargs["form"] = JobLaunchForm
+		return super().get_form(request, obj, **kwargs)
+
+	def get_fields(self, request, obj=None):
+		return ("name",) if obj is None else self.status_fields
+
+	def get_readonly_fields(self, request, obj=None):
+		return () if obj is None else self.status_fields
+
+	def save_model(self, request, obj, form, change):
+		obj.created_by = request.user
+		super().save_model(request, obj, form, change)
+
+	def response_add(self, request, obj, post_url_continue=None):
+		self.message_user(request, job_queued_message(obj))
+		return HttpResponseRedirect(reverse("admin:reports_job_change", args=[obj.pk]))
+
+	@admin.display(description="Vazifa")
+	def title(self, obj):
+		return obj.title
+
+	@admin.display(description="Bajarilishi")
+	def progress(self, obj):
+		if obj.percent is None:
+			return obj.get_status_display() if obj.is_active else "-"
+		return format_html('<progress max="100" value="{}"></progress> {}%', obj.percent, obj.percent)
+
+	@admin.display(description="Natija")
+	def result_display(self, obj):
+		if obj.result is None:
+			return "-"
+		return format_html("<pre>{}</pre>", json.dumps(obj.result, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2))
+
+	@admin.action(description="Xato bilan tugaganlarni qayta navbatga qo'yish")
+	def retry(self, request, queryset):
+		requeued = queryset.filter(status=Job.Status.FAILED).update(
+			status=Job.Status.QUEUED, error="", attempts=0, worker="",
+			progress_done=0, started_at=None, finished_at=None, heartbeat_at=None,
+		)
+		self.message_user(request, f"{requeued} ta vazifa qayta navbatga qo'yildi.")
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class ReportsConfig(AppConfig):
+    name = 'reports'
+    verbose_name = '5. Hisobotlar'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,35 @@
+"""
+Hisobotlar keshi.
+
+Tayyor (chizilgan) hisobot jadvali `report_cache_key()` kaliti bilan
+saqlanadi. Kalitda manbaning versiyasi bor: yig'indi jadvali yangilanganda
+yoki jadvalda nomi chiqadigan master qator (mahsulot, xaridor, ...) saqlanganda
+(reports.signals) `invalidate_reports()` versiyani o'zgartiradi va eski yozuvlar o'qilmay qoladi
+(o'chirish shart emas, ular TTL bilan tushib ketadi). Bir nechta worker da
+umumiy kesh backendi (CACHES) bo'lmasa, boshqa jarayonlardagi nusxa ko'pi
+bilan REPORT_CACHE_TIMEOUT soniya eskirgan bo'lishi mumkin.
+"""
+import time
+
+from django.core.cache import cache
+
+REPORT_CACHE_TIMEOUT = 300
+VERSION_KEY = "reports:version:{}"
+
+
+def new_version():
+	# Versiya kaliti keshdan tushib ketsa ham oldingi qiymat takrorlanmaydi
+	return time.time_ns()
+
+
+def report_version(source):
+	return cache.get_or_set(VERSION_KEY.format(source), new_version, None)
+
+
+def invalidate_reports(*sources):
+	cache.set_many({VERSION_KEY.format(source): new_version() for source in sources}, None)
+
+
+def report_cache_key(name, sources, *params):
+	versions = ".".join(str(report_version(source)) for source in sources)
+	return ":".join(["reports", name, *(str(param) for param in params), versions])
@@ -0,0 +1,384 @@
+import datetime
+import re
+from abc import ABC, abstractmethod
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+
+from config.search import SearchTextModel
+
+from expenses.exports import food_items_export, raw_items_export
+from expenses.models import Expenses, FoodItem, FoodProducts, RawItem, RawMaterials
+from salary.exports import salary_items_export
+from salary.models import Employee, EmployeeBalance, Salary, SalaryItem
+from sales.exports import sale_items_export
+from sales.models import Buyer, BuyerBalance, Product, Sale, SaleItem
+
+from .models import MonthlyRollup, PriceHistory, price_source_for, rollup_sources_for
+
+
+class RowError(Exception):
+	pass
+
+
+def normalize(value):
+	return " ".join(str(value or "").split()).casefold()
+
+
+def parse_date(value):
+	value = (value or "").strip()
+	for fmt in ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y"):
+		try:
+			return datetime.datetime.strptime(value, fmt).date()
+		except ValueError:
+			continue
+	raise RowError(f"Sana noto'g'ri: {value!r}")
+
+
+def parse_decimal(value, required=False):
+	"""
+	"1 234,56", "1.234,56", "1,234.56", "1234.5" - kasr belgisi oxirgi `.` yoki `,`,
+	ikkinchisi ming ajratgichi (3 xonali guruhlar). Faqat bitta belgi va undan keyin
+	aniq 3 raqam ("1,234", "2.500") noaniq: summani jim buzish o'rniga xato beriladi.
+	"""
+	value = re.sub(r"\s", "", value or "")
+	if not value:
+		if required:
+			raise RowError("Summa kiritilmagan")
+		return None
+
+	marks = re.findall(r"[.,]", value)
+	decimal_mark = None
+	if len(set(marks)) == 2:
+		decimal_mark = marks[-1]
+	elif len(marks) == 1:
+		integer, fraction = value.split(marks[0])
+		if len(fraction) == 3 and re.fullmatch(r"[+-]?[1-9]\d{0,2}", integer):
+			raise RowError(f"Son noaniq: {value!r} (ming ajratgichimi yoki kasrmi?) - masalan 1234 yoki 1,234.00 deb yozing")
+		decimal_mark = marks[0]
+
+	integer, fraction = value.rsplit(decimal_mark, 1) if decimal_mark else (value, None)
+	grouping = set(re.findall(r"[.,]", integer))
+	if grouping and (len(grouping) > 1 or grouping == {decimal_mark} or not re.fullmatch(r"[+-]?\d{1,3}(?:[.,]\d{3})+", integer)):
+		raise RowError(f"Son noto'g'ri: {value!r}")
+	number = integer.replace(".", "").replace(",", "")
+	if fraction is not None:
+		number = f"{number}.{fraction}"
+	try:
+		return Decimal(number)
+	except InvalidOperation:
+		raise RowError(f"Son noto'g'ri: {value!r}")
+
+
+def parse_choice(value, choices, default):
+	"""Tanlov qiymatini ham kod ('paid'), ham nom ("To'langan") bo'yicha qabul qiladi."""
+	value = normalize(value)
+	if not value:
+		return default
+	for code, label in choices:
+		if value in (normalize(code), normalize(str(label))):
+			return code
+	raise RowError(f"Noma'lum holat: {value!r}")
+
+
+class MasterCache:
+	"""
+	Master jadvalni (Product, Buyer, ...) nom bo'yicha xotirada saqlaydi.
+	Boshida bitta so'rov bilan yuklanadi, yo'q qatorlar esa paketda bulk_create qilinadi.
+	"""
+
+	def __init__(self, model, key_fields):
+		self.model = model
+		self.key_fields = key_fields
+		self.created = 0
+		self.ids = {
+			tuple(normalize(value) for value in row[:-1]): row[-1]
+			for row in model.objects.order_by().values_list(*key_fields, "pk").iterator()
+		}
+
+	def build(self, values):
+		return self.model(**dict(zip(self.key_fields, values)))
+
+	def create_missing(self, objects):
+		if issubclass(self.model, SearchTextModel):
+			for obj in objects:
+				obj.apply_search_text()
+		self.model.objects.bulk_create(objects)
+
+	def resolve(self, keys):
+		"""`keys` - {normalizatsiya qilingan kalit: asl qiymatlar}."""
+		missing = {key: values for key, values in keys.items() if key not in self.ids}
+		if missing:
+			objects = [self.build(values) for values in missing.values()]
+			self.create_missing(objects)
+			for key, obj in zip(missing, objects):
+				self.ids[key] = obj.pk
+			self.created += len(objects)
+
+	def get(self, values):
+		return self.ids[tuple(normalize(value) for value in values)]
+
+
+class EmployeeCache(MasterCache):
+	"""Employee foydalanuvchisiz bo'lmaydi - yangi ishchilar uchun faol bo'lmagan User ham yaratiladi."""
+
+	def __init__(self):
+		super().__init__(Employee, ("full_name",))
+		self.usernames = set(get_user_model().objects.values_list("username", flat=True))
+
+	def build(self, values):
+		(full_name,) = values
+		base = re.sub(r"[^\w.@+-]", "_", normalize(full_name))[:140] or "ishchi"
+		username, suffix = base, 1
+		while username in self.usernames:
+			suffix += 1
+			username = f"{base}_{suffix}"
+		self.usernames.add(username)
+		user = get_user_model()(username=username, is_worker=True, is_active=False, password=make_password(None))
+		return Employee(user=user, full_name=full_name)
+
+	def create_missing(self, objects):
+		for obj in objects:
+			obj.user.apply_search_text()
+			obj.apply_search_text()
+		get_user_model().objects.bulk_create([obj.user for obj in objects])
+		for obj in objects:
+			obj.user_id = obj.user.pk
+		Employee.objects.bulk_create(objects)
+
+
+class ItemImporter(ABC):
+	"""
+	Bitta turdagi qatorlarni (masalan, SaleItem) bo'laklab import qiladi.
+
+	Ustunlar eksport bilan bir xil (`spec`), shuning uchun export_items
+	natijasini to'g'ridan-to'g'ri qayta import qilish mumkin. Sarlavha jamilari
+	har qatorda emas, import oxirida `rebuild_totals()` da bir marta hisoblanadi.
+	"""
+
+	spec = None
+	header_model = None
+	item_model = None
+
+	def __init__(self):
+		self.documents = MasterCache(self.header_model, ("date",))
+		self.touched_headers = set()
+		self.imported = 0
+
+	@property
+	def documents_created(self):
+		return self.documents.created
+
+	def master_caches(self):
+		return {}
+
+	def master_keys(self, values):
+		"""{kesh nomi: asl qiymatlar} - qatordagi master yozuvlar."""
+		return {}
+
+	@abstractmethod
+	def build_item(self, values, header_id, master_ids):
+		"""Qator qiymatlaridan saqlanmagan element (bulk_create uchun)."""
+
+	@abstractmethod
+	def rebuild_totals(self):
+		"""Import tegib o'tgan sarlavhalar (touched_headers) jamilarini qayta hisoblaydi."""
+
+	def refresh_price_history(self):
+		"""Import qilingan kunlar narx tarixi - bulk_create element signallarini yubormaydi."""
+		source = price_source_for(self.item_model)
+		if source is not None:
+			dates = self.header_model.objects.filter(pk__in=self.touched_headers).values_list("date", flat=True)
+			PriceHistory.objects.refresh_dates(source, list(dates))
+
+	def refresh_rollups(self):
+		"""Import qilingan oylar yig'indilari (elementlar signalsiz yozilgan)."""
+		dates = list(self.header_model.objects.filter(pk__in=self.touched_headers).values_list("date", flat=True))
+		for source in rollup_sources_for(self.item_model):
+			MonthlyRollup.objects.refresh_dates(source, dates)
+
+	def parse_row(self, row):
+		return {path: (row.get(header) or "").strip() for header, path in self.spec.columns}
+
+	def import_chunk(self, rows):
+		"""`rows` - (qator raqami, {sarlavha: qiymat}) ro'yxati. Xatolar ro'yxatini qaytaradi."""
+		errors = []
+		parsed = []
+		caches = self.master_caches()
+		wanted = {name: {} for name in caches}
+		dates = {}
+
+		for line, row in rows:
+			try:
+				values = self.parse_row(row)
+				date = parse_date(values[self.spec.date_field])
+				keys = self.master_keys(values)
+			except RowError as exc:
+				errors.append((line, str(exc)))
+				continue
+			dates[(normalize(date.isoformat()),)] = (date,)
+			for name, key_values in keys.items():
+				if key_values:
+					wanted[name][tuple(normalize(value) for value in key_values)] = key_values
+			parsed.append((line, values, date, keys))
+
+		self.documents.resolve(dates)
+		for name, cache in caches.items():
+			cache.resolve(wanted[name])
+
+		items = []
+		for line, values, date, keys in parsed:
+			header_id = self.documents.get((date.isoformat(),))
+			master_ids = {
+				name: caches[name].get(key_values) if key_values else None
+				for name, key_values in keys.items()
+			}
+			try:
+				item = self.build_item(values, header_id, master_ids)
+			except (RowError, ValidationError) as exc:
+				errors.append((line, "; ".join(exc.messages) if isinstance(exc, ValidationError) else str(exc)))
+				continue
+			if item is not None:
+				items.append(item)
+				self.touched_headers.add(header_id)
+
+		self.item_model.objects.bulk_create(items)
+		self.imported += len(items)
+		return errors
+
+
+class SaleItemImporter(ItemImporter):
+	spec = sale_items_export
+	header_model = Sale
+	item_model = SaleItem
+
+	def __init__(self):
+		super().__init__()
+		self.products = MasterCache(Product, ("product_name", "measurement_unit"))
+		self.buyers = MasterCache(Buyer, ("name", "sign"))
+		self.touched_buyers = set()
+
+	def master_caches(self):
+		return {"product": self.products, "buyer": self.buyers}
+
+	def master_keys(self, values):
+		if not values["product__product_name"]:
+			raise RowError("Mahsulot kiritilmagan")
+		buyer = None
+		if values["buyer__name"]:
+			buyer = (values["buyer__name"], values["buyer__sign"])
+		return {"product": (values["product__product_name"], values["product__measurement_unit"]), "buyer": buyer}
+
+	def build_item(self, values, header_id, master_ids):
+		item = SaleItem(
+			sale_id=header_id,
+			product_id=master_ids["product"],
+			buyer_id=master_ids["buyer"],
+			quantity=parse_decimal(values["quantity"]) or 0,
+			price=parse_decimal(values["price"]),
+			buyers_paid=parse_decimal(values["buyers_paid"]) or 0,
+			payment_status=parse_choice(values["payment_status"], SaleItem.PaymentStatus.choices, SaleItem.PaymentStatus.UNPAID),
+			order_status=parse_choice(values["order_status"], SaleItem.OrderStatus.choices, SaleItem.OrderStatus.OPEN),
+		)
+		item.apply_derived_fields()
+		self.touched_buyers.add(item.buyer_id)
+		return item
+
+	def rebuild_totals(self):
+		Sale.objects.filter(pk__in=self.touched_headers).rebuild_total_price()
+		BuyerBalance.objects.refresh_buyers(self.touched_buyers)
+
+
+class ExpenseItemImporter(ItemImporter):
+	header_model = Expenses
+	material_model = None
+	material_field = None
+	name_field = None
+
+	def __init__(self):
+		super().__init__()
+		self.materials = MasterCache(self.material_model, (self.name_field, "measurement_unit"))
+
+	def master_caches(self):
+		return {"material": self.materials}
+
+	def master_keys(self, values):
+		name = values[f"{self.material_field}__{self.name_field}"]
+		if not name:
+			raise RowError("Nomi kiritilmagan")
+		return {"material": (name, values[f"{self.material_field}__measurement_unit"])}
+
+	def build_item(self, values, header_id, master_ids):
+		return self.item_model(**{
+			"expense_id": header_id,
+			f"{self.material_field}_id": master_ids["material"],
+			"quantity": parse_decimal(values["quantity"]) or 0,
+			"price": parse_decimal(values["price"]) or 0,
+		})
+
+	def rebuild_totals(self):
+		Expenses.objects.filter(pk__in=self.touched_headers).rebuild_total_cost()
+
+
+class FoodItemImporter(ExpenseItemImporter):
+	spec = food_items_export
+	item_model = FoodItem
+	material_model = FoodProducts
+	material_field = "food_product"
+	name_field = "food_product_name"
+
+
+class RawItemImporter(ExpenseItemImporter):
+	spec = raw_items_export
+	item_model = RawItem
+	material_model = RawMaterials
+	material_field = "raw_material"
+	name_field = "raw_material_name"
+
+
+class SalaryItemImporter(ItemImporter):
+	spec = salary_items_export
+	header_model = Salary
+	item_model = SalaryItem
+
+	def __init__(self):
+		super().__init__()
+		self.employees = EmployeeCache()
+		# (salary, employee) unikal - takroriy qatorlar xato sifatida qaytariladi
+		self.pairs = set(SalaryItem.objects.values_list("salary_id", "employee_id").iterator())
+		self.touched_employees = set()
+
+	def master_caches(self):
+		return {"employee": self.employees}
+
+	def master_keys(self, values):
+		if not values["employee__full_name"]:
+			raise RowError("Ishchi kiritilmagan")
+		return {"employee": (values["employee__full_name"],)}
+
+	def build_item(self, values, header_id, master_ids):
+		pair = (header_id, master_ids["employee"])
+		if pair in self.pairs:
+			raise RowError("Bu ishchi uchun shu sanada ish haqi allaqachon bor")
+		self.pairs.add(pair)
+		self.touched_employees.add(master_ids["employee"])
+		return SalaryItem(
+			salary_id=header_id,
+			employee_id=master_ids["employee"],
+			earned_amount=parse_decimal(values["earned_amount"]),
+			earned_note=values["earned_note"] or None,
+			paid_amount=parse_decimal(values["paid_amount"]),
+			paid_note=values["paid_note"] or None,
+		)
+
+	def rebuild_totals(self):
+		Salary.objects.filter(pk__in=self.touched_headers).rebuild_totals()
+		EmployeeBalance.objects.refresh_employees(self.touched_employees)
+
+
+IMPORTERS = {
+	importer.spec.name: importer
+	for importer in (SaleItemImporter, FoodItemImporter, RawItemImporter, SalaryItemImporter)
+}
@@ -0,0 +1,228 @@
+"""
+Fon vazifalari: og'ir qayta hisoblashlar admin so'rovi ichida emas, alohida
+ishchi jarayonda bajariladi.
+
+Navbat - Job jadvalining o'zi (broker kerak emas). Admin `enqueue()` bilan
+qator qo'shadi va darhol javob qaytaradi; `manage.py run_jobs` navbatdan
+vazifalarni olib (Job.objects.claim) jarayonlar pulida `execute()` qiladi.
+Admin action lari `submit()` dan foydalanadi: ishchi ishlay olmasa (locmem
+kesh) yoki tanlov INLINE_LIMIT dan kichik bo'lsa vazifa so'rovning o'zida bajariladi.
+Vazifa ishlayotganda alohida oqim har HEARTBEAT_INTERVAL da heartbeat_at
+ni yangilaydi - jarayon o'lib qolsa, vazifa JOB_STALE_AFTER dan keyin qayta
+navbatga qo'yiladi.
+
+Yangi vazifa turi `@register("nom", "Sarlavha")` bilan qo'shiladi: funksiya
+birinchi argument sifatida JobContext (progress uchun), keyin Job.params
+dagi kalitlarni oladi va JSON ga yoziladigan natija qaytaradi.
+"""
+import os
+import socket
+import threading
+import time
+import traceback
+from collections import namedtuple
+from functools import partial
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from expenses.models import Expenses
+from sales.models import Sale
+
+from .models import Job
+
+HEARTBEAT_INTERVAL = 30
+# Heartbeat yozilmasa (baza band) - shuncha soniyadan keyin qayta urinish
+HEARTBEAT_RETRY = 5
+# progress() bazaga shundan tez-tez yozmaydi (oxirgi qadam doim yoziladi)
+PROGRESS_INTERVAL = 1.0
+CHUNK_SIZE = 500
+# submit(): shundan ko'p bo'lmagan qator uchun vazifa navbatsiz, darhol bajariladi
+INLINE_LIMIT = 100
+# Buyruq natijasidan saqlanadigan matn
+OUTPUT_LIMIT = 10000
+
+JobType = namedtuple("JobType", "name title function launchable")
+
+JOBS = {}
+
+
+def register(name, title, launchable=False):
+	"""`launchable` - parametrsiz, admin dagi "Vazifa qo'shish" sahifasidan ishga tushiriladi."""
+
+	def decorator(function):
+		JOBS[name] = JobType(name, title, function, launchable)
+		return function
+
+	return decorator
+
+
+def launchable_jobs():
+	return [job_type for job_type in JOBS.values() if job_type.launchable]
+
+
+def enqueue(name, params=None, user=None):
+	if name not in JOBS:
+		raise LookupError(f"Noma'lum vazifa turi: {name}")
+	return Job.objects.enqueue(name, params, user)
+
+
+def worker_available():
+	"""run_jobs faqat jarayonlar uchun umumiy kesh bilan ishga tushadi (locmem da emas)."""
+	return not isinstance(caches["default"], LocMemCache)
+
+
+def submit(name, params=None, user=None, size=None):
+	"""
+	Vazifani navbatga qo'yadi; ishchi ishlay olmasa yoki `size` (tanlangan
+	qatorlar soni) INLINE_LIMIT dan oshmasa shu jarayonda bajaradi. Holati
+	yangilangan Job qaytariladi.
+	"""
+	job = enqueue(name, params, user)
+	if worker_available() and (size is None or size > INLINE_LIMIT):
+		return job
+	if Job.objects.claim(worker_name(), pk=job.pk) is not None:
+		execute(job.pk)
+	job.refresh_from_db()
+	return job
+
+
+def worker_name():
+	return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobContext:
+	def __init__(self, job):
+		self.job = job
+		self.last_write = 0
+
+	def progress(self, done, total=None, message=None):
+		"""Bajarilgan qadamlar soni (va jami). Yozuv PROGRESS_INTERVAL da bir martadan ko'p emas."""
+		now = time.monotonic()
+		finished = total is not None and done >= total
+		if not finished and now - self.last_write < PROGRESS_INTERVAL:
+			return
+		self.last_write = now
+		values = {"progress_done": done, "heartbeat_at": timezone.now()}
+		if total is not None:
+			values["progress_total"] = total
+		if message is not None:
+			values["message"] = message[:255]
+		self.job.claimed().update(**values)
+
+	def chunks(self, values, size=CHUNK_SIZE):
+		"""`values` ni bo'laklab beradi va har bo'lakdan keyin progressni yozadi."""
+		values = list(values)
+		self.progress(0, len(values))
+		for start in range(0, len(values), size):
+			yield values[start:start + size]
+			self.progress(min(start + size, len(values)), len(values))
+
+
+class Heartbeat(threading.Thread):
+	"""
+	Vazifa tugaguncha heartbeat_at ni yangilab turadi (o'z DB ulanishi bilan).
+	Yozib bo'lmasa (SQLite da vazifa tranzaksiyasi bazani band qilgan) jarayon
+	o'lik hisoblanmaydi - HEARTBEAT_RETRY dan keyin yana uriniladi.
+	"""
+
+	def __init__(self, job):
+		super().__init__(daemon=True)
+		self.job = job
+		self.stopped = threading.Event()
+
+	def run(self):
+		interval = HEARTBEAT_INTERVAL
+		try:
+			while not self.stopped.wait(interval):
+				try:
+					self.job.claimed().update(heartbeat_at=timezone.now())
+				except DatabaseError:
+					interval = HEARTBEAT_RETRY
+				else:
+					interval = HEARTBEAT_INTERVAL
+		finally:
+			connection.close()
+
+	def stop(self):
+		self.stopped.set()
+		self.join()
+
+
+def execute(job_id):
+	"""
+	Biriktirilgan (running) vazifani bajaradi; muvaffaqiyatli bo'lsa True.
+	Natija faqat vazifa hali shu ishchiniki bo'lsa yoziladi: heartbeat kechikib
+	vazifa boshqa ishchiga o'tgan bo'lsa, ikki bajarilish bir-birining natijasini
+	bosib ketmaydi (vazifalar qayta bajarilishga chidamli - jamilarni qayta quradi).
+	"""
+	job = Job.objects.get(pk=job_id)
+	heartbeat = Heartbeat(job)
+	heartbeat.start()
+	try:
+		job_type = JOBS.get(job.name)
+		if job_type is None:
+			raise LookupError(f"Noma'lum vazifa turi: {job.name}")
+		result = job_type.function(JobContext(job), **job.params)
+	except Exception:
+		values = {"status": Job.Status.FAILED, "error": traceback.format_exc()}
+	else:
+		values = {
+			"status": Job.Status.DONE,
+			"result": result,
+			"error": "",
+			"progress_done": Coalesce(models.F("progress_total"), models.F("progress_done")),
+		}
+	finally:
+		heartbeat.stop()
+	owned = job.claimed().update(finished_at=timezone.now(), **values)
+	return bool(owned) and values["status"] == Job.Status.DONE
+
+
+@register("sales.recalculate_total_price", "Zakazlar jami narxini qayta hisoblash")
+def recalculate_sale_totals(job, pks):
+	"""
+	Mos kelmaganlar update_total_price() orqali tuzatiladi: sarlavha qulflanadi,
+	yig'indi qulfdan keyin qayta o'qiladi va version oshadi - admin da parallel
+	saqlangan zakaz jamisi eskisi bilan bosib ketilmaydi (config.concurrency).
+	"""
+	fixed = 0
+	for chunk in job.chunks(pks):
+		for sale in Sale.objects.filter(pk__in=chunk).with_total_mismatch():
+			previous = sale.total_price
+			with transaction.atomic():
+				sale.update_total_price()
+			fixed += sale.total_price != previous
+	return {"fixed": fixed}
+
+
+@register("expenses.rebuild_total_cost", "Xarajatlar umumiy summasini qayta hisoblash")
+def rebuild_expense_totals(job, pks):
+	updated = 0
+	for chunk in job.chunks(pks):
+		with transaction.atomic():
+			updated += Expenses.objects.filter(pk__in=chunk).rebuild_total_cost()
+	return {"updated": updated}
+
+
+def run_command(command, job):
+	output = StringIO()
+	job.progress(0, message=f"manage.py {command}")
+	call_command(command, stdout=output, stderr=output)
+	return {"output": output.getvalue()[-OUTPUT_LIMIT:]}
+
+
+for command, title in (
+	("rebuild_daily_summary", "Kunlik hisobotlarni qayta qurish"),
+	("rebuild_price_history", "Narx tarixini qayta qurish"),
+	("rebuild_rollups", "Oylik hisobotlarni qayta qurish"),
+	("rebuild_buyer_balances", "Xaridorlar qarzini qayta hisoblash"),
+	("rebuild_employee_balances", "Ishchilar balansini qayta hisoblash"),
+	("archive_sale_items", "Yopilgan zakaz elementlarini arxivlash"),
+):
+	register(f"command.{command}", title, launchable=True)(partial(run_command, command))
@@ -0,0 +1,100 @@
+import csv
+import datetime
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from openpyxl import Workbook
+
+from config.export import excel_value
+from expenses.exports import food_items_export, raw_items_export
+from salary.exports import salary_items_export
+from sales.exports import sale_items_export
+
+EXPORTS = {
+	spec.name: spec
+	for spec in (sale_items_export, food_items_export, raw_items_export, salary_items_export)
+}
+
+
+class Command(BaseCommand):
+	help = "SaleItem, FoodItem, RawItem yoki SalaryItem qatorlarini faylga oqim bilan eksport qiladi."
+
+	def add_arguments(self, parser):
+		parser.add_argument("export", choices=sorted(EXPORTS), help="Eksport turi")
+		parser.add_argument("--output", required=True, help="Fayl yo'li")
+		parser.add_argument("--format", choices=("csv", "xlsx"), default="csv")
+		parser.add_argument("--from", dest="date_from", type=datetime.date.fromisoformat, help="Boshlanish sanasi (YYYY-MM-DD)")
+		parser.add_argument("--to", dest="date_to", type=datetime.date.fromisoformat, help="Tugash sanasi (YYYY-MM-DD)")
+		parser.add_argument("--resume", action="store_true", help="Mavjud CSV faylning oxirgi qatoridan davom ettirish")
+
+	def handle(self, *args, **options):
+		spec = EXPORTS[options["export"]]
+		# SaleItem uchun arxiv jadvali ham (sales.archive) - eksport to'liq yil bo'yicha
+		querysets = spec.get_querysets(options["date_from"], options["date_to"])
+
+		if options["format"] == "xlsx":
+			if options["resume"]:
+				raise CommandError("--resume faqat CSV uchun ishlaydi.")
+			count = self.write_xlsx(spec, querysets, options["output"])
+		else:
+			count = self.write_csv(spec, querysets, options["output"], options["resume"])
+
+		self.stdout.write(self.style.SUCCESS(f"{count} ta qator yozildi: {options['output']}"))
+
+	def truncate_partial_line(self, path):
+		"""Uzilib qolgan eksportning oxiridagi chala qatorni olib tashlaydi."""
+		with open(path, "r+b") as handle:
+			handle.seek(0, os.SEEK_END)
+			position = handle.tell()
+			while position > 0:
+				step = min(4096, position)
+				position -= step
+				handle.seek(position)
+				chunk = handle.read(step)
+				newline = chunk.rfind(b"\n")
+				if newline != -1:
+					handle.truncate(position + newline + 1)
+					return
+			handle.truncate(0)
+
+	def last_key(self, spec, path):
+		"""Oldingi eksportning oxirgi to'liq qatoridan (created_at, id) kalitini o'qiydi."""
+		last_row = None
+		with open(path, newline="", encoding="utf-8-sig") as handle:
+			reader = csv.reader(handle)
+			next(reader, None)
+			for row in reader:
+				if len(row) == len(spec.columns):
+					last_row = row
+		return spec.key_from_row(last_row) if last_row else None
+
+	def write_csv(self, spec, querysets, path, resume):
+		after = None
+		mode = "w"
+		if resume and os.path.exists(path):
+			self.truncate_partial_line(path)
+			if os.path.getsize(path):
+				after = self.last_key(spec, path)
+				mode = "a"
+
+		count = 0
+		with open(path, mode, newline="", encoding="utf-8-sig" if mode == "w" else "utf-8") as handle:
+			writer = csv.writer(handle)
+			if mode == "w":
+				writer.writerow(spec.headers)
+			for row in spec.rows(*querysets, after=after):
+				writer.writerow(row)
+				count += 1
+		return count
+
+	def write_xlsx(self, spec, querysets, path):
+		# write_only rejimi qatorlarni xotirada saqlamaydi
+		workbook = Workbook(write_only=True)
+		sheet = workbook.create_sheet(spec.name)
+		sheet.append(spec.headers)
+		count = 0
+		for row in spec.rows(*querysets, convert=excel_value):
+			sheet.append(row)
+			count += 1
+		workbook.save(path)
+		return count
@@ -0,0 +1,86 @@
+import csv
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reports.importers import IMPORTERS
+
+
+def read_csv(path):
+	with open(path, newline="", encoding="utf-8-sig") as handle:
+		for line, row in enumerate(csv.DictReader(handle), start=2):
+			yield line, row
+
+
+def read_xlsx(path):
+	try:
+		from openpyxl import load_workbook
+	except ImportError:
+		raise CommandError("XLSX import uchun openpyxl o'rnatilishi kerak.")
+
+	workbook = load_workbook(path, read_only=True, data_only=True)
+	rows = workbook.active.iter_rows(values_only=True)
+	headers = [str(value or "").strip() for value in next(rows, ())]
+	for line, values in enumerate(rows, start=2):
+		yield line, {header: "" if value is None else str(value) for header, value in zip(headers, values)}
+	workbook.close()
+
+
+def chunked(iterable, size):
+	iterator = iter(iterable)
+	while chunk := list(islice(iterator, size)):
+		yield chunk
+
+
+class Command(BaseCommand):
+	help = (
+		"Eski savdo, xarajat va ish haqi qatorlarini CSV/XLSX dan paket bilan import qiladi. "
+		"Ustunlar export_items bilan bir xil."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument("kind", choices=sorted(IMPORTERS), help="Import turi")
+		parser.add_argument("path", help="CSV yoki XLSX fayl")
+		parser.add_argument("--chunk-size", type=int, default=5000, help="Bir paketdagi qatorlar soni")
+		parser.add_argument("--dry-run", action="store_true", help="Tekshirish: hech narsa saqlanmaydi")
+		parser.add_argument("--max-errors", type=int, default=50, help="Ko'rsatiladigan xatolar soni")
+
+	def handle(self, *args, **options):
+		path = options["path"]
+		if not os.path.exists(path):
+			raise CommandError(f"Fayl topilmadi: {path}")
+		rows = read_xlsx(path) if path.lower().endswith(".xlsx") else read_csv(path)
+
+		if options["dry_run"]:
+			# Hamma narsa bajariladi, lekin oxirida bekor qilinadi
+			with transaction.atomic():
+				importer, errors = self.run_import(options["kind"], rows, options["chunk_size"])
+				transaction.set_rollback(True)
+		else:
+			importer, errors = self.run_import(options["kind"], rows, options["chunk_size"])
+
+		for line, message in errors[:options["max_errors"]]:
+			self.stderr.write(f"{line}-qator: {message}")
+
+		prefix = "[dry-run] " if options["dry_run"] else ""
+		self.stdout.write(self.style.SUCCESS(
+			f"{prefix}{importer.imported} ta qator, {importer.documents_created} ta yangi hujjat, "
+			f"{len(errors)} ta xato."
+		))
+
+	def run_import(self, kind, rows, chunk_size):
+		importer = IMPORTERS[kind]()
+		errors = []
+		for chunk in chunked(rows, chunk_size):
+			with transaction.atomic():
+				errors.extend(importer.import_chunk(chunk))
+			self.stdout.write(f"{importer.imported} ta qator import qilindi...")
+
+		# Jamilar har qatorda emas, har bir hujjat uchun bir marta
+		with transaction.atomic():
+			importer.rebuild_totals()
+			importer.refresh_price_history()
+			importer.refresh_rollups()
+		return importer, errors
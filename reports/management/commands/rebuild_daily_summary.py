@@ -0,0 +1,37 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from expenses.models import Expenses
+from reports.models import DailySummary
+from salary.models import Salary
+from sales.models import Sale
+
+
+class Command(BaseCommand):
+	help = "DailySummary jadvalini Sale, Expenses va Salary sarlavhalaridan qayta quradi."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--from", dest="date_from", type=datetime.date.fromisoformat, help="Boshlanish sanasi (YYYY-MM-DD)")
+		parser.add_argument("--to", dest="date_to", type=datetime.date.fromisoformat, help="Tugash sanasi (YYYY-MM-DD)")
+		parser.add_argument("--chunk-size", type=int, default=500, help="Bir paketdagi sanalar soni")
+
+	def handle(self, *args, **options):
+		date_filter = {}
+		if options["date_from"]:
+			date_filter["date__gte"] = options["date_from"]
+		if options["date_to"]:
+			date_filter["date__lte"] = options["date_to"]
+
+		dates = set()
+		for model in (Sale, Expenses, Salary, DailySummary):
+			dates.update(model.objects.filter(**date_filter).values_list("date", flat=True))
+		dates = sorted(dates)
+
+		chunk_size = options["chunk_size"]
+		for start in range(0, len(dates), chunk_size):
+			with transaction.atomic():
+				DailySummary.objects.refresh_dates(dates[start:start + chunk_size])
+
+		self.stdout.write(self.style.SUCCESS(f"{len(dates)} ta sana qayta hisoblandi."))
@@ -0,0 +1,39 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reports.models import PRICE_SOURCES, PriceHistory
+
+
+class Command(BaseCommand):
+	help = "PriceHistory jadvalini va masterlarning last_price ustunini elementlardan qayta quradi."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--from", dest="date_from", type=datetime.date.fromisoformat, help="Boshlanish sanasi (YYYY-MM-DD)")
+		parser.add_argument("--to", dest="date_to", type=datetime.date.fromisoformat, help="Tugash sanasi (YYYY-MM-DD)")
+		parser.add_argument("--chunk-size", type=int, default=100, help="Bir paketdagi sanalar soni")
+
+	def handle(self, *args, **options):
+		for source in PRICE_SOURCES:
+			header_model = source.item_model._meta.get_field(source.header_field).related_model
+			date_filter = {}
+			if options["date_from"]:
+				date_filter["date__gte"] = options["date_from"]
+			if options["date_to"]:
+				date_filter["date__lte"] = options["date_to"]
+
+			dates = set(header_model.objects.filter(**date_filter).values_list("date", flat=True))
+			dates.update(
+				PriceHistory.objects.filter(**date_filter, **{f"{source.field}__isnull": False}).values_list("date", flat=True)
+			)
+			dates = sorted(dates)
+
+			chunk_size = options["chunk_size"]
+			for start in range(0, len(dates), chunk_size):
+				with transaction.atomic():
+					PriceHistory.objects.refresh_dates(source, dates[start:start + chunk_size])
+
+			self.stdout.write(f"{source.field}: {len(dates)} ta sana")
+
+		self.stdout.write(self.style.SUCCESS("Narx tarixi qayta qurildi."))
@@ -0,0 +1,40 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reports.models import ROLLUP_SOURCES, MonthlyRollup, month_start
+
+
+class Command(BaseCommand):
+	help = "MonthlyRollup (oylik hisobotlar) jadvalini elementlardan qayta quradi."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--from", dest="date_from", type=datetime.date.fromisoformat, help="Boshlanish sanasi (YYYY-MM-DD)")
+		parser.add_argument("--to", dest="date_to", type=datetime.date.fromisoformat, help="Tugash sanasi (YYYY-MM-DD)")
+		parser.add_argument("--chunk-size", type=int, default=12, help="Bir paketdagi oylar soni")
+
+	def handle(self, *args, **options):
+		for source in ROLLUP_SOURCES:
+			header_model = source.item_model._meta.get_field(source.header_field).related_model
+			date_filter = {}
+			if options["date_from"]:
+				date_filter["date__gte"] = month_start(options["date_from"])
+			if options["date_to"]:
+				date_filter["date__lte"] = options["date_to"]
+
+			months = {month_start(date) for date in header_model.objects.filter(**date_filter).values_list("date", flat=True)}
+			rollup_filter = {f"month__{lookup.split('__')[1]}": value for lookup, value in date_filter.items()}
+			months.update(
+				MonthlyRollup.objects.filter(**rollup_filter, **{f"{source.field}__isnull": False}).values_list("month", flat=True)
+			)
+			months = sorted(months)
+
+			chunk_size = options["chunk_size"]
+			for start in range(0, len(months), chunk_size):
+				with transaction.atomic():
+					MonthlyRollup.objects.refresh_months(source, months[start:start + chunk_size])
+
+			self.stdout.write(f"{source.field}: {len(months)} ta oy")
+
+		self.stdout.write(self.style.SUCCESS("Oylik hisobotlar qayta qurildi."))
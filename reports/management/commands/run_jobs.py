@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from reports import jobs, worker
+from reports.models import Job
+
+
+class Command(BaseCommand):
+	help = (
+		"Navbatdagi fon vazifalarini (reports.Job) jarayonlar pulida bajaradi. "
+		"Vazifalar hisobot va master keshini tozalaydi, shuning uchun kesh veb jarayon "
+		"bilan umumiy bo'lishi kerak: CACHE_BACKEND=file (bir server) yoki redis. "
+		"locmem (standart) bilan buyruq ishga tushmaydi - tozalash faqat ishchi "
+		"xotirasida qolib, admin eskirgan hisobotlarni ko'rsatardi."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument(
+			"--processes", type=int, default=min(os.cpu_count() or 1, 4),
+			help="Ishchi jarayonlar soni; 0 - shu jarayonning o'zida ketma-ket",
+		)
+		parser.add_argument("--once", action="store_true", help="Navbat bo'shagach to'xtash")
+		parser.add_argument("--poll", type=float, default=2.0, help="Navbat bo'sh bo'lganda tekshirish oralig'i (soniya)")
+
+	def handle(self, *args, **options):
+		if not jobs.worker_available():
+			raise CommandError(
+				"CACHE_BACKEND=locmem jarayonga xos: ishchi tozalagan kesh veb jarayonda eskirgan holicha qoladi. "
+				"CACHE_BACKEND=file yoki redis bilan ishga tushiring (veb server ham xuddi shu sozlama bilan)."
+			)
+		self.worker = jobs.worker_name()
+		self.once = options["once"]
+		self.poll = options["poll"]
+		try:
+			if options["processes"] > 0:
+				self.run_pool(options["processes"])
+			else:
+				self.run_inline()
+		except KeyboardInterrupt:
+			self.stdout.write("To'xtatildi; tugallanmagan vazifalar qayta navbatga qo'yiladi.")
+
+	def requeue_stale(self, running=()):
+		requeued, failed = Job.objects.requeue_stale(running=running)
+		if requeued or failed:
+			self.stdout.write(f"To'xtab qolgan vazifalar: {requeued} ta qayta navbatda, {failed} ta xato.")
+
+	def report(self, job_id, succeeded):
+		style = self.style.SUCCESS if succeeded else self.style.ERROR
+		self.stdout.write(style(f"{job_id}: {'bajarildi' if succeeded else 'xato'}"))
+
+	def run_inline(self):
+		while True:
+			self.requeue_stale()
+			job = Job.objects.claim(self.worker)
+			if job is not None:
+				self.report(job.pk, jobs.execute(job.pk))
+				continue
+			if self.once:
+				return
+			# Kutish paytida ulanish ochiq turmasin
+			connection.close()
+			time.sleep(self.poll)
+
+	def run_pool(self, processes):
+		self.stdout.write(f"{self.worker}: {processes} ta jarayon, navbat kutilmoqda.")
+		# spawn - bolalar jarayoni ota jarayondagi DB ulanishini meros qilib olmaydi
+		context = multiprocessing.get_context("spawn")
+		with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=worker.init_worker) as pool:
+			running = {}
+			while True:
+				self.requeue_stale(running.values())
+				while len(running) < processes:
+					job = Job.objects.claim(self.worker)
+					if job is None:
+						break
+					running[pool.submit(worker.execute, job.pk)] = job.pk
+				# Kutish paytida ulanish ochiq turmasin (PostgreSQL idle ulanishlar)
+				connection.close()
+
+				if not running:
+					if self.once:
+						return
+					time.sleep(self.poll)
+					continue
+				done, _ = wait(running, timeout=self.poll, return_when=FIRST_COMPLETED)
+				for future in done:
+					job_id = running.pop(future)
+					try:
+						self.report(job_id, future.result())
+					except Exception as error:
+						# Jarayon o'ldi yoki bazaga yoza olmadi - vazifa heartbeat eskirgach qayta navbatga
+						self.stderr.write(f"{job_id}: {error!r}")
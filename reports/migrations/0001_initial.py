@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:59
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(unique=True, verbose_name='Sana')),
+                ('sales_total', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Savdo')),
+                ('expenses_total', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Xarajatlar')),
+                ('salary_earned', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Topilgan maosh')),
+                ('salary_paid', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name="To'langan maosh")),
+                ('net_total', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Sof foyda')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan sana')),
+            ],
+            options={
+                'verbose_name': 'Kunlik hisobot ',
+                'verbose_name_plural': 'Kunlik hisobotlar ',
+                'ordering': ['-date'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:14
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0004_last_price'),
+        ('reports', '0001_initial'),
+        ('sales', '0009_product_last_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(verbose_name='Sana')),
+                ('last_price', models.DecimalField(decimal_places=2, max_digits=20, verbose_name='Oxirgi narx')),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=20, verbose_name='Eng past narx')),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=20, verbose_name='Eng yuqori narx')),
+                ('avg_price', models.DecimalField(decimal_places=2, max_digits=20, verbose_name="O'rtacha narx")),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Miqdor')),
+                ('items_count', models.PositiveIntegerField(default=0, verbose_name='Qatorlar soni')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan sana')),
+                ('food_product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='expenses.foodproducts', verbose_name='Oziq-ovqat')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='sales.product', verbose_name='Mahsulot')),
+                ('raw_material', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='expenses.rawmaterials', verbose_name='Xom-ashyo')),
+            ],
+            options={
+                'verbose_name': 'Narx tarixi ',
+                'verbose_name_plural': 'Narxlar tarixi ',
+                'ordering': ['-date'],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('food_product__isnull', True), ('product__isnull', False), ('raw_material__isnull', True)), models.Q(('food_product__isnull', False), ('product__isnull', True), ('raw_material__isnull', True)), models.Q(('food_product__isnull', True), ('product__isnull', True), ('raw_material__isnull', False)), _connector='OR'), name='reports_price_history_one_item')],
+                'unique_together': {('food_product', 'date'), ('product', 'date'), ('raw_material', 'date')},
+            },
+        ),
+    ]
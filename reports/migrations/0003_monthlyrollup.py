@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:36
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0006_search_text'),
+        ('reports', '0002_pricehistory'),
+        ('salary', '0004_search_text'),
+        ('sales', '0010_search_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('month', models.DateField(verbose_name='Oy')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Summa')),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name="To'langan summa")),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Miqdor')),
+                ('items_count', models.PositiveIntegerField(default=0, verbose_name='Qatorlar soni')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan sana')),
+                ('buyer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='sales.buyer', verbose_name='Xaridor')),
+                ('employee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='salary.employee', verbose_name='Ishchi')),
+                ('food_product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='expenses.foodproducts', verbose_name='Oziq-ovqat')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='sales.product', verbose_name='Mahsulot')),
+                ('raw_material', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='expenses.rawmaterials', verbose_name='Xom-ashyo')),
+            ],
+            options={
+                'verbose_name': 'Oylik hisobot ',
+                'verbose_name_plural': 'Oylik hisobotlar ',
+                'ordering': ['-month'],
+                'indexes': [models.Index(fields=['month'], name='reports_rollup_month_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('buyer__isnull', True), ('employee__isnull', True), ('food_product__isnull', True), ('product__isnull', False), ('raw_material__isnull', True)), models.Q(('buyer__isnull', False), ('employee__isnull', True), ('food_product__isnull', True), ('product__isnull', True), ('raw_material__isnull', True)), models.Q(('buyer__isnull', True), ('employee__isnull', True), ('food_product__isnull', False), ('product__isnull', True), ('raw_material__isnull', True)), models.Q(('buyer__isnull', True), ('employee__isnull', True), ('food_product__isnull', True), ('product__isnull', True), ('raw_material__isnull', False)), models.Q(('buyer__isnull', True), ('employee__isnull', False), ('food_product__isnull', True), ('product__isnull', True), ('raw_material__isnull', True)), _connector='OR'), name='reports_rollup_one_dimension')],
+                'unique_together': {('buyer', 'month'), ('employee', 'month'), ('food_product', 'month'), ('product', 'month'), ('raw_material', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:12
+
+import django.core.serializers.json
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_monthlyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, verbose_name='Vazifa turi')),
+                ('params', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Parametrlar')),
+                ('status', models.CharField(choices=[('queued', 'Navbatda'), ('running', 'Bajarilmoqda'), ('done', 'Bajarildi'), ('failed', 'Xato')], default='queued', max_length=10, verbose_name='Holati')),
+                ('progress_done', models.PositiveIntegerField(default=0, verbose_name='Bajarilgan')),
+                ('progress_total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Jami')),
+                ('message', models.CharField(blank=True, max_length=255, verbose_name='Xabar')),
+                ('result', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Natija')),
+                ('error', models.TextField(blank=True, verbose_name='Xato')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Urinishlar')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Ishchi jarayon')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan sana')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Boshlangan')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Tugagan')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Oxirgi signal')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Yaratgan foydalanuvchi')),
+            ],
+            options={
+                'verbose_name': 'Fon vazifasi ',
+                'verbose_name_plural': 'Fon vazifalari ',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='reports_job_status_idx')],
+            },
+        ),
+    ]
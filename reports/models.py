@@ -0,0 +1,519 @@
+from collections import namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+import datetime
+import uuid
+
+from config import mastercache
+from expenses.models import Expenses, FoodItem, FoodProducts, RawItem, RawMaterials, line_total_expression
+from salary.models import Employee, Salary, SalaryItem
+from sales.models import ArchivedSaleItem, Buyer, Product, Sale, SaleItem
+
+from .caching import invalidate_reports
+
+AMOUNT_FIELD = models.DecimalField(max_digits=20, decimal_places=2)
+
+
+class DailySummaryQuerySet(models.QuerySet):
+	def refresh_dates(self, dates):
+		"""
+		Berilgan sanalar uchun qatorlarni Sale, Expenses va Salary sarlavhalaridan
+		qayta yig'adi. Sanalar soni qancha bo'lishidan qat'i nazar 3 ta o'qish va
+		bitta upsert - elementlar jadvallari umuman o'qilmaydi.
+		"""
+		dates = {date for date in dates if date}
+		if not dates:
+			return
+
+		sales = dict(Sale.objects.filter(date__in=dates).values_list("date", "total_price"))
+		expenses = dict(Expenses.objects.filter(date__in=dates).values_list("date", "total_cost"))
+		salaries = {
+			date: (earned, paid)
+			for date, earned, paid in Salary.objects.filter(date__in=dates).values_list("date", "total_earned_salary", "total_paid_salary")
+		}
+
+		summaries = []
+		for date in dates:
+			if date not in sales and date not in expenses and date not in salaries:
+				continue
+			earned, paid = salaries.get(date, (0, 0))
+			summary = DailySummary(
+				date=date,
+				sales_total=sales.get(date) or 0,
+				expenses_total=expenses.get(date) or 0,
+				salary_earned=earned or 0,
+				salary_paid=paid or 0,
+			)
+			summary.net_total = summary.sales_total - summary.expenses_total - summary.salary_paid
+			summaries.append(summary)
+
+		present = {summary.date for summary in summaries}
+		self.filter(date__in=dates - present).delete()
+		if summaries:
+			self.bulk_create(
+				summaries,
+				update_conflicts=True,
+				unique_fields=["date"],
+				update_fields=["sales_total", "expenses_total", "salary_earned", "salary_paid", "net_total", "updated_at"],
+			)
+		invalidate_reports(SUMMARY_REPORT)
+
+
+# Oylar/yillar kesimidagi hisobot DailySummary dan yig'iladi
+SUMMARY_REPORT = "summary"
+
+
+class DailySummary(models.Model):
+	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+	date = models.DateField(unique=True, verbose_name="Sana")
+	sales_total = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Savdo")
+	expenses_total = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Xarajatlar")
+	salary_earned = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Topilgan maosh")
+	salary_paid = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="To'langan maosh")
+	net_total = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Sof foyda")
+	updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan sana")
+
+	objects = DailySummaryQuerySet.as_manager()
+
+	class Meta:
+		verbose_name = "Kunlik hisobot "
+		verbose_name_plural = "Kunlik hisobotlar "
+		ordering = ["-date"]
+
+	def __str__(self):
+		return f"Hisobot - {self.date}"
+
+
+# PriceHistory maydoni, element modeli, element -> master FK, element -> sarlavha FK, master model,
+# elementlar arxivi (bo'lsa)
+PriceSource = namedtuple("PriceSource", "field item_model item_field header_field master_model archive_model", defaults=(None,))
+
+PRICE_SOURCES = (
+	PriceSource("product", SaleItem, "product", "sale", Product, ArchivedSaleItem),
+	PriceSource("food_product", FoodItem, "food_product", "expense", FoodProducts),
+	PriceSource("raw_material", RawItem, "raw_material", "expense", RawMaterials),
+)
+
+
+def source_items(source, build):
+	"""
+	`build(manager)` so'rovi element jadvali va (bo'lsa) uning arxivi uchun,
+	UNION ALL bilan bitta so'rovda - narx va yig'indilar ikkalasidan hisoblanadi.
+	"""
+	querysets = [build(model._default_manager).order_by() for model in (source.item_model, source.archive_model) if model is not None]
+	return querysets[0].union(*querysets[1:], all=True) if len(querysets) > 1 else querysets[0]
+
+
+def price_source_for(model):
+	"""Element modeli (proxy lar ham) uchun PriceSource yoki None."""
+	for source in PRICE_SOURCES:
+		if issubclass(model, source.item_model):
+			return source
+	return None
+
+
+class PriceHistoryQuerySet(models.QuerySet):
+	def refresh_dates(self, source, dates):
+		"""
+		Berilgan sanalardagi (master, sana) qatorlarini elementlardan qayta yig'adi
+		va tegishli masterlarning last_price ustunini yangilaydi. Bir kunda
+		elementlar kam, shuning uchun ular bitta so'rovda o'qilib, statistika
+		xotirada hisoblanadi.
+		"""
+		dates = {date for date in dates if date}
+		if not dates:
+			return
+
+		field_id = f"{source.field}_id"
+		date_path = f"{source.header_field}__date"
+		items = sorted(
+			source_items(source, lambda manager: (
+				manager
+				.filter(**{f"{date_path}__in": dates, f"{source.item_field}__isnull": False, "price__isnull": False})
+				.values_list("created_at", "pk", f"{source.item_field}_id", date_path, "price", "quantity")
+			)),
+			# Oxirgi narx - eng keyin kiritilgan qator
+			key=lambda item: item[:2],
+		)
+
+		groups = {}
+		for created_at, pk, item_id, date, price, quantity in items:
+			groups.setdefault((item_id, date), []).append((price, quantity or 0))
+
+		rows = []
+		for (item_id, date), values in groups.items():
+			prices = [price for price, quantity in values]
+			rows.append(PriceHistory(**{
+				field_id: item_id,
+				"date": date,
+				"last_price": prices[-1],
+				"min_price": min(prices),
+				"max_price": max(prices),
+				"avg_price": (sum(prices) / len(prices)).quantize(Decimal("0.01")),
+				"quantity": sum(quantity for price, quantity in values),
+				"items_count": len(values),
+			}))
+
+		existing = set(self.filter(**{"date__in": dates, f"{source.field}__isnull": False}).values_list(field_id, "date"))
+		stale = existing - groups.keys()
+		if stale:
+			condition = models.Q()
+			for item_id, date in stale:
+				condition |= models.Q(**{field_id: item_id, "date": date})
+			self.filter(condition).delete()
+		if rows:
+			self.bulk_create(
+				rows,
+				update_conflicts=True,
+				unique_fields=[source.field, "date"],
+				update_fields=["last_price", "min_price", "max_price", "avg_price", "quantity", "items_count", "updated_at"],
+			)
+
+		self.update_last_prices(source, {item_id for item_id, date in existing | groups.keys()})
+
+	def update_last_prices(self, source, item_ids):
+		"""Master.last_price = eng so'nggi sanadagi oxirgi narx (bitta UPDATE)."""
+		if not item_ids:
+			return
+		latest = PriceHistory.objects.filter(**{source.field: models.OuterRef("pk")}).order_by("-date")
+		source.master_model._default_manager.filter(pk__in=item_ids).update(
+			last_price=models.Subquery(latest.values("last_price")[:1]),
+			last_price_date=models.Subquery(latest.values("date")[:1]),
+		)
+		# update() signal yubormaydi - keshdagi master qatorlar eskirgan
+		mastercache.invalidate(source.master_model, item_ids)
+
+
+class PriceHistory(models.Model):
+	"""
+	Mahsulot, oziq-ovqat yoki xom-ashyoning kunlik narxi: har (master, sana)
+	uchun bitta qator. Master jadvaldagi last_price shu jadvaldan olinadi.
+	"""
+
+	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+	product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name="price_history", verbose_name="Mahsulot")
+	food_product = models.ForeignKey(FoodProducts, on_delete=models.CASCADE, null=True, blank=True, related_name="price_history", verbose_name="Oziq-ovqat")
+	raw_material = models.ForeignKey(RawMaterials, on_delete=models.CASCADE, null=True, blank=True, related_name="price_history", verbose_name="Xom-ashyo")
+	date = models.DateField(verbose_name="Sana")
+	last_price = models.DecimalField(max_digits=20, decimal_places=2, verbose_name="Oxirgi narx")
+	min_price = models.DecimalField(max_digits=20, decimal_places=2, verbose_name="Eng past narx")
+	max_price = models.DecimalField(max_digits=20, decimal_places=2, verbose_name="Eng yuqori narx")
+	avg_price = models.DecimalField(max_digits=20, decimal_places=2, verbose_name="O'rtacha narx")
+	quantity = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Miqdor")
+	items_count = models.PositiveIntegerField(default=0, verbose_name="Qatorlar soni")
+	updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan sana")
+
+	objects = PriceHistoryQuerySet.as_manager()
+
+	class Meta:
+		verbose_name = "Narx tarixi "
+		verbose_name_plural = "Narxlar tarixi "
+		ordering = ["-date"]
+		# NULL lar teng hisoblanmaydi - har bir tur o'z (master, sana) jufti bo'yicha unikal
+		unique_together = [("product", "date"), ("food_product", "date"), ("raw_material", "date")]
+		constraints = [
+			models.CheckConstraint(
+				condition=(
+					models.Q(product__isnull=False, food_product__isnull=True, raw_material__isnull=True)
+					| models.Q(product__isnull=True, food_product__isnull=False, raw_material__isnull=True)
+					| models.Q(product__isnull=True, food_product__isnull=True, raw_material__isnull=False)
+				),
+				name="reports_price_history_one_item",
+			),
+		]
+
+	def __str__(self):
+		return f"{self.item} - {self.date}"
+
+	@property
+	def item(self):
+		return self.product or self.food_product or self.raw_material
+
+
+def month_start(date):
+	return date.replace(day=1)
+
+
+def next_month(month):
+	return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+# MonthlyRollup maydoni (o'lcham), element modeli, element -> sarlavha FK,
+# summa, to'langan summa va miqdor ifodalari (yo'q bo'lsa None), elementlar arxivi (bo'lsa)
+RollupSource = namedtuple("RollupSource", "field item_model header_field amount paid quantity archive_model", defaults=(None,))
+
+ROLLUP_SOURCES = (
+	RollupSource("product", SaleItem, "sale", "total", "buyers_paid", "quantity", ArchivedSaleItem),
+	RollupSource("buyer", SaleItem, "sale", "total", "buyers_paid", "quantity", ArchivedSaleItem),
+	RollupSource("food_product", FoodItem, "expense", line_total_expression(), None, "quantity"),
+	RollupSource("raw_material", RawItem, "expense", line_total_expression(), None, "quantity"),
+	RollupSource("employee", SalaryItem, "salary", "earned_amount", "paid_amount", None),
+)
+
+
+ROLLUP_DIMENSIONS = tuple(source.field for source in ROLLUP_SOURCES)
+
+
+def one_dimension():
+	"""CheckConstraint sharti: o'lcham FK laridan aynan bittasi to'ldirilgan."""
+	condition = models.Q()
+	for field in ROLLUP_DIMENSIONS:
+		condition |= models.Q(**{f"{name}__isnull": name != field for name in ROLLUP_DIMENSIONS})
+	return condition
+
+
+def rollup_sources_for(model):
+	"""Element modeli (proxy lar ham) ma'lumot beradigan RollupSource lar."""
+	return [source for source in ROLLUP_SOURCES if issubclass(model, source.item_model)]
+
+
+def rollup_sum(expression):
+	if expression is None:
+		return models.Value(0, output_field=AMOUNT_FIELD)
+	return Coalesce(models.Sum(expression, output_field=AMOUNT_FIELD), models.Value(0), output_field=AMOUNT_FIELD)
+
+
+class MonthlyRollupQuerySet(models.QuerySet):
+	def refresh_months(self, source, months):
+		"""
+		Berilgan oylardagi (o'lcham, oy) qatorlarini elementlardan qayta yig'adi:
+		har bir oy sarlavha sanasi diapazoni, guruhlash bazada (jadval va arxivi
+		alohida, natijalari qo'shiladi) - bitta o'qish, bitta upsert. Hisobotlar
+		keshi shu manba uchun eskiradi.
+		"""
+		months = {month_start(month) for month in months if month}
+		if not months:
+			return
+
+		field_id = f"{source.field}_id"
+		date_path = f"{source.header_field}__date"
+		period = models.Q()
+		for month in months:
+			period |= models.Q(**{f"{date_path}__gte": month, f"{date_path}__lt": next_month(month)})
+		groups = source_items(source, lambda manager: (
+			manager
+			.filter(period, **{f"{source.field}__isnull": False})
+			.annotate(rollup_month=TruncMonth(date_path))
+			.values(field_id, "rollup_month")
+			.annotate(
+				amount=rollup_sum(source.amount),
+				paid=rollup_sum(source.paid),
+				quantity_sum=rollup_sum(source.quantity),
+				items=models.Count("pk"),
+			)
+		))
+
+		rollups = {}
+		for group in groups:
+			key = (group[field_id], group["rollup_month"])
+			row = rollups.get(key)
+			if row is None:
+				rollups[key] = MonthlyRollup(**{
+					field_id: group[field_id],
+					"month": group["rollup_month"],
+					"amount": group["amount"],
+					"paid_amount": group["paid"],
+					"quantity": group["quantity_sum"],
+					"items_count": group["items"],
+				})
+				continue
+			# Bir xil (o'lcham, oy) jadvalda ham, arxivda ham bo'lishi mumkin
+			row.amount += group["amount"]
+			row.paid_amount += group["paid"]
+			row.quantity += group["quantity_sum"]
+			row.items_count += group["items"]
+		rows = list(rollups.values())
+
+		present = {(getattr(row, field_id), row.month) for row in rows}
+		existing = set(self.filter(**{"month__in": months, f"{source.field}__isnull": False}).values_list(field_id, "month"))
+		stale = existing - present
+		if stale:
+			condition = models.Q()
+			for item_id, month in stale:
+				condition |= models.Q(**{field_id: item_id, "month": month})
+			self.filter(condition).delete()
+		if rows:
+			self.bulk_create(
+				rows,
+				update_conflicts=True,
+				unique_fields=[source.field, "month"],
+				update_fields=["amount", "paid_amount", "quantity", "items_count", "updated_at"],
+			)
+		invalidate_reports(source.field)
+
+	def refresh_dates(self, source, dates):
+		self.refresh_months(source, {month_start(date) for date in dates if date})
+
+
+class MonthlyRollup(models.Model):
+	"""
+	Oylik yig'indi: har (o'lcham, oy) uchun bitta qator. O'lcham - mahsulot yoki
+	xaridor (savdo), oziq-ovqat yoki xom-ashyo (xarajat), ishchi (ish haqi).
+	Hisobotlar elementlar jadvalini emas, shu jadvalni o'qiydi.
+	"""
+
+	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+	month = models.DateField(verbose_name="Oy")
+	product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name="monthly_rollups", verbose_name="Mahsulot")
+	buyer = models.ForeignKey(Buyer, on_delete=models.CASCADE, null=True, blank=True, related_name="monthly_rollups", verbose_name="Xaridor")
+	food_product = models.ForeignKey(FoodProducts, on_delete=models.CASCADE, null=True, blank=True, related_name="monthly_rollups", verbose_name="Oziq-ovqat")
+	raw_material = models.ForeignKey(RawMaterials, on_delete=models.CASCADE, null=True, blank=True, related_name="monthly_rollups", verbose_name="Xom-ashyo")
+	employee = models.ForeignKey(Employee, on_delete=models.CASCADE, null=True, blank=True, related_name="monthly_rollups", verbose_name="Ishchi")
+	amount = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Summa")
+	paid_amount = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="To'langan summa")
+	quantity = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Miqdor")
+	items_count = models.PositiveIntegerField(default=0, verbose_name="Qatorlar soni")
+	updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan sana")
+
+	objects = MonthlyRollupQuerySet.as_manager()
+
+	class Meta:
+		verbose_name = "Oylik hisobot "
+		verbose_name_plural = "Oylik hisobotlar "
+		ordering = ["-month"]
+		# NULL lar teng hisoblanmaydi - har bir o'lcham o'z (qiymat, oy) jufti bo'yicha unikal
+		unique_together = [("product", "month"), ("buyer", "month"), ("food_product", "month"), ("raw_material", "month"), ("employee", "month")]
+		indexes = [
+			# Davr bo'yicha hisobot: WHERE month BETWEEN ... (o'lcham ustuni IS NOT NULL)
+			models.Index(fields=["month"], name="reports_rollup_month_idx"),
+		]
+		constraints = [
+			models.CheckConstraint(condition=one_dimension(), name="reports_rollup_one_dimension"),
+		]
+
+	def __str__(self):
+		return f"{self.dimension} - {self.month:%Y-%m}"
+
+	@property
+	def dimension(self):
+		return self.product or self.buyer or self.food_product or self.raw_material or self.employee
+
+
+# Ishchi jarayon shu vaqtdan beri heartbeat yozmagan bo'lsa, u to'xtab qolgan (reports.jobs)
+JOB_STALE_AFTER = datetime.timedelta(minutes=10)
+JOB_MAX_ATTEMPTS = 3
+
+
+class JobQuerySet(models.QuerySet):
+	def enqueue(self, name, params=None, user=None):
+		return self.create(name=name, params=params or {}, created_by=user)
+
+	def claim(self, worker, pk=None):
+		"""
+		Eng eski navbatdagi (yoki `pk` dagi) vazifani `worker` ga biriktiradi (yo'q bo'lsa None).
+		PostgreSQL da band qatorlar o'tkazib yuboriladi (SKIP LOCKED); SQLite da
+		yozuvchi tranzaksiya bitta, holat sharti bilan UPDATE ikki ishchiga bir
+		vazifani bermaydi.
+		"""
+		with transaction.atomic():
+			queued = self.filter(status=Job.Status.QUEUED)
+			if pk is not None:
+				queued = queued.filter(pk=pk)
+			job = queued.select_for_update(skip_locked=True).order_by("created_at").first()
+			if job is None:
+				return None
+			now = timezone.now()
+			claimed = self.filter(pk=job.pk, status=Job.Status.QUEUED).update(
+				status=Job.Status.RUNNING,
+				worker=worker,
+				attempts=models.F("attempts") + 1,
+				started_at=now,
+				heartbeat_at=now,
+			)
+		if not claimed:
+			return None
+		job.refresh_from_db()
+		return job
+
+	def requeue_stale(self, now=None, running=()):
+		"""
+		To'xtab qolgan ishchilarning vazifalari qayta navbatga, urinishlar tugagan
+		bo'lsa - xato. `running` - chaqirayotgan ishchining o'zi bajarayotgan
+		vazifalar: ularning heartbeat i kechiksa ham (masalan SQLite da yozuv
+		band), jarayon tirik, ular qayta navbatga qo'yilmaydi.
+		"""
+		stale = self.filter(status=Job.Status.RUNNING, heartbeat_at__lt=(now or timezone.now()) - JOB_STALE_AFTER)
+		stale = stale.exclude(pk__in=list(running))
+		failed = stale.filter(attempts__gte=JOB_MAX_ATTEMPTS).update(
+			status=Job.Status.FAILED,
+			error="Ishchi jarayon javob bermay qoldi.",
+			finished_at=timezone.now(),
+		)
+		requeued = stale.update(status=Job.Status.QUEUED, worker="")
+		return requeued, failed
+
+
+class Job(models.Model):
+	"""
+	Fon vazifasi: admin uni navbatga qo'yadi va darhol javob qaytaradi,
+	`run_jobs` buyrug'i (ishchi jarayonlar) bajaradi. Vazifa turlari va
+	bajarilishi - reports.jobs.
+	"""
+
+	class Status(models.TextChoices):
+		QUEUED = "queued", "Navbatda"
+		RUNNING = "running", "Bajarilmoqda"
+		DONE = "done", "Bajarildi"
+		FAILED = "failed", "Xato"
+
+	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+	name = models.CharField(max_length=100, verbose_name="Vazifa turi")
+	params = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder, verbose_name="Parametrlar")
+	status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED, verbose_name="Holati")
+	progress_done = models.PositiveIntegerField(default=0, verbose_name="Bajarilgan")
+	progress_total = models.PositiveIntegerField(null=True, blank=True, verbose_name="Jami")
+	message = models.CharField(max_length=255, blank=True, verbose_name="Xabar")
+	result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Natija")
+	error = models.TextField(blank=True, verbose_name="Xato")
+	attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Urinishlar")
+	worker = models.CharField(max_length=100, blank=True, verbose_name="Ishchi jarayon")
+	created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Yaratgan foydalanuvchi")
+	created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
+	started_at = models.DateTimeField(null=True, blank=True, verbose_name="Boshlangan")
+	finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Tugagan")
+	heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Oxirgi signal")
+
+	objects = JobQuerySet.as_manager()
+
+	class Meta:
+		verbose_name = "Fon vazifasi "
+		verbose_name_plural = "Fon vazifalari "
+		ordering = ["-created_at"]
+		indexes = [
+			# Ishchi navbatdan oladi: WHERE status = 'queued' ORDER BY created_at
+			models.Index(fields=["status", "created_at"], name="reports_job_status_idx"),
+		]
+
+	def __str__(self):
+		return f"{self.title} - {timezone.localtime(self.created_at):%Y-%m-%d %H:%M}"
+
+	@property
+	def title(self):
+		from .jobs import JOBS
+
+		job_type = JOBS.get(self.name)
+		return job_type.title if job_type else self.name
+
+	def claimed(self):
+		"""
+		Shu biriktirishning qatori. Vazifa qayta navbatga qo'yilib boshqa ishchi
+		olgan bo'lsa (attempts oshgan), eski ishchining yozuvlari hech narsani o'zgartirmaydi.
+		"""
+		return Job.objects.filter(pk=self.pk, status=self.Status.RUNNING, worker=self.worker, attempts=self.attempts)
+
+	@property
+	def is_active(self):
+		return self.status in (self.Status.QUEUED, self.Status.RUNNING)
+
+	@property
+	def percent(self):
+		if self.status == self.Status.DONE:
+			return 100
+		if not self.progress_total:
+			return None
+		return min(100, self.progress_done * 100 // self.progress_total)
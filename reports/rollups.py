@@ -0,0 +1,178 @@
+"""
+Davr hisobotlari: oylar/yillar kesimida savdo, xarajat va ish haqi, mahsulot,
+xaridor, oziq-ovqat, xom-ashyo va ishchi bo'yicha yig'indilar.
+
+Hisobotlar elementlar jadvalini o'qimaydi: umumiy ko'rinish DailySummary dan,
+qolganlari MonthlyRollup dan (bir yil - o'lcham boshiga ko'pi bilan 12 qator)
+olinadi. Chizilgan jadval keshlanadi va manba yangilanganda eskiradi
+(reports.caching).
+"""
+import datetime
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import models
+from django.db.models.functions import TruncMonth, TruncYear
+from django.template.loader import render_to_string
+
+from .caching import REPORT_CACHE_TIMEOUT, report_cache_key
+from .models import SUMMARY_REPORT, DailySummary, MonthlyRollup, next_month
+
+# Ustun: nomi (qatordagi kalit), sarlavha, raqammi
+Column = namedtuple("Column", "key title numeric")
+# Hisobot: URL dagi nomi, sarlavha, MonthlyRollup o'lchami (umumiy ko'rinish uchun None),
+# o'lcham nomi ustuni, ustunlar
+Report = namedtuple("Report", "name title dimension label_field columns")
+
+REPORTS = (
+	Report("summary", "Oylar va yillar", None, None, (
+		Column("period", "Davr", False),
+		Column("sales_total", "Savdo", True),
+		Column("expenses_total", "Xarajatlar", True),
+		Column("salary_earned", "Topilgan maosh", True),
+		Column("salary_paid", "To'langan maosh", True),
+		Column("net_total", "Sof foyda", True),
+	)),
+	Report("product", "Mahsulotlar bo'yicha savdo", "product", "product__product_name", (
+		Column("label", "Mahsulot", False),
+		Column("quantity", "Miqdor", True),
+		Column("amount", "Savdo", True),
+		Column("items_count", "Qatorlar", True),
+	)),
+	Report("buyer", "Xaridorlar bo'yicha savdo", "buyer", "buyer__name", (
+		Column("label", "Xaridor", False),
+		Column("amount", "Savdo", True),
+		Column("paid_amount", "To'langan", True),
+		Column("debt", "Qarz", True),
+		Column("items_count", "Qatorlar", True),
+	)),
+	Report("food_product", "Oziq-ovqat xarajatlari", "food_product", "food_product__food_product_name", (
+		Column("label", "Oziq-ovqat", False),
+		Column("quantity", "Miqdor", True),
+		Column("amount", "Xarajat", True),
+	)),
+	Report("raw_material", "Xom-ashyo xarajatlari", "raw_material", "raw_material__raw_material_name", (
+		Column("label", "Xom-ashyo", False),
+		Column("quantity", "Miqdor", True),
+		Column("amount", "Xarajat", True),
+	)),
+	Report("employee", "Ishchilar bo'yicha ish haqi", "employee", "employee__full_name", (
+		Column("label", "Ishchi", False),
+		Column("amount", "Topilgan", True),
+		Column("paid_amount", "To'langan", True),
+		Column("debt", "Farq", True),
+		Column("items_count", "Kunlar", True),
+	)),
+)
+REPORTS_BY_NAME = {report.name: report for report in REPORTS}
+
+ALL_YEARS = "all"
+
+
+class Period(namedtuple("Period", "year month")):
+	"""`year` - yil yoki None (barcha yillar), `month` - 1..12 yoki None."""
+
+	@classmethod
+	def from_params(cls, params, today=None):
+		today = today or datetime.date.today()
+		year = params.get("year") or str(today.year)
+		if year == ALL_YEARS:
+			return cls(None, None)
+		try:
+			year = int(year)
+			month = int(params["month"]) if params.get("month") else None
+		except ValueError:
+			return cls(today.year, None)
+		if not 1 <= year <= 9999 or (month is not None and not 1 <= month <= 12):
+			return cls(today.year, None)
+		return cls(year, month)
+
+	def date_range(self):
+		"""[boshi, oxiri) yoki None (cheklovsiz)."""
+		if self.year is None:
+			return None
+		if self.month is None:
+			return datetime.date(self.year, 1, 1), datetime.date(self.year + 1, 1, 1)
+		start = datetime.date(self.year, self.month, 1)
+		return start, next_month(start)
+
+
+def summary_rows(period, by_month):
+	"""DailySummary dan: yil tanlanmagan bo'lsa yillar, aks holda oylar kesimida."""
+	queryset = DailySummary.objects.order_by()
+	date_range = period.date_range()
+	if date_range:
+		queryset = queryset.filter(date__gte=date_range[0], date__lt=date_range[1])
+	trunc = TruncMonth("date") if period.year is not None or by_month else TruncYear("date")
+	rows = (
+		queryset.annotate(period_start=trunc)
+		.values("period_start")
+		.annotate(
+			sales_total=models.Sum("sales_total"),
+			expenses_total=models.Sum("expenses_total"),
+			salary_earned=models.Sum("salary_earned"),
+			salary_paid=models.Sum("salary_paid"),
+			net_total=models.Sum("net_total"),
+		)
+		.order_by("period_start")
+	)
+	date_format = "%Y-%m" if period.year is not None or by_month else "%Y"
+	return [{**row, "period": row["period_start"].strftime(date_format)} for row in rows]
+
+
+def dimension_rows(report, period, by_month):
+	"""MonthlyRollup dan: o'lcham (va `by_month` bo'lsa oy) bo'yicha, summa kamayishi tartibida."""
+	queryset = MonthlyRollup.objects.filter(**{f"{report.dimension}__isnull": False}).order_by()
+	date_range = period.date_range()
+	if date_range:
+		queryset = queryset.filter(month__gte=date_range[0], month__lt=date_range[1])
+	group_by = [report.dimension, report.label_field, *(["month"] if by_month else [])]
+	rows = (
+		queryset.values(*group_by)
+		.annotate(
+			amount=models.Sum("amount"),
+			paid_amount=models.Sum("paid_amount"),
+			quantity=models.Sum("quantity"),
+			items_count=models.Sum("items_count"),
+		)
+		.order_by(*(["month"] if by_month else []), "-amount", report.label_field)
+	)
+	result = []
+	for row in rows:
+		label = row[report.label_field]
+		if by_month:
+			label = f"{row['month']:%Y-%m} · {label}"
+		result.append({**row, "label": label, "debt": row["amount"] - row["paid_amount"]})
+	return result
+
+
+def report_rows(report, period, by_month=False):
+	if report.dimension is None:
+		return summary_rows(period, by_month)
+	return dimension_rows(report, period, by_month)
+
+
+def report_totals(report, rows):
+	return {
+		column.key: sum((row[column.key] or 0 for row in rows), 0)
+		for column in report.columns if column.numeric
+	}
+
+
+def render_report(report, period, by_month=False):
+	"""
+	Hisobot jadvali HTML i. Manba (DailySummary yoki shu o'lchamning
+	MonthlyRollup qatorlari) o'zgarmaguncha keshdan olinadi.
+	"""
+	source = report.dimension or SUMMARY_REPORT
+	key = report_cache_key(report.name, [source], period.year or ALL_YEARS, period.month or "", int(by_month))
+	html = cache.get(key)
+	if html is None:
+		rows = report_rows(report, period, by_month)
+		html = render_to_string("admin/reports/monthlyrollup/report_table.html", {
+			"report": report,
+			"rows": [[(row[column.key], column.numeric) for column in report.columns] for row in rows],
+			"totals": [report_totals(report, rows).get(column.key) for column in report.columns[1:]],
+		})
+		cache.set(key, html, REPORT_CACHE_TIMEOUT)
+	return html
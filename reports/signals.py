@@ -0,0 +1,132 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from config.signals import formset_saved, totals_changed
+from expenses.models import Expenses, FoodItem, RawItem
+from salary.models import Salary, SalaryItem
+from sales.archive import archiving
+from sales.models import OpenSaleItem, Sale, SaleItem, UnpaidSaleItem
+
+from .caching import invalidate_reports
+from .models import (
+	PRICE_SOURCES, ROLLUP_SOURCES, DailySummary, MonthlyRollup, PriceHistory, price_source_for, rollup_sources_for,
+)
+
+DOCUMENT_MODELS = (Sale, Expenses, Salary)
+
+# Narx tarixi manbalari: sarlavha modeli -> shu sarlavhaga tegishli PriceSource lar
+PRICE_SOURCES_BY_HEADER = {
+	Sale: [source for source in PRICE_SOURCES if source.header_field == "sale"],
+	Expenses: [source for source in PRICE_SOURCES if source.header_field == "expense"],
+}
+
+# Oylik yig'indi manbalari: sarlavha modeli -> RollupSource lar
+ROLLUP_SOURCES_BY_HEADER = {
+	Sale: [source for source in ROLLUP_SOURCES if source.header_field == "sale"],
+	Expenses: [source for source in ROLLUP_SOURCES if source.header_field == "expense"],
+	Salary: [source for source in ROLLUP_SOURCES if source.header_field == "salary"],
+}
+
+# Master model -> hisobot o'lchamlari: hisobot HTML ida master nomi bor, u o'zgarsa kesh eskiradi
+REPORT_SOURCES_BY_MASTER = {}
+for source in ROLLUP_SOURCES:
+	master_model = source.item_model._meta.get_field(source.field).related_model
+	REPORT_SOURCES_BY_MASTER.setdefault(master_model, []).append(source.field)
+
+# Proxy modellar (admin dagi "Yopilmagan", "To'lanmagan" ro'yxatlar) o'z nomi bilan signal yuboradi
+ITEM_MODELS = (SaleItem, OpenSaleItem, UnpaidSaleItem, FoodItem, RawItem, SalaryItem)
+
+
+def refresh_prices(headers, dates):
+	for source in PRICE_SOURCES_BY_HEADER.get(headers, ()):
+		PriceHistory.objects.refresh_dates(source, dates)
+
+
+def refresh_rollups(headers, dates):
+	for source in ROLLUP_SOURCES_BY_HEADER.get(headers, ()):
+		MonthlyRollup.objects.refresh_dates(source, dates)
+
+
+def refresh_item_dates(item_model, dates):
+	"""Element o'zgargan sanalar uchun narx tarixi va oylik yig'indilar."""
+	source = price_source_for(item_model)
+	if source is not None:
+		PriceHistory.objects.refresh_dates(source, dates)
+	for source in rollup_sources_for(item_model):
+		MonthlyRollup.objects.refresh_dates(source, dates)
+
+
+def item_header_field(item_model):
+	return rollup_sources_for(item_model)[0].header_field
+
+
+def remember_document_date(sender, instance, update_fields=None, **kwargs):
+	"""Sana o'zgartirilsa, eski sananing hisobotini ham yangilash uchun eslab qoladi."""
+	if instance._state.adding:
+		return
+	if update_fields is not None and "date" not in update_fields:
+		return
+	instance._summary_old_date = sender.objects.filter(pk=instance.pk).values_list("date", flat=True).first()
+
+
+def refresh_on_document_save(sender, instance, **kwargs):
+	old_date = instance.__dict__.pop("_summary_old_date", None)
+	DailySummary.objects.refresh_dates([instance.date, old_date])
+	if old_date is not None and old_date != instance.date:
+		refresh_prices(sender, [instance.date, old_date])
+		refresh_rollups(sender, [instance.date, old_date])
+
+
+def refresh_on_document_delete(sender, instance, **kwargs):
+	DailySummary.objects.refresh_dates([instance.date])
+
+
+def refresh_on_totals_changed(sender, pks, **kwargs):
+	DailySummary.objects.refresh_dates(sender.objects.filter(pk__in=pks).values_list("date", flat=True))
+
+
+def item_header_dates(item_model, header_ids):
+	header_model = item_model._meta.get_field(item_header_field(item_model)).related_model
+	return list(header_model.objects.filter(pk__in=[pk for pk in header_ids if pk]).values_list("date", flat=True))
+
+
+def remember_item_header(sender, instance, **kwargs):
+	"""Element boshqa sarlavhaga ko'chirilsa, eski sananing narxi va yig'indisini ham yangilash uchun."""
+	if instance._state.adding:
+		return
+	instance._item_old_header_id = (
+		sender._default_manager.filter(pk=instance.pk).values_list(f"{item_header_field(sender)}_id", flat=True).first()
+	)
+
+
+def refresh_on_item_change(sender, instance, **kwargs):
+	# Arxivga ko'chirish (sales.archive): narx tarixi va yig'indilar ikkala jadvaldan - o'zgarmaydi
+	if archiving.get():
+		return
+	header_ids = [getattr(instance, f"{item_header_field(sender)}_id"), instance.__dict__.pop("_item_old_header_id", None)]
+	refresh_item_dates(sender, item_header_dates(sender, header_ids))
+
+
+def invalidate_on_master_change(sender, **kwargs):
+	invalidate_reports(*REPORT_SOURCES_BY_MASTER[sender])
+
+
+def refresh_on_formset_saved(sender, instance, **kwargs):
+	if rollup_sources_for(sender):
+		refresh_item_dates(sender, [instance.date])
+
+
+for document_model in DOCUMENT_MODELS:
+	pre_save.connect(remember_document_date, sender=document_model)
+	post_save.connect(refresh_on_document_save, sender=document_model)
+	post_delete.connect(refresh_on_document_delete, sender=document_model)
+	totals_changed.connect(refresh_on_totals_changed, sender=document_model)
+
+for item_model in ITEM_MODELS:
+	pre_save.connect(remember_item_header, sender=item_model)
+	post_save.connect(refresh_on_item_change, sender=item_model)
+	post_delete.connect(refresh_on_item_change, sender=item_model)
+	formset_saved.connect(refresh_on_formset_saved, sender=item_model)
+
+for master_model in REPORT_SOURCES_BY_MASTER:
+	post_save.connect(invalidate_on_master_change, sender=master_model)
+	post_delete.connect(invalidate_on_master_change, sender=master_model)
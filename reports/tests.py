@@ -0,0 +1,561 @@
+import csv
+import datetime
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from asgiref.sync import iscoroutinefunction
+from openpyxl import load_workbook
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from benchmarks.cases import CASES, Bench
+from benchmarks.factory import seed
+from benchmarks.runner import compare, run_cases
+from config.instrumentation import QueryInstrumentationMiddleware, request_log
+
+from expenses.models import Expenses, FoodItem, FoodProducts, RawItem, RawMaterials
+from reports import jobs
+from reports.importers import RowError, parse_decimal
+from reports.models import DailySummary, Job, MonthlyRollup, PriceHistory
+from salary.models import Employee, Salary, SalaryItem
+from sales.archive import archive_settled
+from sales.models import ArchivedSaleItem, Buyer, Product, Sale, SaleItem
+
+DAY = datetime.date(2026, 3, 1)
+
+
+class DailySummaryTests(TestCase):
+	def setUp(self):
+		self.product = Product.objects.create(product_name="Stol")
+		self.food = FoodProducts.objects.create(food_product_name="Non")
+		user = get_user_model().objects.create_user("ishchi", password="x")
+		self.employee = Employee.objects.create(user=user, full_name="Ishchi")
+
+	def create_day(self, date=DAY):
+		sale = Sale.objects.create(date=date)
+		SaleItem.objects.create(sale=sale, product=self.product, quantity=Decimal("2"), price=Decimal("500"))
+		sale.update_total_price()
+
+		expense = Expenses.objects.create(date=date)
+		FoodItem.objects.create(expense=expense, food_product=self.food, quantity=Decimal("1"), price=Decimal("100"))
+
+		salary = Salary.objects.create(date=date)
+		SalaryItem.objects.create(salary=salary, employee=self.employee, earned_amount=Decimal("300"), paid_amount=Decimal("200"))
+		salary.update_totals()
+		return sale, expense, salary
+
+	def test_summary_follows_documents(self):
+		sale, expense, salary = self.create_day()
+		summary = DailySummary.objects.get(date=DAY)
+		self.assertEqual(summary.sales_total, Decimal("1000"))
+		self.assertEqual(summary.expenses_total, Decimal("100"))
+		self.assertEqual(summary.salary_paid, Decimal("200"))
+		self.assertEqual(summary.net_total, Decimal("700"))
+
+		FoodItem.objects.create(expense=expense, food_product=self.food, quantity=Decimal("1"), price=Decimal("50"))
+		self.assertEqual(DailySummary.objects.get(date=DAY).net_total, Decimal("650"))
+
+		sale.delete()
+		expense.delete()
+		salary.delete()
+		self.assertFalse(DailySummary.objects.exists())
+
+	def test_moving_document_date(self):
+		sale = Sale.objects.create(date=DAY, total_price=Decimal("10"))
+		sale.date = DAY + datetime.timedelta(days=1)
+		sale.save()
+		self.assertEqual(list(DailySummary.objects.values_list("date", flat=True)), [sale.date])
+
+	def test_rebuild_command(self):
+		self.create_day()
+		self.create_day(DAY + datetime.timedelta(days=1))
+		DailySummary.objects.all().delete()
+		DailySummary.objects.create(date=DAY - datetime.timedelta(days=1), net_total=Decimal("5"))
+
+		call_command("rebuild_daily_summary", stdout=StringIO())
+		self.assertEqual(DailySummary.objects.count(), 2)
+		self.assertEqual(DailySummary.objects.get(date=DAY).net_total, Decimal("700"))
+
+	def test_changelist_shows_period_totals(self):
+		self.create_day()
+		self.create_day(DAY + datetime.timedelta(days=1))
+		admin_user = get_user_model().objects.create_superuser("admin", password="admin")
+		self.client.force_login(admin_user)
+		response = self.client.get(reverse("admin:reports_dailysummary_changelist"), {"date__year": "2026", "date__month": "3"})
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.context_data["period_totals"]["net_total"], Decimal("1400"))
+
+
+class ExportTests(TestCase):
+	def setUp(self):
+		sale = Sale.objects.create(date=DAY)
+		product = Product.objects.create(product_name="Stol", measurement_unit="dona")
+		buyer = Buyer.objects.create(name="Ali", sign="A", phone_number="+998")
+		self.items = [
+			SaleItem.objects.create(sale=sale, product=product, buyer=buyer, quantity=Decimal("1"), price=Decimal(index + 1))
+			for index in range(5)
+		]
+		self.path = os.path.join(tempfile.mkdtemp(), "sale_items.csv")
+
+	def read_rows(self):
+		with open(self.path, newline="", encoding="utf-8-sig") as handle:
+			return list(csv.reader(handle))
+
+	def export(self, *args):
+		call_command("export_items", "sale_items", "--output", self.path, *args, stdout=StringIO())
+
+	def test_export_denormalizes_related_rows(self):
+		self.export("--from", "2026-03-01", "--to", "2026-03-31")
+		rows = self.read_rows()
+		self.assertEqual(rows[0][:3], ["ID", "Sana", "Mahsulot"])
+		self.assertEqual(len(rows), 6)
+		self.assertEqual(rows[1][1:4], ["2026-03-01", "Stol", "dona"])
+		self.assertEqual(rows[1][7:10], ["Ali", "A", "+998"])
+
+	def test_resume_continues_after_last_complete_row(self):
+		self.export()
+		with open(self.path, encoding="utf-8-sig") as handle:
+			lines = handle.readlines()
+		# Ikkinchi qatordan keyin uzilib qolgan eksport
+		with open(self.path, "w", encoding="utf-8-sig") as handle:
+			handle.writelines(lines[:3])
+			handle.write(lines[3][:10])
+
+		self.export("--resume")
+		rows = self.read_rows()
+		self.assertEqual(len(rows), 6)
+		self.assertEqual([row[0] for row in rows[1:]], [str(item.pk) for item in sorted(self.items, key=lambda item: (item.created_at, str(item.pk)))])
+
+	def test_xlsx_cells_keep_native_types(self):
+		path = os.path.join(tempfile.mkdtemp(), "sale_items.xlsx")
+		call_command("export_items", "sale_items", "--output", path, "--format", "xlsx", stdout=StringIO())
+		sheet = load_workbook(path, read_only=True).active
+		header, *rows = sheet.iter_rows(values_only=True)
+		self.assertEqual(len(rows), 5)
+		columns = {name: index for index, name in enumerate(header)}
+		row = rows[0]
+		self.assertEqual(row[columns["ID"]], str(self.items[0].pk))
+		self.assertEqual(row[columns["Sana"]].date(), DAY)
+		self.assertEqual(row[columns["Narx"]], 1)
+		# Summalar son - Excel ustunni yig'a oladi
+		self.assertEqual(sum(row[columns["Jami"]] for row in rows), 15)
+
+	def test_resume_after_truncated_header(self):
+		self.export()
+		complete = self.read_rows()
+		# Sarlavha yozilayotganda uzilgan fayl - qaytadan to'liq yoziladi
+		with open(self.path, "w", encoding="utf-8-sig") as handle:
+			handle.write("ID,Sa")
+		self.export("--resume")
+		self.assertEqual(self.read_rows(), complete)
+		# Faqat sarlavha yozilgan - barcha qatorlar qo'shiladi
+		with open(self.path, "w", encoding="utf-8-sig") as handle:
+			handle.write(",".join(complete[0]) + "\r\n")
+		self.export("--resume")
+		self.assertEqual(self.read_rows(), complete)
+
+	def test_export_includes_archived_items(self):
+		SaleItem.objects.filter(pk__in=[item.pk for item in self.items[:2]]).update(payment_status="paid", order_status="closed")
+		archive_settled(months=0, now=timezone.now() + datetime.timedelta(days=1))
+		self.assertEqual(ArchivedSaleItem.objects.count(), 2)
+
+		self.export()
+		rows = self.read_rows()
+		expected = sorted(self.items, key=lambda item: (item.created_at, str(item.pk)))
+		self.assertEqual([row[0] for row in rows[1:]], [str(item.pk) for item in expected])
+		self.assertEqual(rows[1][1:3], ["2026-03-01", "Stol"])
+
+		# Davom ettirish ham ikkala jadval bo'yicha
+		with open(self.path, encoding="utf-8-sig") as handle:
+			lines = handle.readlines()
+		with open(self.path, "w", encoding="utf-8-sig") as handle:
+			handle.writelines(lines[:2])
+		self.export("--resume")
+		self.assertEqual(self.read_rows(), rows)
+
+	def test_admin_action_streams_csv(self):
+		admin_user = get_user_model().objects.create_superuser("admin", password="admin")
+		self.client.force_login(admin_user)
+		response = self.client.post(reverse("admin:sales_saleitem_changelist"), {
+			"action": "export_csv",
+			"_selected_action": [str(item.pk) for item in self.items[:2]],
+		})
+		self.assertTrue(response.streaming)
+		content = b"".join(response.streaming_content).decode("utf-8-sig")
+		self.assertEqual(len(content.strip().splitlines()), 3)
+
+
+class ImportTests(TestCase):
+	def setUp(self):
+		self.path = os.path.join(tempfile.mkdtemp(), "import.csv")
+
+	def write_csv(self, headers, rows):
+		with open(self.path, "w", newline="", encoding="utf-8-sig") as handle:
+			writer = csv.writer(handle)
+			writer.writerow(headers)
+			writer.writerows(rows)
+
+	def run_import(self, kind, *args):
+		stdout, stderr = StringIO(), StringIO()
+		call_command("import_records", kind, self.path, *args, stdout=stdout, stderr=stderr)
+		return stdout.getvalue(), stderr.getvalue()
+
+	def test_exported_sale_items_round_trip(self):
+		sale = Sale.objects.create(date=DAY)
+		product = Product.objects.create(product_name="Stol", measurement_unit="dona")
+		buyer = Buyer.objects.create(name="Ali", sign="A")
+		SaleItem.objects.create(sale=sale, product=product, buyer=buyer, quantity=Decimal("2"), price=Decimal("500"))
+		call_command("export_items", "sale_items", "--output", self.path, stdout=StringIO())
+		SaleItem.objects.all().delete()
+		Sale.objects.all().delete()
+
+		self.run_import("sale_items", "--chunk-size", "1")
+		sale = Sale.objects.get(date=DAY)
+		self.assertEqual(sale.total_price, Decimal("1000"))
+		self.assertEqual(SaleItem.objects.get().buyer, buyer)
+		self.assertEqual(Product.objects.count(), 1)
+		self.assertEqual(DailySummary.objects.get(date=DAY).sales_total, Decimal("1000"))
+		self.assertEqual(PriceHistory.objects.get(product=product, date=DAY).last_price, Decimal("500"))
+		self.assertEqual(Product.objects.get().last_price, Decimal("500"))
+
+	def test_masters_created_and_bad_rows_reported(self):
+		self.write_csv(
+			["Sana", "Oziq-ovqat nomi", "O'lchov birligi", "Miqdori", "Narxi"],
+			[
+				["2026-03-01", "Non", "dona", "3", "2 000"],
+				["2026-03-01", " non ", "DONA", "1", "1000"],
+				["xato", "Non", "dona", "1", "1"],
+				["01.03.2026", "Go'sht", "kg", "1,5", "100"],
+			],
+		)
+		stdout, stderr = self.run_import("food_items")
+		self.assertIn("4-qator", stderr)
+		self.assertEqual(FoodProducts.objects.count(), 2)
+		expense = Expenses.objects.get(date=DAY)
+		self.assertEqual(FoodItem.objects.filter(expense=expense).count(), 3)
+		self.assertEqual(expense.total_cost, Decimal("7150"))
+
+	def test_salary_import_creates_employees(self):
+		self.write_csv(
+			["Sana", "Ishchi", "Ishlab topilgan summa", "To'langan summa"],
+			[["2026-03-01", "Vali Valiyev", "300", "200"], ["2026-03-01", "Vali Valiyev", "1", "1"]],
+		)
+		stdout, stderr = self.run_import("salary_items")
+		self.assertIn("3-qator", stderr)
+		employee = Employee.objects.get()
+		self.assertFalse(employee.user.is_active)
+		salary = Salary.objects.get(date=DAY)
+		self.assertEqual((salary.total_earned_salary, salary.total_paid_salary), (Decimal("300"), Decimal("200")))
+
+	def test_decimal_separators(self):
+		for value, expected in (
+			("1.234,56", "1234.56"), ("1,234.56", "1234.56"), ("1 234,5", "1234.5"),
+			("1.234.567", "1234567"), ("12,5", "12.5"), ("0.125", "0.125"),
+		):
+			self.assertEqual(parse_decimal(value), Decimal(expected), value)
+		# Ming ajratgichi yoki kasr - aniqlab bo'lmaydi, jim buzilmaydi
+		for value in ("1,234", "2.500", "1,234,56", "1.234,567,89", "1,2345.6"):
+			self.assertRaises(RowError, parse_decimal, value)
+
+		self.write_csv(["Sana", "Mahsulot", "Miqdor", "Narx"], [["2026-03-01", "Stol", "1", "1.234,50"], ["2026-03-01", "Stul", "1", "1,234"]])
+		stdout, stderr = self.run_import("sale_items")
+		self.assertIn("3-qator", stderr)
+		self.assertEqual(SaleItem.objects.get().price, Decimal("1234.50"))
+
+	def test_dry_run_leaves_database_unchanged(self):
+		self.write_csv(["Sana", "Mahsulot", "Miqdor", "Narx"], [["2026-03-01", "Stol", "1", "10"]])
+		stdout, stderr = self.run_import("sale_items", "--dry-run")
+		self.assertIn("[dry-run] 1 ta qator", stdout)
+		self.assertFalse(Sale.objects.exists())
+		self.assertFalse(Product.objects.exists())
+		self.assertFalse(DailySummary.objects.exists())
+
+
+class QueryLogTests(TestCase):
+	def setUp(self):
+		request_log.clear()
+
+	def run_view(self, view, path="/admin/test/"):
+		return QueryInstrumentationMiddleware(view)(RequestFactory().get(path))
+
+	@override_settings(QUERY_LOG={"DUPLICATE_THRESHOLD": 3, "SLOW_MS": 10 ** 6, "LOG_WARNINGS": False})
+	def test_repeated_queries_are_flagged(self):
+		def view(request):
+			for index in range(4):
+				list(Sale.objects.filter(date=DAY + datetime.timedelta(days=index)))
+			return HttpResponse()
+
+		self.run_view(view)
+		(record,) = request_log.snapshot()
+		self.assertEqual(record["queries"], 4)
+		self.assertEqual(record["flags"], ["duplicates"])
+		self.assertEqual(record["duplicates"][0]["count"], 4)
+		self.assertNotIn("2026", record["duplicates"][0]["sql"])
+
+	async def test_async_chain_counts_async_orm_queries(self):
+		async def view(request):
+			await Sale.objects.filter(date=DAY).acount()
+			await Sale.objects.filter(date=DAY).aexists()
+			return HttpResponse()
+
+		middleware = QueryInstrumentationMiddleware(view)
+		self.assertTrue(iscoroutinefunction(middleware))
+		await middleware(RequestFactory().get("/admin/test/"))
+		(record,) = request_log.snapshot()
+		self.assertEqual(record["queries"], 2)
+
+	def test_non_admin_paths_are_ignored(self):
+		self.run_view(lambda request: HttpResponse(), path="/static/x.css")
+		self.assertEqual(request_log.snapshot(), [])
+
+	def test_dashboard_and_json_export(self):
+		admin_user = get_user_model().objects.create_superuser("admin", password="admin")
+		self.client.force_login(admin_user)
+		self.client.get(reverse("admin:sales_sale_changelist"))
+
+		response = self.client.get(reverse("admin:query_log"))
+		self.assertContains(response, "admin:sales_sale_changelist")
+		data = self.client.get(reverse("admin:query_log_json")).json()
+		self.assertEqual(data["records"][-1]["view"], "admin:sales_sale_changelist")
+		self.assertGreater(data["records"][-1]["queries"], 0)
+
+		staff = get_user_model().objects.create_user("xodim", password="x", is_staff=True)
+		self.client.force_login(staff)
+		self.assertEqual(self.client.get(reverse("admin:query_log_json")).status_code, 403)
+
+
+class BenchmarkSuiteTests(TestCase):
+	def test_cases_run_on_seeded_data(self):
+		volumes = seed(5, end=DAY)
+		self.assertEqual(volumes["sales"], 5)
+		self.assertEqual(Sale.objects.with_total_mismatch().count(), 0)
+
+		admin_user = get_user_model().objects.create_superuser("admin", password="admin")
+		self.client.force_login(admin_user)
+		results = run_cases(Bench(self.client, DAY), CASES, repeat=1, warmup=0)
+		self.assertEqual(set(results), {name for name, case in CASES})
+
+	def test_compare_flags_query_and_time_regressions(self):
+		baseline = {"a": {"min_ms": 10.0, "median_ms": 10.0, "queries": 5}}
+		self.assertEqual(compare({"a": {"min_ms": 12.0, "median_ms": 12.0, "queries": 5}}, baseline), [])
+		self.assertEqual(len(compare({"a": {"min_ms": 30.0, "median_ms": 30.0, "queries": 6}}, baseline)), 2)
+
+
+class PriceHistoryTests(TestCase):
+	def setUp(self):
+		self.product = Product.objects.create(product_name="Stol", measurement_unit="dona")
+
+	def sell(self, date, price, quantity="1"):
+		sale, _ = Sale.objects.get_or_create(date=date)
+		return SaleItem.objects.create(sale=sale, product=self.product, quantity=Decimal(quantity), price=Decimal(price))
+
+	def test_daily_row_and_last_price(self):
+		self.sell(DAY, "100")
+		self.sell(DAY, "300", quantity="2")
+		last = self.sell(DAY, "200")
+
+		row = PriceHistory.objects.get(product=self.product, date=DAY)
+		self.assertEqual((row.last_price, row.min_price, row.max_price, row.avg_price), (Decimal("200"), Decimal("100"), Decimal("300"), Decimal("200")))
+		self.assertEqual((row.quantity, row.items_count), (Decimal("4"), 3))
+		self.product.refresh_from_db()
+		self.assertEqual((self.product.last_price, self.product.last_price_date), (Decimal("200"), DAY))
+
+		older = self.sell(DAY - datetime.timedelta(days=1), "50")
+		self.product.refresh_from_db()
+		self.assertEqual(self.product.last_price, Decimal("200"))
+
+		last.delete()
+		self.assertEqual(PriceHistory.objects.get(product=self.product, date=DAY).last_price, Decimal("300"))
+		older.sale.delete()
+		self.assertEqual(PriceHistory.objects.filter(product=self.product).count(), 1)
+
+	def test_expense_items_and_formsets(self):
+		raw = RawMaterials.objects.create(raw_material_name="DSP", measurement_unit="m2")
+		expense = Expenses.objects.create(date=DAY)
+		RawItem.objects.create(expense=expense, raw_material=raw, quantity=Decimal("1"), price=Decimal("70"))
+		raw.refresh_from_db()
+		self.assertEqual(raw.last_price, Decimal("70"))
+
+		admin_user = get_user_model().objects.create_superuser("admin", password="admin")
+		self.client.force_login(admin_user)
+		data = {
+			"date": (DAY + datetime.timedelta(days=1)).isoformat(),
+			"description": "",
+			"sotuvlar-TOTAL_FORMS": "1", "sotuvlar-INITIAL_FORMS": "0", "sotuvlar-MIN_NUM_FORMS": "0", "sotuvlar-MAX_NUM_FORMS": "1000",
+			"sotuvlar-0-product": str(self.product.pk), "sotuvlar-0-quantity": "1", "sotuvlar-0-price": "450",
+			"sotuvlar-0-payment_status": "unpaid", "sotuvlar-0-buyers_paid": "0", "sotuvlar-0-order_status": "open",
+		}
+		self.assertEqual(self.client.post(reverse("admin:sales_sale_add"), data).status_code, 302)
+		self.product.refresh_from_db()
+		self.assertEqual(self.product.last_price, Decimal("450"))
+
+	def test_changelist_chart_and_rebuild(self):
+		for day in range(5):
+			self.sell(DAY + datetime.timedelta(days=day), str(100 + day * 10))
+		PriceHistory.objects.all().delete()
+		call_command("rebuild_price_history", stdout=StringIO())
+		self.assertEqual(PriceHistory.objects.count(), 5)
+
+		admin_user = get_user_model().objects.create_superuser("admin", password="admin")
+		self.client.force_login(admin_user)
+		response = self.client.get(reverse("admin:reports_pricehistory_changelist"), {"product__id__exact": str(self.product.pk)})
+		self.assertEqual(response.status_code, 200)
+		chart = response.context_data["price_chart"]
+		self.assertEqual((chart["low"], chart["high"]), (Decimal("100"), Decimal("140")))
+		self.assertContains(response, "<polyline", count=3)
+
+
+class MonthlyRollupTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.product = Product.objects.create(product_name="Stol", measurement_unit="dona")
+		self.buyer = Buyer.objects.create(name="Ali", sign="A")
+		self.food = FoodProducts.objects.create(food_product_name="Non", measurement_unit="kg")
+		user = get_user_model().objects.create_user("ishchi", password="x")
+		self.employee = Employee.objects.create(user=user, full_name="Usta Karim")
+
+	def sell(self, date, price, **kwargs):
+		sale, _ = Sale.objects.get_or_create(date=date)
+		item = SaleItem.objects.create(sale=sale, product=self.product, buyer=self.buyer, quantity=Decimal("2"), price=Decimal(price), **kwargs)
+		sale.update_total_price()
+		return item
+
+	def test_rows_follow_items(self):
+		first = self.sell(DAY, "100")
+		self.sell(DAY + datetime.timedelta(days=3), "50", payment_status="paid")
+		self.sell(DAY + datetime.timedelta(days=31), "10")
+		expense = Expenses.objects.create(date=DAY)
+		FoodItem.objects.create(expense=expense, food_product=self.food, quantity=Decimal("3"), price=Decimal("5"))
+		salary = Salary.objects.create(date=DAY)
+		SalaryItem.objects.create(salary=salary, employee=self.employee, earned_amount=Decimal("300"), paid_amount=Decimal("120"))
+
+		march = MonthlyRollup.objects.get(product=self.product, month=DAY)
+		self.assertEqual((march.amount, march.quantity, march.items_count), (Decimal("300"), Decimal("4"), 2))
+		buyer = MonthlyRollup.objects.get(buyer=self.buyer, month=DAY)
+		self.assertEqual((buyer.amount, buyer.paid_amount), (Decimal("300"), Decimal("100")))
+		self.assertEqual(MonthlyRollup.objects.get(product=self.product, month=datetime.date(2026, 4, 1)).amount, Decimal("20"))
+		self.assertEqual(MonthlyRollup.objects.get(food_product=self.food, month=DAY).amount, Decimal("15"))
+		payroll = MonthlyRollup.objects.get(employee=self.employee, month=DAY)
+		self.assertEqual((payroll.amount, payroll.paid_amount, payroll.items_count), (Decimal("300"), Decimal("120"), 1))
+
+		first.delete()
+		self.assertEqual(MonthlyRollup.objects.get(product=self.product, month=DAY).amount, Decimal("100"))
+		Sale.objects.filter(date=DAY + datetime.timedelta(days=31)).get().delete()
+		self.assertFalse(MonthlyRollup.objects.filter(product=self.product, month=datetime.date(2026, 4, 1)).exists())
+
+		MonthlyRollup.objects.all().delete()
+		call_command("rebuild_rollups", stdout=StringIO())
+		self.assertEqual(MonthlyRollup.objects.filter(month=DAY).count(), 4)
+
+	def test_report_view_is_cached_until_next_write(self):
+		self.sell(DAY, "100")
+		admin_user = get_user_model().objects.create_superuser("admin", password="admin")
+		self.client.force_login(admin_user)
+		url = reverse("admin:reports_monthlyrollup_changelist")
+		params = {"report": "product", "year": "2026"}
+
+		response = self.client.get(url, params)
+		self.assertContains(response, "<td>Stol</td><td>2,00</td><td>200,00</td>")
+		with self.assertNumQueries(3):
+			# sessiya, foydalanuvchi, yillar diapazoni - jadval keshdan
+			self.client.get(url, params)
+
+		self.sell(DAY, "400")
+		self.assertContains(self.client.get(url, params), "<td>1\xa0000,00</td>")
+		self.assertContains(self.client.get(url, {"report": "summary", "year": "all"}), "<td>2026</td>", html=True)
+		self.assertContains(self.client.get(url, {"report": "product", "year": "2025"}), "ma'lumot yo'q")
+
+		# Master nomi o'zgarsa keshdagi jadval eskiradi
+		self.product.product_name = "Katta stol"
+		self.product.save()
+		self.assertContains(self.client.get(url, params), "<td>Katta stol</td>")
+
+	def test_formset_save_refreshes_payroll(self):
+		admin_user = get_user_model().objects.create_superuser("admin", password="admin")
+		self.client.force_login(admin_user)
+		data = {
+			"date": DAY.isoformat(), "total_earned_salary": "0", "total_paid_salary": "0",
+			"salary_items-TOTAL_FORMS": "1", "salary_items-INITIAL_FORMS": "0", "salary_items-MIN_NUM_FORMS": "0", "salary_items-MAX_NUM_FORMS": "1000",
+			"salary_items-0-employee": str(self.employee.pk), "salary_items-0-earned_amount": "250", "salary_items-0-paid_amount": "100",
+		}
+		self.assertEqual(self.client.post(reverse("admin:salary_salary_add"), data).status_code, 302)
+		self.assertEqual(MonthlyRollup.objects.get(employee=self.employee, month=DAY).amount, Decimal("250"))
+
+
+# run_jobs locmem bilan ishga tushmaydi (kesh veb jarayon bilan umumiy emas)
+SHARED_CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class JobQueueTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_superuser("admin", password="admin")
+		self.client.force_login(self.user)
+
+	def test_claim_and_execute(self):
+		expense = Expenses.objects.create(date=DAY)
+		food = FoodProducts.objects.create(food_product_name="Non", measurement_unit="kg")
+		FoodItem.objects.create(expense=expense, food_product=food, quantity=Decimal("3"), price=Decimal("5"))
+		Expenses.objects.filter(pk=expense.pk).update(total_cost=0)
+
+		job = jobs.enqueue("expenses.rebuild_total_cost", {"pks": [expense.pk]}, self.user)
+		self.assertRaises(LookupError, jobs.enqueue, "nomalum")
+		claimed = Job.objects.claim("test")
+		self.assertEqual((claimed.pk, claimed.status, claimed.attempts), (job.pk, Job.Status.RUNNING, 1))
+		self.assertIsNone(Job.objects.claim("test"))
+
+		self.assertTrue(jobs.execute(job.pk))
+		job.refresh_from_db()
+		self.assertEqual((job.status, job.result, job.percent), (Job.Status.DONE, {"updated": 1}, 100))
+		expense.refresh_from_db()
+		self.assertEqual(expense.total_cost, Decimal("15"))
+
+	def test_failure_and_stale_jobs(self):
+		job = jobs.enqueue("expenses.rebuild_total_cost", {})
+		Job.objects.claim("test")
+		self.assertFalse(jobs.execute(job.pk))
+		job.refresh_from_db()
+		self.assertEqual(job.status, Job.Status.FAILED)
+		self.assertIn("TypeError", job.error)
+
+		# Ishchi o'lib qolgan: heartbeat eskirgan
+		stale = timezone.now() - datetime.timedelta(hours=1)
+		Job.objects.filter(pk=job.pk).update(status=Job.Status.RUNNING, heartbeat_at=stale, attempts=1)
+		late = Job.objects.get(pk=job.pk)
+		# O'zi bajarayotgan vazifani ishchi qayta navbatga qo'ymaydi
+		self.assertEqual(Job.objects.requeue_stale(running=[job.pk]), (0, 0))
+		self.assertEqual(Job.objects.requeue_stale(), (1, 0))
+		self.assertEqual(Job.objects.get(pk=job.pk).status, Job.Status.QUEUED)
+		# Kechikkan birinchi ishchi qayta olingan vazifaga yozolmaydi
+		self.assertEqual(Job.objects.claim("test-2").attempts, 2)
+		self.assertEqual(late.claimed().update(status=Job.Status.DONE), 0)
+		self.assertEqual(Job.objects.get(pk=job.pk).worker, "test-2")
+		Job.objects.filter(pk=job.pk).update(status=Job.Status.RUNNING, heartbeat_at=stale, attempts=3)
+		self.assertEqual(Job.objects.requeue_stale(), (0, 1))
+		self.assertEqual(Job.objects.get(pk=job.pk).status, Job.Status.FAILED)
+
+	def test_worker_refuses_process_local_cache(self):
+		with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+			with self.assertRaisesMessage(CommandError, "CACHE_BACKEND=locmem"):
+				call_command("run_jobs", "--once", "--processes", "0", stdout=StringIO())
+
+	def test_admin_launch_and_status_page(self):
+		response = self.client.post(reverse("admin:reports_job_add"), {"name": "command.rebuild_daily_summary"})
+		job = Job.objects.get()
+		self.assertRedirects(response, reverse("admin:reports_job_change", args=[job.pk]))
+		self.assertEqual(job.created_by, self.user)
+		status_page = self.client.get(reverse("admin:reports_job_change", args=[job.pk]))
+		self.assertContains(status_page, 'http-equiv="refresh"')
+
+		call_command("run_jobs", "--once", "--processes", "0", stdout=StringIO())
+		status_page = self.client.get(reverse("admin:reports_job_change", args=[job.pk]))
+		self.assertNotContains(status_page, 'http-equiv="refresh"')
+		self.assertContains(status_page, "Bajarildi")
+		self.assertContains(self.client.get(reverse("admin:reports_job_changelist")), "<progress")
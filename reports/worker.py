@@ -0,0 +1,24 @@
+"""
+`run_jobs` jarayonlar puli uchun kirish nuqtalari. Spawn qilingan jarayon
+funksiyalarni modul nomi bo'yicha import qiladi - shu sababli bu modul
+django.setup() dan oldin modellarni import qilmaydi.
+"""
+
+
+def init_worker():
+	import django
+
+	django.setup()
+
+
+def execute(job_id):
+	from django.db import close_old_connections
+
+	from .jobs import execute
+
+	# Pul jarayoni uzoq yashaydi - ulanish so'rovlardagidek vazifalar orasida yangilanadi
+	close_old_connections()
+	try:
+		return execute(job_id)
+	finally:
+		close_old_connections()
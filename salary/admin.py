@@ -1,26 +1,47 @@
+import datetime
+
 from django.contrib import admin
 from django.contrib.auth import get_user_model
-from django.http import JsonResponse
-from django.urls import path
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse
+from django.template.response import TemplateResponse
+from django.db import transaction
+from django.urls import path, reverse
+from django.utils.html import format_html
 from django.forms import TextInput, Textarea
 from django.db import models as dj_models
-from .models import Employee, Salary, SalaryItem
+from config.api import async_admin_view, cached_lookup
+from config.autocomplete import CachedAutocompleteMixin
+from config.changelist import ChangeListQueryMixin
+from config.concurrency import VersionedAdminMixin, VersionedInlineMixin
+from config.export import export_action
+from config.formsets import bulk_save_formset
+from config.pagination import SeekPaginationMixin
+from config.search import NormalizedSearchMixin
+from .exports import salary_items_export
+from .models import Employee, EmployeeBalance, Salary, SalaryItem
+from .statements import STATEMENT_MONTHS, employee_statement
 
 User = get_user_model()
 
 
-class SalaryItemInline(admin.TabularInline):
+class SalaryItemInline(VersionedInlineMixin, CachedAutocompleteMixin, admin.TabularInline):
 	model = SalaryItem
 	extra = 0
 	fields = ('employee', 'earned_amount', 'earned_note', 'paid_amount', 'paid_note')
+	autocomplete_fields = ('employee',)
 	formfield_overrides = {
 		dj_models.DecimalField: {'widget': TextInput(attrs={'class': 'thousand-sep'})},
 	}
 
 
+def statement_link(employee_id):
+	return format_html('<a href="{}">Ko\'chirma</a>', reverse("admin:salary_employee_statement", args=[employee_id]))
+
+
 @admin.register(Employee)
-class EmployeeAdmin(admin.ModelAdmin):
-	list_display = ("full_name", "user", "phone_number", "position", "salary_type", "base_salary", "created_at")
+class EmployeeAdmin(NormalizedSearchMixin, admin.ModelAdmin):
+	list_display = ("full_name", "user", "phone_number", "position", "salary_type", "base_salary", "statement_link", "created_at")
 
 	formfield_overrides = {
 		dj_models.DecimalField: {'widget': TextInput(attrs={'class': 'thousand-sep'})},
@@ -42,6 +63,8 @@ class EmployeeAdmin(admin.ModelAdmin):
 		urls = super().get_urls()
 		custom_urls = [
 			path('get-user-details/<uuid:user_id>/', self.admin_site.admin_view(self.get_user_details), name='employee_get_user_details'),
+			path('previous-salary/<uuid:employee_id>/', async_admin_view(self.previous_salary, "salary.view_salaryitem"), name='employee_previous_salary'),
+			path('statement/<uuid:employee_id>/', self.admin_site.admin_view(self.statement_view), name='salary_employee_statement'),
 		]
 		return custom_urls + urls
 
@@ -52,6 +75,26 @@ class EmployeeAdmin(admin.ModelAdmin):
 			raise ValidationError("Bu foydalanuvchi allaqachon xodim sifatida belgilangan.")
 		super().save_model(request, obj, form, change)
 
+	@admin.display(description="Ko'chirma")
+	def statement_link(self, obj):
+		return statement_link(obj.pk)
+
+	def statement_view(self, request, employee_id):
+		"""Ishchi ko'chirmasi: balans qatori va oxirgi oylar (salary.statements)."""
+		if not self.has_view_permission(request):
+			raise PermissionDenied
+		statement = employee_statement(employee_id)
+		if statement is None:
+			raise Http404("Ishchi topilmadi")
+		context = {
+			**self.admin_site.each_context(request),
+			"opts": self.opts,
+			"title": f"Ko'chirma: {statement.employee.full_name}",
+			"statement": statement,
+			"months_limit": STATEMENT_MONTHS,
+		}
+		return TemplateResponse(request, "admin/salary/employee/statement.html", context)
+
 	def get_user_details(self, request, user_id):
 		try:
 			user = User.objects.get(pk=user_id)
@@ -64,21 +107,70 @@ class EmployeeAdmin(admin.ModelAdmin):
 		except User.DoesNotExist:
 			return JsonResponse({'error': 'User not found'}, status=404)
 
+	async def previous_salary(self, request, employee_id):
+		"""Ishchining `date` (standart - bugun) dan oldingi oxirgi kunlik maoshi."""
+		try:
+			date = datetime.date.fromisoformat(request.GET["date"]) if request.GET.get("date") else datetime.date.today()
+		except ValueError:
+			return JsonResponse({'error': "Sana noto'g'ri"}, status=400)
+
+		async def load():
+			return await (
+				SalaryItem.objects.filter(employee_id=employee_id, salary__date__lt=date)
+				.order_by("-salary__date")
+				.values("earned_amount", "paid_amount", "salary__date")
+				.afirst()
+			)
+
+		item = await cached_lookup(f"api:employee_previous_salary:{employee_id}:{date.isoformat()}", load)
+		if item is None:
+			return JsonResponse({'error': 'Oldingi maosh topilmadi'}, status=404)
+		return JsonResponse({
+			'earned_amount': item["earned_amount"],
+			'paid_amount': item["paid_amount"],
+			'date': item["salary__date"],
+		})
+
 
 @admin.register(SalaryItem)
-class SalaryItemAdmin(admin.ModelAdmin):
+class SalaryItemAdmin(CachedAutocompleteMixin, SeekPaginationMixin, admin.ModelAdmin):
 	list_display = ("salary", "employee", "earned_amount", "earned_note", "paid_amount", "paid_note", "created_at")
+	list_display_related = {
+		"salary": ("date",),
+		"employee": ("full_name", "position"),
+	}
+	actions = (export_action(salary_items_export),)
+	autocomplete_fields = ("employee",)
 
 	formfield_overrides = {
 		dj_models.DecimalField: {'widget': TextInput(attrs={'class': 'thousand-sep'})},
 	}
 
+	def save_model(self, request, obj, form, change):
+		old_salary_id = form.initial.get("salary") if change else None
+		super().save_model(request, obj, form, change)
+		obj.salary.update_totals()
+		if old_salary_id and old_salary_id != obj.salary_id:
+			for salary in Salary.objects.filter(pk=old_salary_id):
+				salary.update_totals()
+
+	def delete_model(self, request, obj):
+		salary = obj.salary
+		super().delete_model(request, obj)
+		salary.update_totals()
+
+	def delete_queryset(self, request, queryset):
+		salary_ids = set(queryset.values_list("salary_id", flat=True))
+		super().delete_queryset(request, queryset)
+		for salary in Salary.objects.filter(pk__in=salary_ids):
+			salary.update_totals()
+
 	class Media:
 		js = ('salary/js/calculate_salary_total.js', 'salary/js/decimal_thousands.js',)
 
 
 @admin.register(Salary)
-class SalaryAdmin(admin.ModelAdmin):
+class SalaryAdmin(VersionedAdminMixin, admin.ModelAdmin):
 	list_display = ("date", "created_by", "total_earned_salary", "total_paid_salary", "created_at")
 	inlines = [SalaryItemInline]
 	exclude = ("created_by",)
@@ -88,27 +180,16 @@ class SalaryAdmin(admin.ModelAdmin):
 	}
 
 	def save_formset(self, request, form, formset, change):
-		instances = formset.save(commit=False)
-		deleted_instances = formset.deleted_objects
-		
-		# O'chirilgan itemlarni saqlash
-		for obj in deleted_instances:
-			obj.delete()
-		
-		# Yangi va o'zgartirilgan itemlarni saqlash
-		for instance in instances:
-			if hasattr(instance, 'salary') and instance.salary:
-				instance.save()
-		
-		# Saqlangandan keyin total larni qayta hisoblash
-		if form.instance and hasattr(form.instance, 'salary_items'):
-			total_earned = sum(item.earned_amount or 0 for item in form.instance.salary_items.all())
-			total_paid = sum(item.paid_amount or 0 for item in form.instance.salary_items.all())
-			form.instance.total_earned_salary = total_earned
-			form.instance.total_paid_salary = total_paid
-			form.instance.save(update_fields=['total_earned_salary', 'total_paid_salary'])
-		
-		formset.save_m2m()
+		"""
+		Inline qatorlarni paket bilan yozadi (config.formsets.bulk_save_formset).
+		Jamilar oxirida bitta aggregate() bilan bir marta hisoblanadi.
+		"""
+		with transaction.atomic():
+			# Ishchilar balansi formset_saved signalida (salary.signals)
+			bulk_save_formset(formset)
+
+			# Saqlangandan keyin total larni qayta hisoblash
+			form.instance.update_totals()
 
 	def save_model(self, request, obj, form, change):
 		if not obj.pk:  # Only set created_by on creation
@@ -116,4 +197,29 @@ class SalaryAdmin(admin.ModelAdmin):
 		super().save_model(request, obj, form, change)
 
 	class Media:
-		js = ('salary/js/calculate_salary_total.js', 'salary/js/decimal_thousands.js',)
+		js = ('salary/js/calculate_salary_total.js', 'salary/js/decimal_thousands.js', 'salary/js/live_lookups.js',)
+
+
+@admin.register(EmployeeBalance)
+class EmployeeBalanceAdmin(NormalizedSearchMixin, ChangeListQueryMixin, admin.ModelAdmin):
+	"""Faqat o'qish uchun: qatorlar SalaryItem o'zgarganda farq bilan yangilanadi."""
+
+	list_display = ("employee", "earned_total", "paid_total", "balance", "days_count", "statement_link", "updated_at")
+	list_display_related = {"employee": ("full_name", "position")}
+	search_fields = ("employee__search_text",)
+	search_text_field = "employee__search_text"
+	# salary_balance_idx
+	ordering = ("-balance",)
+
+	def has_add_permission(self, request):
+		return False
+
+	def has_change_permission(self, request, obj=None):
+		return False
+
+	def has_delete_permission(self, request, obj=None):
+		return False
+
+	@admin.display(description="Ko'chirma")
+	def statement_link(self, obj):
+		return statement_link(obj.employee_id)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SalaryConfig(AppConfig):
     name = 'salary'
     verbose_name = '2. Ish haqi'
+
+    def ready(self):
+        from . import signals  # noqa: F401
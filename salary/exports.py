@@ -0,0 +1,22 @@
+from config.export import ExportSpec
+
+from .models import SalaryItem
+
+salary_items_export = ExportSpec(
+	"salary_items",
+	SalaryItem,
+	columns=[
+		("ID", "id"),
+		("Sana", "salary__date"),
+		("Ishchi", "employee__full_name"),
+		("Lavozimi", "employee__position"),
+		("Telefon raqami", "employee__phone_number"),
+		("Maosh turi", "employee__salary_type"),
+		("Ishlab topilgan summa", "earned_amount"),
+		("Ishlab topilgan summa uchun izoh", "earned_note"),
+		("To'langan summa", "paid_amount"),
+		("To'langan summa uchun izoh", "paid_note"),
+		("Yaratilgan sana", "created_at"),
+	],
+	date_field="salary__date",
+)
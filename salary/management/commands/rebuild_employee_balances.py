@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from salary.models import EmployeeBalance
+
+FIELDS = ("earned_total", "paid_total", "days_count")
+
+
+class Command(BaseCommand):
+	help = "EmployeeBalance jadvalini SalaryItem lardan noldan qayta quradi va farqlarni ko'rsatadi."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--check", action="store_true", help="Faqat farqlarni ko'rsatish, yozmaslik")
+		parser.add_argument("--chunk-size", type=int, default=500, help="Bir paketdagi ishchilar soni")
+
+	def handle(self, *args, **options):
+		actual = {row["employee_id"]: row for row in EmployeeBalance.objects.compute()}
+		stored = {row["employee_id"]: row for row in EmployeeBalance.objects.values("employee_id", "balance", *FIELDS)}
+
+		drift = 0
+		employee_ids = sorted(actual.keys() | stored.keys(), key=str)
+		for employee_id in employee_ids:
+			saved = stored.get(employee_id)
+			real = actual.get(employee_id)
+			if saved and real and all(saved[field] == real[field] for field in FIELDS) and saved["balance"] == real["earned_total"] - real["paid_total"]:
+				continue
+			drift += 1
+			self.stdout.write(
+				f"{employee_id}: saqlangan={saved['balance'] if saved else 0} "
+				f"haqiqiy={real['earned_total'] - real['paid_total'] if real else 0}"
+			)
+
+		if options["check"]:
+			style = self.style.WARNING if drift else self.style.SUCCESS
+			self.stdout.write(style(f"{drift} ta ishchi balansi mos emas."))
+			return
+
+		chunk_size = options["chunk_size"]
+		for start in range(0, len(employee_ids), chunk_size):
+			with transaction.atomic():
+				EmployeeBalance.objects.refresh_employees(employee_ids[start:start + chunk_size])
+
+		self.stdout.write(self.style.SUCCESS(f"{len(employee_ids)} ta ishchi qayta hisoblandi, {drift} ta farq tuzatildi."))
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='salary',
+            options={'ordering': ['-date', '-created_at'], 'verbose_name': 'Ish haqi ', 'verbose_name_plural': 'Ish haqi '},
+        ),
+        migrations.AlterModelOptions(
+            name='salaryitem',
+            options={'ordering': ['-salary__date', 'created_at'], 'verbose_name': 'Ishch ish haqi ', 'verbose_name_plural': 'Ishchilar ish haqi '},
+        ),
+        migrations.AddIndex(
+            model_name='salaryitem',
+            index=models.Index(fields=['-created_at', '-id'], name='salary_item_created_idx'),
+        ),
+    ]
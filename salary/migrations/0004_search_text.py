@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+from config.search import add_search_text_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0003_item_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='search_text',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=500, verbose_name='Qidiruv matni'),
+        ),
+        *add_search_text_index('salary.Employee', 'salary_employee_search_trgm', ('full_name', 'position'), ('phone_number',)),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:54
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0005_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeBalance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('earned_total', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Jami topilgan')),
+                ('paid_total', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name="Jami to'langan")),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Qoldiq')),
+                ('days_count', models.IntegerField(default=0, verbose_name='Kunlar soni')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan sana')),
+                ('employee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='balance', to='salary.employee', verbose_name='Ishchi')),
+            ],
+            options={
+                'verbose_name': 'Ishchi balansi ',
+                'verbose_name_plural': 'Ishchilar balansi ',
+                'ordering': ['-balance'],
+                'indexes': [models.Index(fields=['-balance'], name='salary_balance_idx')],
+            },
+        ),
+    ]
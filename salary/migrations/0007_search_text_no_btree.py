@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0006_employee_balance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='employee',
+            name='search_text',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500, verbose_name='Qidiruv matni'),
+        ),
+    ]
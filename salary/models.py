@@ -1,9 +1,17 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 import uuid
 
+from config.concurrency import VersionedModel, lock_version
+from config.deltas import SavedLineMixin
+from config.mastercache import MasterForeignKey
+from config.search import SearchTextModel
+from config.signals import totals_changed
 
-class Employee(models.Model):
+
+class Employee(SearchTextModel):
 	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 	user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="employee", verbose_name="Foydalanuvchi")
 	full_name = models.CharField(max_length=255, verbose_name="Ismi va Familiyasi")
@@ -18,11 +26,43 @@ class Employee(models.Model):
 		verbose_name_plural = "Ishchilar "
 		ordering = ["created_at"]
 
+	search_text_fields = ("full_name", "position")
+	search_digit_fields = ("phone_number",)
+
 	def __str__(self):
 		return f"{self.full_name} - {self.position}"
 
 
-class Salary(models.Model):
+AMOUNT_FIELD = models.DecimalField(max_digits=20, decimal_places=2)
+
+
+def amount_sum(field_name):
+	return Coalesce(models.Sum(field_name), models.Value(0), output_field=AMOUNT_FIELD)
+
+
+class SalaryQuerySet(models.QuerySet):
+	def rebuild_totals(self):
+		"""Tanlangan Salary lar jamilarini bitta UPDATE da SalaryItem lardan qayta hisoblaydi."""
+		items = SalaryItem.objects.filter(salary=models.OuterRef("pk")).order_by().values("salary")
+		amount_field = models.DecimalField(max_digits=20, decimal_places=2)
+
+		def items_sum(field_name):
+			return Coalesce(
+				models.Subquery(items.annotate(total=models.Sum(field_name)).values("total"), output_field=amount_field),
+				models.Value(0),
+				output_field=amount_field,
+			)
+
+		pks = list(self.values_list("pk", flat=True))
+		updated = Salary.objects.filter(pk__in=pks).update(
+			total_earned_salary=items_sum("earned_amount"),
+			total_paid_salary=items_sum("paid_amount"),
+		)
+		totals_changed.send(sender=Salary, pks=pks)
+		return updated
+
+
+class Salary(VersionedModel):
 	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 	created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Kim tomonidan yaratilgan")
 	date = models.DateField(unique=True, verbose_name="Sana")
@@ -30,6 +70,8 @@ class Salary(models.Model):
 	total_paid_salary = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Kunlik to'langan maosh")
 	created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
 
+	objects = SalaryQuerySet.as_manager()
+
 	class Meta:
 		verbose_name = "Ish haqi "
 		verbose_name_plural = "Ish haqi "
@@ -39,27 +81,34 @@ class Salary(models.Model):
 	def __str__(self):
 		return f"Ish haqi - {self.date}"
 
-	def save(self, *args, **kwargs):
-		super().save(*args, **kwargs)
-
-		total_earned = self.salary_items.aggregate(
-			total=models.Sum('earned_amount')
-		)['total'] or 0
-
-		total_paid = self.salary_items.aggregate(
-			total=models.Sum('paid_amount')
-		)['total'] or 0
+	totals_fields = ("total_earned_salary", "total_paid_salary")
 
+	def update_totals(self):
+		"""Ikkala jamini qulflangan sarlavha ostida bitta aggregate() so'rovida qayta hisoblaydi."""
+		# Tashqi tranzaksiya (admin) ichida savepoint kerak emas
+		with transaction.atomic(savepoint=False):
+			lock_version(Salary, self.pk)
+			totals = self.salary_items.aggregate(
+				earned=models.Sum('earned_amount'),
+				paid=models.Sum('paid_amount'),
+			)
+			total_earned = totals['earned'] or 0
+			total_paid = totals['paid'] or 0
+			Salary.objects.filter(pk=self.pk).update(
+				total_earned_salary=total_earned,
+				total_paid_salary=total_paid,
+				version=self.version_increment(),
+			)
 		if self.total_earned_salary != total_earned or self.total_paid_salary != total_paid:
 			self.total_earned_salary = total_earned
 			self.total_paid_salary = total_paid
-			super().save(update_fields=['total_earned_salary', 'total_paid_salary'])
+			totals_changed.send(sender=Salary, pks=[self.pk])
 
 
-class SalaryItem(models.Model):
+class SalaryItem(SavedLineMixin, models.Model):
 	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 	salary = models.ForeignKey("Salary", on_delete=models.CASCADE, related_name="salary_items", verbose_name="Kunlik maosh")
-	employee = models.ForeignKey("Employee", on_delete=models.CASCADE, related_name="salary_items", verbose_name="Ishchi")
+	employee = MasterForeignKey("Employee", on_delete=models.CASCADE, related_name="salary_items", verbose_name="Ishchi")
 	earned_amount = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True, verbose_name="Ishlab topilgan summa")
 	earned_note = models.CharField(max_length=255, blank=True, null=True, verbose_name="Ishlab topilgan summa uchun izoh")
 	paid_amount = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True, verbose_name="To'langan summa")
@@ -71,12 +120,152 @@ class SalaryItem(models.Model):
 		verbose_name_plural = "Ishchilar ish haqi "
 		ordering = ["-salary__date", "created_at"]
 		unique_together = ("salary", "employee")
+		indexes = [
+			# Changelist keyset sahifalashi: ORDER BY created_at DESC, id DESC
+			models.Index(fields=["-created_at", "-id"], name="salary_item_created_idx"),
+		]
 
 	def __str__(self):
 		return f"{self.employee} - {self.salary.date}"
 
-	def save(self, *args, **kwargs):
-		super().save(*args, **kwargs)
+	# Salary jamilari har bir qatorda emas, butun paket saqlangandan keyin
+	# Salary.update_totals() orqali bir marta hisoblanadi (SalaryAdmin.save_formset).
+
+	# Ishchi balansi (EmployeeBalance) esa farq bilan yangilanadi: bazadagi
+	# holat o'qilganda eslab qolinadi va saqlashda yangisi bilan solishtiriladi.
+	saved_line_fields = ("employee_id", "earned_amount", "paid_amount")
+
+	def make_line(self, employee_id, earned, paid):
+		"""(employee_id, earned, paid) - bo'sh summalar 0 sifatida."""
+		return employee_id, earned or 0, paid or 0
+
+	@classmethod
+	def balance_deltas(cls, created=(), changed=(), deleted_lines=()):
+		"""
+		{employee_id: [earned, paid, kunlar]} - EmployeeBalance ga qo'llanadigan
+		farqlar. O'chirilgan qatorlar post_delete signalida hisoblanadi
+		(queryset.delete() ham uni yuboradi), shuning uchun bu yerga faqat ularning
+		`deleted_lines` (saved line) lari beriladi.
+		"""
+		deltas = {}
 
-		if self.salary:
-			self.salary.save()
+		def add(line, sign):
+			if line is None:
+				return
+			employee_id, earned, paid = line
+			delta = deltas.setdefault(employee_id, [0, 0, 0])
+			delta[0] += sign * earned
+			delta[1] += sign * paid
+			delta[2] += sign
+
+		for item in changed:
+			add(item._get_saved_line(), -1)
+		for line in deleted_lines:
+			add(line, -1)
+		for item in (*created, *changed):
+			add(item.current_line(), 1)
+			item._remember_saved_line()
+		return deltas
+
+
+class EmployeeBalanceQuerySet(models.QuerySet):
+	def compute(self, employee_ids=None):
+		"""Ishchilar balansini SalaryItem lardan bitta GROUP BY so'rovida hisoblaydi."""
+		items = SalaryItem.objects.all()
+		if employee_ids is not None:
+			items = items.filter(employee_id__in=employee_ids)
+		return (
+			items.order_by()
+			.values("employee_id")
+			.annotate(
+				earned_total=amount_sum("earned_amount"),
+				paid_total=amount_sum("paid_amount"),
+				days_count=models.Count("id"),
+			)
+		)
+
+	def apply_deltas(self, deltas, create=True):
+		"""
+		Farqlarni F() bilan qo'shadi (`ustun = ustun + farq`) - tarix qayta
+		o'qilmaydi, parallel yozuvlar bir-birini bosib ketmaydi. Barcha ishchilar
+		bitta UPDATE da: har bir ustun uchun ishchi bo'yicha CASE. `create=False` -
+		o'chirishda: ishchining o'zi ham o'chirilayotgan bo'lishi mumkin, yo'q
+		qator yaratilmaydi.
+		"""
+		deltas = {
+			employee_id: (earned, paid, earned - paid, days)
+			for employee_id, (earned, paid, days) in deltas.items()
+			if employee_id and any((earned, paid, days))
+		}
+		if not deltas:
+			return
+
+		def shifted(column, index):
+			return models.Case(
+				*[
+					models.When(employee_id=employee_id, then=models.F(column) + delta[index])
+					for employee_id, delta in deltas.items()
+				],
+				default=models.F(column),
+				output_field=self.model._meta.get_field(column),
+			)
+
+		with transaction.atomic(using=self.db, savepoint=False):
+			if create:
+				self.bulk_create([EmployeeBalance(employee_id=employee_id) for employee_id in deltas], ignore_conflicts=True)
+			self.filter(employee_id__in=deltas).update(
+				earned_total=shifted("earned_total", 0),
+				paid_total=shifted("paid_total", 1),
+				balance=shifted("balance", 2),
+				days_count=shifted("days_count", 3),
+				updated_at=timezone.now(),
+			)
+
+	def refresh_employees(self, employee_ids):
+		"""Berilgan ishchilar qatorlarini noldan qayta yig'adi: bitta o'qish va bitta upsert."""
+		employee_ids = {employee_id for employee_id in employee_ids if employee_id}
+		if not employee_ids:
+			return
+		balances = [
+			EmployeeBalance(balance=row["earned_total"] - row["paid_total"], **row)
+			for row in self.compute(employee_ids)
+		]
+		present = {balance.employee_id for balance in balances}
+		self.filter(employee_id__in=employee_ids - present).delete()
+		if balances:
+			self.bulk_create(
+				balances,
+				update_conflicts=True,
+				unique_fields=["employee"],
+				update_fields=["earned_total", "paid_total", "balance", "days_count", "updated_at"],
+			)
+
+
+class EmployeeBalance(models.Model):
+	"""
+	Ishchining barcha kunlar bo'yicha jami topgani, olgani va qoldig'i
+	(topilgan - to'langan). SalaryItem o'zgarganda faqat farq qo'shiladi
+	(salary.signals, SalaryAdmin.save_formset); ko'chirma sahifasi shu
+	qatorni o'qiydi, ishchi tarixini emas.
+	"""
+
+	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+	employee = models.OneToOneField(Employee, on_delete=models.CASCADE, related_name="balance", verbose_name="Ishchi")
+	earned_total = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Jami topilgan")
+	paid_total = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Jami to'langan")
+	balance = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Qoldiq")
+	days_count = models.IntegerField(default=0, verbose_name="Kunlar soni")
+	updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan sana")
+
+	objects = EmployeeBalanceQuerySet.as_manager()
+
+	class Meta:
+		verbose_name = "Ishchi balansi "
+		verbose_name_plural = "Ishchilar balansi "
+		ordering = ["-balance"]
+		indexes = [
+			models.Index(fields=["-balance"], name="salary_balance_idx"),
+		]
+
+	def __str__(self):
+		return f"{self.employee} - {self.balance}"
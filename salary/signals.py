@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from config.signals import formset_saved
+
+from .models import EmployeeBalance, SalaryItem
+
+
+def remember_saved_line(sender, instance, raw=False, **kwargs):
+	"""Qator .only() bilan o'qilgan bo'lsa, eski holat saqlashdan oldin olinadi."""
+	if not raw:
+		instance._get_saved_line()
+
+
+def apply_on_item_save(sender, instance, created, raw=False, **kwargs):
+	if raw:
+		return
+	if created:
+		deltas = SalaryItem.balance_deltas(created=[instance])
+	else:
+		deltas = SalaryItem.balance_deltas(changed=[instance])
+	EmployeeBalance.objects.apply_deltas(deltas)
+
+
+def apply_on_formset_saved(sender, instance, created, changed, **kwargs):
+	# Paketli saqlash (config.formsets); o'chirilganlar post_delete signalida hisoblanadi
+	EmployeeBalance.objects.apply_deltas(SalaryItem.balance_deltas(created, changed))
+
+
+def apply_on_item_delete(sender, instance, **kwargs):
+	# Qator bazada endi yo'q - eslab qolingan holat, bo'lmasa xotiradagi qiymatlar
+	line = instance.__dict__.get("_saved_line") or instance.current_line()
+	EmployeeBalance.objects.apply_deltas(SalaryItem.balance_deltas(deleted_lines=[line]), create=False)
+
+
+pre_save.connect(remember_saved_line, sender=SalaryItem)
+post_save.connect(apply_on_item_save, sender=SalaryItem)
+post_delete.connect(apply_on_item_delete, sender=SalaryItem)
+formset_saved.connect(apply_on_formset_saved, sender=SalaryItem)
@@ -0,0 +1,37 @@
+"""
+Ishchi ko'chirmasi: joriy qoldiq va oxirgi oylar bo'yicha harakat.
+
+Ishchi tarixi (SalaryItem) o'qilmaydi: qoldiq EmployeeBalance qatoridan,
+oylar reports.MonthlyRollup dan (ishchi + oy indeksi bo'yicha ko'pi bilan
+STATEMENT_MONTHS qator) olinadi. Har oy oxiridagi qoldiq joriy qoldiqdan
+orqaga qarab hisoblanadi.
+"""
+from collections import namedtuple
+
+from config import mastercache
+from reports.models import MonthlyRollup
+
+from .models import Employee, EmployeeBalance
+
+STATEMENT_MONTHS = 12
+
+Statement = namedtuple("Statement", "employee balance months opening_balance")
+
+
+def employee_statement(employee_id, months=STATEMENT_MONTHS):
+	"""Statement yoki ishchi topilmasa None. `months` - eskidan yangiga."""
+	employee = mastercache.get(Employee, employee_id)
+	if employee is None:
+		return None
+	balance = EmployeeBalance.objects.filter(employee_id=employee.pk).first() or EmployeeBalance(employee=employee)
+	rows = list(
+		MonthlyRollup.objects.filter(employee_id=employee.pk)
+		.order_by("-month")
+		.values("month", "amount", "paid_amount", "items_count")[:months]
+	)
+	closing = balance.balance
+	for row in rows:
+		row["change"] = row["amount"] - row["paid_amount"]
+		row["closing_balance"] = closing
+		closing -= row["change"]
+	return Statement(employee, balance, rows[::-1], closing)
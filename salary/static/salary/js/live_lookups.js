@@ -0,0 +1,42 @@
+// Kunlik maosh formasida ishchi tanlanganda uning oldingi kundagi maoshini ko'rsatadi.
+document.addEventListener('DOMContentLoaded', function () {
+    // autocomplete_fields (select2) tanlovni faqat jQuery hodisasi bilan bildiradi -
+    // quyidagi oddiy 'change' tinglovchilariga yetkazamiz
+    if (window.django && django.jQuery) {
+        django.jQuery(document).on('select2:select select2:clear', 'select', function () {
+            this.dispatchEvent(new Event('change', { bubbles: true }));
+        });
+    }
+
+    const dateInput = document.querySelector('#id_date');
+
+    function formatNumber(value) {
+        const number = parseFloat(value) || 0;
+        return number.toLocaleString('ru-RU', { maximumFractionDigits: 2 });
+    }
+
+    function onEmployeeChange(select) {
+        const row = select.closest('tr');
+        if (!select.value || !row) return;
+
+        const params = new URLSearchParams();
+        if (dateInput && /^\d{4}-\d{2}-\d{2}$/.test(dateInput.value)) {
+            params.set('date', dateInput.value);
+        }
+        fetch(`/admin/salary/employee/previous-salary/${select.value}/?${params}`, { credentials: 'same-origin' })
+            .then(response => response.ok ? response.json() : null)
+            .then(data => {
+                if (!data) return;
+                const earned = row.querySelector('input[name$="-earned_amount"]');
+                const paid = row.querySelector('input[name$="-paid_amount"]');
+                if (earned) earned.placeholder = formatNumber(data.earned_amount);
+                if (paid) paid.placeholder = formatNumber(data.paid_amount);
+                select.title = `${data.date}: ${formatNumber(data.earned_amount)} / ${formatNumber(data.paid_amount)}`;
+            })
+            .catch(() => {});
+    }
+
+    document.addEventListener('change', function (event) {
+        if (event.target.matches('select[name$="-employee"]')) onEmployeeChange(event.target);
+    });
+});
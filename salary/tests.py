@@ -1,3 +1,207 @@
+import datetime
+from decimal import Decimal
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from salary.models import Employee, EmployeeBalance, Salary, SalaryItem
+
+User = get_user_model()
+
+# Sarlavha jamilarini brauzerda JS to'ldiradi, server baribir qayta hisoblaydi
+HEADER_TOTALS = {"total_earned_salary": "0", "total_paid_salary": "0"}
+
+
+def create_employees(count, start=0):
+	employees = []
+	for index in range(start, start + count):
+		user = User.objects.create_user(f"ishchi{index}", password="x")
+		employees.append(Employee.objects.create(user=user, full_name=f"Ishchi {index}", position="Usta"))
+	return employees
+
+
+def salary_formset_data(rows, initial_rows=()):
+	data = {
+		"salary_items-TOTAL_FORMS": str(len(initial_rows) + len(rows)),
+		"salary_items-INITIAL_FORMS": str(len(initial_rows)),
+		"salary_items-MIN_NUM_FORMS": "0",
+		"salary_items-MAX_NUM_FORMS": "1000",
+	}
+	for index, row in enumerate([*initial_rows, *rows]):
+		for key, value in row.items():
+			data[f"salary_items-{index}-{key}"] = value
+	return data
+
+
+class SalaryPostingTests(TestCase):
+	def setUp(self):
+		self.admin = User.objects.create_superuser("admin", password="admin")
+		self.client.force_login(self.admin)
+
+	def post_new_salary(self, employees, day):
+		rows = [
+			{"employee": str(employee.pk), "earned_amount": "100", "paid_amount": "40"}
+			for employee in employees
+		]
+		data = {"date": datetime.date(2026, 1, day).isoformat(), **HEADER_TOTALS, **salary_formset_data(rows)}
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.post(reverse("admin:salary_salary_add"), data)
+		self.assertEqual(response.status_code, 302)
+		# Formadagi Employee tanlovini tekshirish har qatorda bo'ladi, yozish esa paketda
+		# (ishchilar balansi ham - bitta UPDATE)
+		return len([
+			query for query in context.captured_queries
+			if '"salary_salary' in query["sql"] or '"salary_employeebalance"' in query["sql"]
+		])
+
+	def test_posting_query_count_is_constant(self):
+		small = self.post_new_salary(create_employees(2), day=1)
+		large = self.post_new_salary(create_employees(40, start=2), day=2)
+		self.assertEqual(small, large)
+
+		salary = Salary.objects.get(date=datetime.date(2026, 1, 2))
+		self.assertEqual(salary.salary_items.count(), 40)
+		self.assertEqual(salary.total_earned_salary, Decimal("4000"))
+		self.assertEqual(salary.total_paid_salary, Decimal("1600"))
+
+	def test_editing_and_deleting_rows_updates_totals(self):
+		employees = create_employees(3)
+		self.post_new_salary(employees, day=1)
+		salary = Salary.objects.get()
+		items = list(salary.salary_items.order_by("employee__full_name"))
+		initial_rows = [
+			{"id": str(items[0].pk), "salary": str(salary.pk), "employee": str(items[0].employee_id), "earned_amount": "250", "paid_amount": "40"},
+			{"id": str(items[1].pk), "salary": str(salary.pk), "employee": str(items[1].employee_id), "earned_amount": "100", "paid_amount": "40", "DELETE": "on"},
+			{"id": str(items[2].pk), "salary": str(salary.pk), "employee": str(items[2].employee_id), "earned_amount": "100", "paid_amount": "40"},
+		]
+		data = {"date": "2026-01-01", **HEADER_TOTALS, **salary_formset_data([], initial_rows)}
+		response = self.client.post(reverse("admin:salary_salary_change", args=[salary.pk]), data)
+		self.assertEqual(response.status_code, 302)
+
+		salary.refresh_from_db()
+		self.assertEqual(salary.salary_items.count(), 2)
+		self.assertEqual(salary.total_earned_salary, Decimal("350"))
+		self.assertEqual(salary.total_paid_salary, Decimal("80"))
+
+	def test_update_totals_uses_one_aggregate(self):
+		salary = Salary.objects.create(date=datetime.date(2026, 1, 1))
+		for employee in create_employees(5):
+			SalaryItem.objects.create(salary=salary, employee=employee, earned_amount=Decimal("10"), paid_amount=Decimal("5"))
+		with CaptureQueriesContext(connection) as context:
+			salary.update_totals()
+		queries = [query["sql"] for query in context.captured_queries]
+		# bitta aggregate + bitta UPDATE
+		self.assertEqual(len([sql for sql in queries if '"salary_salaryitem"' in sql]), 1)
+		self.assertEqual(len([sql for sql in queries if sql.startswith('UPDATE "salary_salary"')]), 1)
+		self.assertEqual(salary.total_earned_salary, Decimal("50"))
+		self.assertEqual(salary.total_paid_salary, Decimal("25"))
+
+
+class PreviousSalaryLookupTests(TestCase):
+	def test_previous_day_salary(self):
+		self.client.force_login(User.objects.create_superuser("admin", password="admin"))
+		(employee,) = create_employees(1)
+		for day, amount in ((1, "100"), (2, "120"), (3, "130")):
+			salary = Salary.objects.create(date=datetime.date(2026, 1, day))
+			SalaryItem.objects.create(salary=salary, employee=employee, earned_amount=Decimal(amount), paid_amount=Decimal("50"))
+
+		url = reverse("admin:employee_previous_salary", args=[employee.pk])
+		data = self.client.get(url, {"date": "2026-01-03"}).json()
+		self.assertEqual(data, {"earned_amount": "120.00", "paid_amount": "50.00", "date": "2026-01-02"})
+		self.assertEqual(self.client.get(url, {"date": "2026-01-01"}).status_code, 404)
+		self.assertEqual(self.client.get(url, {"date": "kecha"}).status_code, 400)
+
+
+class EmployeeBalanceTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client.force_login(User.objects.create_superuser("admin", password="admin"))
+		self.employees = create_employees(2)
+
+	def assertBalancesMatchHistory(self):
+		actual = {row["employee_id"]: row for row in EmployeeBalance.objects.compute()}
+		for employee in self.employees:
+			row = actual.get(employee.pk, {"earned_total": 0, "paid_total": 0, "days_count": 0})
+			stored = EmployeeBalance.objects.filter(employee=employee).first() or EmployeeBalance()
+			self.assertEqual(
+				(stored.earned_total, stored.paid_total, stored.balance, stored.days_count),
+				(row["earned_total"], row["paid_total"], row["earned_total"] - row["paid_total"], row["days_count"]),
+			)
+
+	def add_item(self, day, employee, earned, paid):
+		salary, _ = Salary.objects.get_or_create(date=day)
+		return SalaryItem.objects.create(salary=salary, employee=employee, earned_amount=Decimal(earned), paid_amount=Decimal(paid))
+
+	def test_balance_follows_formsets_and_items(self):
+		rows = [{"employee": str(employee.pk), "earned_amount": "100", "paid_amount": "30"} for employee in self.employees]
+		data = {"date": "2026-01-01", **HEADER_TOTALS, **salary_formset_data(rows)}
+		self.assertEqual(self.client.post(reverse("admin:salary_salary_add"), data).status_code, 302)
+		self.assertBalancesMatchHistory()
+		self.assertEqual(EmployeeBalance.objects.get(employee=self.employees[0]).balance, Decimal("70"))
+
+		salary = Salary.objects.get()
+		items = list(salary.salary_items.order_by("employee__full_name"))
+		initial_rows = [
+			{"id": str(items[0].pk), "salary": str(salary.pk), "employee": str(items[0].employee_id), "earned_amount": "250", "paid_amount": "30"},
+			{"id": str(items[1].pk), "salary": str(salary.pk), "employee": str(items[1].employee_id), "earned_amount": "100", "paid_amount": "30", "DELETE": "on"},
+		]
+		data = {"date": "2026-01-01", **HEADER_TOTALS, **salary_formset_data([], initial_rows)}
+		self.assertEqual(self.client.post(reverse("admin:salary_salary_change", args=[salary.pk]), data).status_code, 302)
+		self.assertBalancesMatchHistory()
+
+		item = self.add_item(datetime.date(2026, 1, 2), self.employees[1], "80", "100")
+		item.employee = self.employees[0]
+		item.save()
+		self.assertBalancesMatchHistory()
+		SalaryItem.objects.get(pk=item.pk).delete()
+		self.assertBalancesMatchHistory()
+
+		# Kun va ishchi o'chirilganda qatorlar kaskad bilan ketadi
+		self.add_item(datetime.date(2026, 1, 3), self.employees[1], "40", "0")
+		Salary.objects.get(date=datetime.date(2026, 1, 1)).delete()
+		self.assertBalancesMatchHistory()
+		self.employees[1].delete()
+		self.assertFalse(EmployeeBalance.objects.filter(employee_id=self.employees[1].pk).exists())
+
+	def test_statement_reads_bounded_rows(self):
+		employee = self.employees[0]
+		url = reverse("admin:salary_employee_statement", args=[employee.pk])
+		self.add_item(datetime.date(2025, 1, 5), employee, "100", "0")
+		self.client.get(url)
+		with CaptureQueriesContext(connection) as context:
+			self.client.get(url)
+		few = len(context.captured_queries)
+
+		for month in range(2, 13):
+			self.add_item(datetime.date(2025, month, 5), employee, "100", "50")
+		self.add_item(datetime.date(2026, 1, 5), employee, "100", "300")
+		self.add_item(datetime.date(2026, 1, 6), employee, "20", "0")
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.get(url)
+		self.assertEqual(len(context.captured_queries), few)
+
+		statement = response.context["statement"]
+		self.assertEqual(len(statement.months), 12)
+		self.assertEqual(statement.months[0]["month"], datetime.date(2025, 2, 1))
+		# 2025-01 ko'chirmadan tashqarida - boshlang'ich qoldiqqa kiradi
+		self.assertEqual(statement.opening_balance, Decimal("100"))
+		self.assertEqual(statement.months[-1]["change"], Decimal("-180"))
+		self.assertEqual(statement.months[-1]["closing_balance"], statement.balance.balance)
+		self.assertEqual(statement.balance.balance, Decimal("470"))
+		self.assertEqual(self.client.get(reverse("admin:salary_employee_statement", args=[self.employees[1].pk])).status_code, 200)
 
-# Create your tests here.
+	def test_rebuild_command(self):
+		self.add_item(datetime.date(2026, 1, 1), self.employees[0], "100", "40")
+		EmployeeBalance.objects.update(balance=0)
+		out = StringIO()
+		call_command("rebuild_employee_balances", "--check", stdout=out)
+		self.assertIn("1 ta ishchi balansi mos emas", out.getvalue())
+		call_command("rebuild_employee_balances", stdout=StringIO())
+		self.assertBalancesMatchHistory()
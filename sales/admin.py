@@ -1,25 +1,46 @@
 from django.contrib import admin
 from django.db import models
+from django.http import JsonResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
 from django.forms import TextInput, Textarea
 from django.db import models as dj_models
-from .models import Buyer, Product, Sale, SaleItem
+from config.api import LastPriceLookupMixin, async_admin_view, cached_lookup
+from config.autocomplete import CachedAutocompleteMixin
+from config.changelist import ChangeListQueryMixin, QueryChangeList
+from config.concurrency import VersionedAdminMixin, VersionedInlineMixin
+from config.export import export_action
+from config.formsets import bulk_save_formset
+from config.pagination import SeekPaginationMixin
+from config.search import NormalizedSearchMixin
+from reports.admin import message_job, price_history_link
+from reports.jobs import submit
+from .exports import sale_items_export
+from .models import AGING_FIELDS, ArchivedSaleItem, Buyer, BuyerBalance, Product, Sale, SaleItem, OpenSaleItem, UnpaidSaleItem
 
 
-class SaleItemInline(admin.TabularInline):
+class SaleItemInline(VersionedInlineMixin, CachedAutocompleteMixin, admin.TabularInline):
 	model = SaleItem
 	extra = 0
 	fields = ("product", "quantity", "price", "total", "buyer", "payment_status", "buyers_paid", "order_status")
+	# Mahsulot va xaridor ro'yxati to'liq yuklanmaydi - search_text bo'yicha qidiriladi,
+	# tanlangan qiymatlar esa barcha qatorlar uchun bitta so'rovda (CachedAutocompleteMixin)
+	autocomplete_fields = ("product", "buyer")
 
 	formfield_overrides = {
 		dj_models.DecimalField: {'widget': TextInput(attrs={'class': 'thousand-sep'})},
 	}
 
 @admin.register(Sale)
-class SaleAdmin(admin.ModelAdmin):
+class SaleAdmin(VersionedAdminMixin, ChangeListQueryMixin, admin.ModelAdmin):
       list_display = ("date", "created_by", "total_price", "description", "created_at")
+      list_display_related = {"created_by": ("first_name", "last_name", "username")}
       list_filter = ()
       search_fields = ()
       inlines = (SaleItemInline,)
+      actions = ("recalculate_total_price",)
+      readonly_fields = ("archived_items_link",)
 
       formfield_overrides = {
 		dj_models.DecimalField: {'widget': TextInput(attrs={'class': 'thousand-sep'})},
@@ -27,7 +48,7 @@ class SaleAdmin(admin.ModelAdmin):
 	  }
 
       class Media:
-            js = ('sales/js/calculate_total.js', 'sales/js/payment_status_toggle.js', 'sales/js/decimal_thousands.js',)
+            js = ('sales/js/calculate_total.js', 'sales/js/payment_status_toggle.js', 'sales/js/decimal_thousands.js', 'sales/js/live_lookups.js',)
 
       # ADD form ochilganda initial qiymat
       def get_changeform_initial_data(self, request):
@@ -40,40 +61,29 @@ class SaleAdmin(admin.ModelAdmin):
           super().save_model(request, obj, form, change)
 
       def save_formset(self, request, form, formset, change):
-          instances = formset.save(commit=False)
-          deleted_instances = formset.deleted_objects
-
-          # O'chirilgan itemlarni saqlash
-          for obj in deleted_instances:
-              obj.delete()
-
-          # Yangi va o'zgartirilgan itemlarni saqlash
-          for instance in instances:
-              if hasattr(instance, 'sale') and instance.sale:
-                  instance.save()
+          # Yangi, o'zgartirilgan va o'chirilgan itemlarni paket bilan saqlash
+          # (xaridorlar qarzi formset_saved signalida - sales.signals)
+          bulk_save_formset(formset)
 
           # Saqlangandan keyin total_price ni qayta hisoblash
-          obj = form.instance
-          total_sum = obj.sotuvlar.aggregate(
-              total=models.Sum('total')
-          )['total'] or 0
-          if obj.total_price != total_sum:
-              obj.total_price = total_sum
-              obj.save(update_fields=['total_price'])
-
-          formset.save_m2m()
-
-      # total_price hisoblash
-      def total_price(self, obj):
-          total = obj.sotuvlar.aggregate(
-              sum=models.Sum( models.ExpressionWrapper( models.F("quantity") * models.F("price"), output_field=models.DecimalField() ) ) )["sum"]
-          if total is None:
-              return "0.00"
-          return f"{total:.2f}"
-
-      total_price.short_description = "Umumiy sotuv"
+          form.instance.update_total_price()
+
       exclude = ('created_by',)
 
+      @admin.display(description="Arxivdagi qatorlar")
+      def archived_items_link(self, obj):
+          # Sale.archived_count dan - arxiv jadvali o'qilmaydi
+          if obj is None or not obj.archived_count:
+              return "-"
+          url = reverse("admin:sales_archivedsaleitem_changelist")
+          return format_html('<a href="{}?sale={}">{} ta qator, {}</a>', url, obj.pk, obj.archived_count, obj.archived_total)
+
+      @admin.action(description="Jami narxni qayta hisoblash")
+      def recalculate_total_price(self, request, queryset):
+          # Ko'p zakazda so'rov ichida ishlamaydi - `run_jobs` ishchisi bajaradi (reports.jobs.submit)
+          pks = list(queryset.values_list("pk", flat=True))
+          message_job(self, request, submit("sales.recalculate_total_price", {"pks": pks}, request.user, size=len(pks)))
+
 # ----------------------------------------------------------------------
 
 class SaleItemStatsFilter(admin.SimpleListFilter):
@@ -96,9 +106,20 @@ class SaleItemStatsFilter(admin.SimpleListFilter):
 
 
 @admin.register(SaleItem)
-class SaleItemAdmin(admin.ModelAdmin):
+class SaleItemAdmin(CachedAutocompleteMixin, SeekPaginationMixin, admin.ModelAdmin):
 	list_display = ("product", "quantity", "price", "total", "buyer", "payment_status", "buyers_paid", "sale", "created_at" )
 	list_filter = (SaleItemStatsFilter, "payment_status", "order_status", "created_at")
+	# sales_item_*_idx indekslari shu tartibni (-created_at) qamraydi - sahifalar kursor bilan olinadi
+	# "Arxiv bilan birga" filtri arxivdagi (yopilgan, to'langan) qatorlarni ham qo'shadi
+	archive_model = ArchivedSaleItem
+	actions = (export_action(sale_items_export),)
+	autocomplete_fields = ("product", "buyer")
+	# FK ustunlar __str__ uchun faqat shu ustunlarni o'qiydi
+	list_display_related = {
+		"product": ("product_name", "measurement_unit"),
+		"buyer": ("name", "sign"),
+		"sale": ("date",),
+	}
 	# readonly_fields = ("total",)
 
 	formfield_overrides = {
@@ -110,21 +131,68 @@ class SaleItemAdmin(admin.ModelAdmin):
 
 		# SaleItem saqlangandan keyin tegishli Sale ning total_price ni yangilash
 		if obj.sale:
-			total_sum = obj.sale.sotuvlar.aggregate(
-				total=models.Sum('total')
-			)['total'] or 0
-			if obj.sale.total_price != total_sum:
-				obj.sale.total_price = total_sum
-				obj.sale.save(update_fields=['total_price'])
+			obj.sale.update_total_price()
+
+	def delete_model(self, request, obj):
+		sale = obj.sale
+		super().delete_model(request, obj)
+		sale.update_total_price()
+
+	def delete_queryset(self, request, queryset):
+		sale_ids = set(queryset.values_list("sale_id", flat=True))
+		super().delete_queryset(request, queryset)
+		for sale in Sale.objects.filter(pk__in=sale_ids):
+			sale.update_total_price()
 
 	class Media:
 		js = ('sales/js/calculate_total.js', 'sales/js/payment_status_toggle.js', 'sales/js/decimal_thousands.js',)
 
+
+@admin.register(OpenSaleItem)
+class OpenSaleItemAdmin(SaleItemAdmin):
+	# Arxivda faqat yopilgan qatorlar
+	archive_model = None
+
+	def get_queryset(self, request):
+		return super().get_queryset(request).filter(order_status=SaleItem.OrderStatus.OPEN)
+
+
+@admin.register(UnpaidSaleItem)
+class UnpaidSaleItemAdmin(SaleItemAdmin):
+	# Arxivda faqat to'langan qatorlar
+	archive_model = None
+
+	def get_queryset(self, request):
+		return super().get_queryset(request).exclude(payment_status=SaleItem.PaymentStatus.PAID)
+
+
+@admin.register(ArchivedSaleItem)
+class ArchivedSaleItemAdmin(SeekPaginationMixin, admin.ModelAdmin):
+	"""Faqat o'qish uchun: qatorlar `archive_sale_items` buyrug'i bilan ko'chiriladi (sales.archive)."""
+
+	list_display = ("product", "quantity", "price", "total", "buyer", "payment_status", "buyers_paid", "sale", "created_at", "archived_at")
+	list_filter = ("created_at",)
+	# sales_archived_created_idx
+	list_display_related = {
+		"product": ("product_name", "measurement_unit"),
+		"buyer": ("name", "sign"),
+		"sale": ("date",),
+	}
+
+	def has_add_permission(self, request):
+		return False
+
+	def has_change_permission(self, request, obj=None):
+		return False
+
+	def has_delete_permission(self, request, obj=None):
+		return False
+
 # ----------------------------------------------------------------------
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
-	list_display = ("product_name", "measurement_unit", "created_at")
+class ProductAdmin(NormalizedSearchMixin, LastPriceLookupMixin, admin.ModelAdmin):
+	list_display = ("product_name", "measurement_unit", "last_price", "last_price_date", "price_history_link", "created_at")
 
 	formfield_overrides = {
 		dj_models.DecimalField: {'widget': TextInput(attrs={'class': 'thousand-sep'})},
@@ -133,8 +201,73 @@ class ProductAdmin(admin.ModelAdmin):
 	class Media:
 		js = ('sales/js/decimal_thousands.js',)
 
+	@admin.display(description="Narx tarixi")
+	def price_history_link(self, obj):
+		return price_history_link(obj, "product")
+
 @admin.register(Buyer)
-class BuyerAdmin(admin.ModelAdmin):
+class BuyerAdmin(NormalizedSearchMixin, admin.ModelAdmin):
 	list_display = ("name", "sign", "phone_number", "created_at")
 	list_filter = ()
-	search_fields = ()
+
+	def get_urls(self):
+		urls = super().get_urls()
+		custom_urls = [
+			path('balance/<uuid:buyer_id>/', async_admin_view(self.balance, "sales.view_buyer"), name='sales_buyer_balance'),
+		]
+		return custom_urls + urls
+
+	async def balance(self, request, buyer_id):
+		"""Xaridor qarzi - BuyerBalance dagi tayyor qator, elementlar o'qilmaydi."""
+		async def load():
+			balance = await BuyerBalance.objects.filter(buyer_id=buyer_id).values(
+				"outstanding", *AGING_FIELDS, "unpaid_items", "oldest_unpaid_date", "aged_on",
+			).afirst()
+			if balance and balance.pop("aged_on") < timezone.localdate():
+				# Kechagi qator - muddatlar bugungi sana bo'yicha (yozmasdan)
+				current = await BuyerBalance.objects.compute([buyer_id]).order_by("buyer_id").afirst()
+				balance.update({field: current[field] if current else 0 for field in AGING_FIELDS})
+			return balance
+
+		balance = await cached_lookup(f"api:buyer_balance:{buyer_id}", load)
+		return JsonResponse(balance or {
+			"outstanding": 0, "days_0_30": 0, "days_31_60": 0, "days_over_60": 0,
+			"unpaid_items": 0, "oldest_unpaid_date": None,
+		})
+
+
+class BuyerBalanceChangeList(QueryChangeList):
+	"""
+	Qarz muddatlari kunga bog'liq: sahifadagi eskirgan qatorlar o'qish paytida
+	bugungi sanaga hisoblanadi (GET bazaga yozmaydi). Jadvalning o'zi
+	`rebuild_buyer_balances --stale` bilan kuniga bir marta yangilanadi.
+	"""
+
+	def get_results(self, request):
+		super().get_results(request)
+		self.result_list = BuyerBalance.objects.age_stale(list(self.result_list))
+
+
+@admin.register(BuyerBalance)
+class BuyerBalanceAdmin(NormalizedSearchMixin, ChangeListQueryMixin, admin.ModelAdmin):
+	"""Faqat o'qish uchun: qatorlar SaleItem saqlanganda va o'chirilganda yangilanadi."""
+
+	list_display = ("buyer", "outstanding", "days_0_30", "days_31_60", "days_over_60", "unpaid_items", "oldest_unpaid_date", "updated_at")
+	list_display_related = {"buyer": ("name", "sign")}
+	list_only_extra = ("aged_on",)
+	search_fields = ("buyer__search_text",)
+	search_text_field = "buyer__search_text"
+	# sales_balance_outstanding_idx
+	ordering = ("-outstanding",)
+
+	def has_add_permission(self, request):
+		return False
+
+	def has_change_permission(self, request, obj=None):
+		return False
+
+	def has_delete_permission(self, request, obj=None):
+		return False
+
+	def get_changelist(self, request, **kwargs):
+		return BuyerBalanceChangeList
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SalesConfig(AppConfig):
     name = 'sales'
     verbose_name = '3. Zakaz'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,88 @@
+"""
+Yopilgan va to'liq to'langan SaleItem larni arxiv jadvaliga ko'chirish.
+
+Bunday qatorlar boshqa o'zgarmaydi, lekin SaleItem changelist i, filtrlari
+va hisobotlari har safar ularni ham ko'rib chiqadi. `archive_settled()`
+`months` oydan eski qatorlarni paketlab ArchivedSaleItem ga ko'chiradi -
+asosiy jadval hajmi tarix emas, faqat so'nggi oylar bilan o'sadi.
+
+Ko'chirish jamilarni o'zgartirmaydi: qator elementlar yig'indisidan chiqib,
+Sale.archived_total ga qo'shiladi, Sale.total_price esa o'sha-o'sha.
+Xaridor qarziga ham ta'sir yo'q (to'langan qatorlar qarzga kirmaydi),
+narx tarixi va oylik yig'indilar ikkala jadvaldan yig'iladi. Shuning uchun
+o'chirish paytida `archiving` belgilanadi va SaleItem post_delete qabul
+qiluvchilari (sales.signals, reports.signals) hech narsa qayta hisoblamaydi.
+
+PostgreSQL da jadvalni created_at bo'yicha bo'laklarga (partition) bo'lish
+UUID kalitni (id, created_at) ga o'zgartirishni talab qiladi va Django
+migratsiyalari bilan boshqarilmaydi - arxiv jadvali barcha bazalarda bir xil ishlaydi.
+"""
+import calendar
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedSaleItem, Sale, SaleItem
+
+ARCHIVE_AFTER_MONTHS = 12
+CHUNK_SIZE = 1000
+
+# archive_chunk qatorlarni o'chirayotganda True (joriy thread/kontekst uchun)
+archiving = ContextVar("sale_items_archiving", default=False)
+
+# SaleItem va ArchivedSaleItem dagi umumiy ustunlar (id ham)
+ARCHIVE_FIELDS = tuple(field.attname for field in SaleItem._meta.concrete_fields)
+
+
+def months_ago(months, now=None):
+	now = now or timezone.now()
+	year, month = divmod(now.year * 12 + now.month - 1 - months, 12)
+	day = min(now.day, calendar.monthrange(year, month + 1)[1])
+	return now.replace(year=year, month=month + 1, day=day)
+
+
+def settled_items(cutoff):
+	"""`cutoff` dan oldin yaratilgan, yopilgan va to'liq to'langan qatorlar."""
+	return SaleItem.objects.filter(
+		order_status=SaleItem.OrderStatus.CLOSED,
+		payment_status=SaleItem.PaymentStatus.PAID,
+		created_at__lt=cutoff,
+	)
+
+
+def archive_chunk(cutoff, size=CHUNK_SIZE):
+	"""
+	Eng eski `size` tagacha qatorni bitta tranzaksiyada ko'chiradi va ko'chirilganlar
+	sonini qaytaradi. Zakaz sarlavhalari qulflanadi: admin da shu zakaz bir
+	vaqtda saqlanayotgan bo'lsa, ko'chirish uning tugashini kutadi
+	(config.concurrency) va qatorlar holati qayta tekshiriladi.
+	"""
+	with transaction.atomic():
+		candidates = list(settled_items(cutoff).order_by("created_at", "pk").values_list("pk", "sale_id")[:size])
+		if not candidates:
+			return 0
+		sale_ids = {sale_id for pk, sale_id in candidates}
+		list(Sale.objects.select_for_update().filter(pk__in=sale_ids).values_list("pk", flat=True))
+
+		rows = list(settled_items(cutoff).filter(pk__in=[pk for pk, sale_id in candidates]).values(*ARCHIVE_FIELDS))
+		ArchivedSaleItem.objects.bulk_create([ArchivedSaleItem(**row) for row in rows])
+		# Jamilar, qarz va hisobotlar o'zgarmaydi - qabul qiluvchilar `archiving` ni tekshiradi
+		token = archiving.set(True)
+		try:
+			SaleItem.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+		finally:
+			archiving.reset(token)
+		Sale.objects.filter(pk__in=sale_ids).rebuild_archived_totals()
+	return len(rows)
+
+
+def archive_settled(months=ARCHIVE_AFTER_MONTHS, size=CHUNK_SIZE, now=None):
+	"""`months` oydan eski hal bo'lgan qatorlarni paketlab ko'chiradi; jami sonini qaytaradi."""
+	cutoff = months_ago(months, now)
+	total = 0
+	while True:
+		moved = archive_chunk(cutoff, size)
+		total += moved
+		if moved < size:
+			return total
@@ -0,0 +1,27 @@
+from config.export import ExportSpec
+
+from .models import ArchivedSaleItem, SaleItem
+
+sale_items_export = ExportSpec(
+	"sale_items",
+	SaleItem,
+	columns=[
+		("ID", "id"),
+		("Sana", "sale__date"),
+		("Mahsulot", "product__product_name"),
+		("O'lchov birligi", "product__measurement_unit"),
+		("Miqdor", "quantity"),
+		("Narx", "price"),
+		("Jami", "total"),
+		("Xaridor", "buyer__name"),
+		("Xaridor belgisi", "buyer__sign"),
+		("Xaridor telefoni", "buyer__phone_number"),
+		("To'lov holati", "payment_status"),
+		("Xaridor to'lagan summa", "buyers_paid"),
+		("Zakaz holati", "order_status"),
+		("Yaratilgan sana", "created_at"),
+	],
+	date_field="sale__date",
+	# Arxivlangan (archive_sale_items) qatorlar ham to'liq eksportga kiradi
+	archive_model=ArchivedSaleItem,
+)
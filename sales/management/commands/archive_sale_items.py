@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from sales.archive import ARCHIVE_AFTER_MONTHS, CHUNK_SIZE, archive_settled, months_ago, settled_items
+
+
+class Command(BaseCommand):
+	help = "Yopilgan va to'liq to'langan, N oydan eski SaleItem larni arxiv jadvaliga ko'chiradi."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--months", type=int, default=ARCHIVE_AFTER_MONTHS, help="Shu oydan eski qatorlar ko'chiriladi")
+		parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Bitta tranzaksiyadagi qatorlar soni")
+		parser.add_argument("--dry-run", action="store_true", help="Faqat sonini ko'rsatish, ko'chirmaslik")
+
+	def handle(self, *args, **options):
+		months = options["months"]
+		if options["dry_run"]:
+			count = settled_items(months_ago(months)).count()
+			self.stdout.write(f"{count} ta qator arxivga ko'chiriladi ({months} oydan eski).")
+			return
+
+		moved = archive_settled(months, options["chunk_size"])
+		self.stdout.write(self.style.SUCCESS(f"{moved} ta qator arxivga ko'chirildi ({months} oydan eski)."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from config.signals import totals_changed
+from sales.models import Sale
+
+
+class Command(BaseCommand):
+	help = "Saqlangan Sale.total_price elementlar yig'indisiga mosligini tekshiradi."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--fix", action="store_true", help="Mos kelmagan jami narxlarni tuzatish")
+
+	def handle(self, *args, **options):
+		mismatched = list(Sale.objects.with_total_mismatch().order_by("date"))
+		for sale in mismatched:
+			self.stdout.write(f"{sale.date}: saqlangan={sale.total_price} haqiqiy={sale.items_total}")
+
+		if not mismatched:
+			self.stdout.write(self.style.SUCCESS("Barcha zakazlar jami narxi to'g'ri."))
+			return
+
+		if options["fix"]:
+			for sale in mismatched:
+				sale.total_price = sale.items_total
+			Sale.objects.bulk_update(mismatched, ["total_price"])
+			totals_changed.send(sender=Sale, pks=[sale.pk for sale in mismatched])
+			self.stdout.write(self.style.SUCCESS(f"{len(mismatched)} ta zakaz tuzatildi."))
+		else:
+			self.stdout.write(self.style.WARNING(f"{len(mismatched)} ta zakaz jami narxi mos emas."))
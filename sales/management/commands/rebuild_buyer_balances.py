@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from sales.models import AGING_FIELDS, BuyerBalance
+
+TOTAL_FIELDS = ("outstanding", "unpaid_items", "oldest_unpaid_date")
+
+
+class Command(BaseCommand):
+	help = "BuyerBalance jadvalini SaleItem lardan noldan qayta quradi va farqlarni ko'rsatadi."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--check", action="store_true", help="Faqat farqlarni ko'rsatish, yozmaslik")
+		parser.add_argument("--chunk-size", type=int, default=500, help="Bir paketdagi xaridorlar soni")
+		parser.add_argument(
+			"--stale", action="store_true",
+			help="Faqat kecha va undan oldin hisoblangan qatorlarning qarz muddatlarini yangilash (kunlik cron)",
+		)
+
+	def handle(self, *args, **options):
+		if options["stale"]:
+			with transaction.atomic():
+				BuyerBalance.objects.refresh_stale()
+			self.stdout.write(self.style.SUCCESS("Qarz muddatlari bugungi sanaga qayta taqsimlandi."))
+			return
+
+		actual = {row["buyer_id"]: row for row in BuyerBalance.objects.compute() if row["outstanding"]}
+		stored = {
+			row["buyer_id"]: row
+			for row in BuyerBalance.objects.values("buyer_id", "aged_on", *TOTAL_FIELDS, *AGING_FIELDS)
+		}
+		today = timezone.localdate()
+
+		drift = 0
+		for buyer_id in sorted(actual.keys() | stored.keys(), key=str):
+			saved = stored.get(buyer_id)
+			real = actual.get(buyer_id)
+			# Kechagi qatorlar muddatlari eskirgan bo'lishi tabiiy - faqat summalar solishtiriladi
+			fields = TOTAL_FIELDS + AGING_FIELDS if saved and saved["aged_on"] == today else TOTAL_FIELDS
+			if saved and real and all(saved[field] == real[field] for field in fields):
+				continue
+			drift += 1
+			self.stdout.write(
+				f"{buyer_id}: saqlangan={saved['outstanding'] if saved else 0} "
+				f"haqiqiy={real['outstanding'] if real else 0}"
+			)
+
+		if options["check"]:
+			style = self.style.WARNING if drift else self.style.SUCCESS
+			self.stdout.write(style(f"{drift} ta xaridor qarzi mos emas."))
+			return
+
+		buyer_ids = sorted(actual.keys() | stored.keys(), key=str)
+		chunk_size = options["chunk_size"]
+		for start in range(0, len(buyer_ids), chunk_size):
+			with transaction.atomic():
+				BuyerBalance.objects.refresh_buyers(buyer_ids[start:start + chunk_size])
+
+		self.stdout.write(self.style.SUCCESS(f"{len(buyer_ids)} ta xaridor qayta hisoblandi, {drift} ta farq tuzatildi."))
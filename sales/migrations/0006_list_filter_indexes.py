@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_saleitem_buyers_paid_alter_saleitem_order_status_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='buyer',
+            index=models.Index(fields=['-created_at'], name='sales_buyer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at'], name='sales_product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saleitem',
+            index=models.Index(fields=['sale', 'created_at'], name='sales_item_sale_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saleitem',
+            index=models.Index(fields=['-created_at'], name='sales_item_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saleitem',
+            index=models.Index(condition=models.Q(('order_status', 'open')), fields=['-created_at'], name='sales_item_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saleitem',
+            index=models.Index(condition=models.Q(('payment_status', 'paid'), _negated=True), fields=['-created_at'], name='sales_item_unpaid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saleitem',
+            index=models.Index(fields=['payment_status', '-created_at'], name='sales_item_payment_idx'),
+        ),
+    ]
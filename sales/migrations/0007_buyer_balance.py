@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:04
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0006_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BuyerBalance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Qarz')),
+                ('days_0_30', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='0-30 kun')),
+                ('days_31_60', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='31-60 kun')),
+                ('days_over_60', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='60+ kun')),
+                ('unpaid_items', models.PositiveIntegerField(default=0, verbose_name="To'lanmagan qatorlar")),
+                ('oldest_unpaid_date', models.DateField(blank=True, null=True, verbose_name='Eng eski qarz sanasi')),
+                ('aged_on', models.DateField(verbose_name='Hisoblangan sana')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan sana')),
+                ('buyer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='balance', to='sales.buyer', verbose_name='Xaridor')),
+            ],
+            options={
+                'verbose_name': 'Xaridor qarzi ',
+                'verbose_name_plural': 'Xaridorlar qarzi ',
+                'ordering': ['-outstanding'],
+                'indexes': [models.Index(fields=['-outstanding'], name='sales_balance_outstanding_idx')],
+            },
+        ),
+    ]
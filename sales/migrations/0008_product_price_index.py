@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_buyer_balance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='saleitem',
+            index=models.Index(fields=['product', '-created_at'], name='sales_item_product_created_idx'),
+        ),
+    ]
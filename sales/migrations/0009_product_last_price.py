@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0008_product_price_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='saleitem',
+            name='sales_item_product_created_idx',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='last_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=20, null=True, verbose_name='Oxirgi narx'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='last_price_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Oxirgi narx sanasi'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+from config.search import add_search_text_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0009_product_last_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='buyer',
+            name='search_text',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=500, verbose_name='Qidiruv matni'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_text',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=500, verbose_name='Qidiruv matni'),
+        ),
+        *add_search_text_index('sales.Buyer', 'sales_buyer_search_trgm', ('name', 'sign'), ('phone_number',)),
+        *add_search_text_index('sales.Product', 'sales_product_search_trgm', ('product_name',)),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0011_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='archived_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Arxivdagi qatorlar soni'),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='archived_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=20, verbose_name='Arxivdagi qatorlar jami'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedSaleItem',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Miqdor')),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True, verbose_name='Narx')),
+                ('total', models.DecimalField(blank=True, decimal_places=2, default=0, max_digits=20, null=True, verbose_name='Jami')),
+                ('payment_status', models.CharField(choices=[('unpaid', "To'lanmagan"), ('partial', 'Qisman'), ('paid', "To'langan")], max_length=10, verbose_name="To'lov holati")),
+                ('buyers_paid', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name="Xaridor to'lagan summa")),
+                ('order_status', models.CharField(choices=[('open', 'Jarayonda'), ('closed', 'Yopilgan')], max_length=10, verbose_name='Zakaz holati')),
+                ('created_at', models.DateTimeField(verbose_name='Yaratilgan sana')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Arxivlangan sana')),
+                ('buyer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_sale_items', to='sales.buyer', verbose_name='Xaridor')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_sale_items', to='sales.product', verbose_name='Mahsulot')),
+                ('sale', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_items', to='sales.sale', verbose_name='Savdo')),
+            ],
+            options={
+                'verbose_name': 'Arxivdagi zakaz elementi ',
+                'verbose_name_plural': 'Arxivdagi zakaz elementlari ',
+                'indexes': [models.Index(fields=['-created_at'], name='sales_archived_created_idx')],
+            },
+        ),
+    ]
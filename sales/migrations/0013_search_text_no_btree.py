@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0012_sale_item_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='buyer',
+            name='search_text',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500, verbose_name='Qidiruv matni'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='search_text',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500, verbose_name='Qidiruv matni'),
+        ),
+    ]
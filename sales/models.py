@@ -1,10 +1,19 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+import datetime
 import uuid
 
+from config.concurrency import VersionedModel, lock_version
+from config.deltas import SavedLineMixin
+from config.mastercache import MasterForeignKey
+from config.search import SearchTextModel
+from config.signals import totals_changed
 
-class Buyer(models.Model):
+
+class Buyer(SearchTextModel):
 	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 	name = models.CharField(max_length=255, verbose_name="Ismi")
 	sign = models.CharField(max_length=255, blank=True, verbose_name="Belgisi")
@@ -15,34 +24,115 @@ class Buyer(models.Model):
 		verbose_name = "Xaridor "
 		verbose_name_plural = "Xaridorlar "
 		ordering = ["-created_at"]
+		indexes = [
+			models.Index(fields=["-created_at"], name="sales_buyer_created_idx"),
+		]
+
+	search_text_fields = ("name", "sign")
+	search_digit_fields = ("phone_number",)
 
 	def __str__(self):
 		return f"{self.name} - {self.sign}"
 
 
-class Product(models.Model):
+class Product(SearchTextModel):
 	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 	product_name = models.CharField(max_length=255, verbose_name="Mahsulot nomi")
 	measurement_unit = models.CharField(max_length=64, blank=True, verbose_name="O'lchov birligi")
+	# reports.PriceHistory dan yangilanadi
+	last_price = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True, editable=False, verbose_name="Oxirgi narx")
+	last_price_date = models.DateField(null=True, blank=True, editable=False, verbose_name="Oxirgi narx sanasi")
 	created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
 
 	class Meta:
 		verbose_name = "Mahsulot "
 		verbose_name_plural = "Mahsulotlar "
 		ordering = ["-created_at"]
+		indexes = [
+			models.Index(fields=["-created_at"], name="sales_product_created_idx"),
+		]
+
+	search_text_fields = ("product_name",)
 
 	def __str__(self):
 		return f"{self.product_name} ({self.measurement_unit})"
 
 
-class Sale(models.Model):
+class SaleQuerySet(models.QuerySet):
+	def with_items_total(self):
+		"""Har bir Sale uchun elementlar (arxivdagilar ham) yig'indisini bitta so'rovda qo'shadi."""
+		return self.annotate(
+			items_total=Coalesce(
+				models.Sum("sotuvlar__total"),
+				models.Value(0),
+				output_field=models.DecimalField(max_digits=20, decimal_places=2),
+			) + models.F("archived_total")
+		)
+
+	def with_total_mismatch(self):
+		"""Saqlangan total_price elementlar yig'indisiga mos kelmaydigan Sale lar."""
+		return self.with_items_total().exclude(
+			total_price=models.F("items_total")
+		)
+
+	def rebuild_total_price(self):
+		"""Tanlangan Sale lar total_price ini bitta UPDATE da elementlardan qayta hisoblaydi."""
+		items_total = (
+			SaleItem.objects.filter(sale=models.OuterRef("pk"))
+			.order_by()
+			.values("sale")
+			.annotate(total=models.Sum("total"))
+			.values("total")
+		)
+		pks = list(self.values_list("pk", flat=True))
+		updated = Sale.objects.filter(pk__in=pks).update(
+			total_price=Coalesce(
+				models.Subquery(items_total, output_field=models.DecimalField(max_digits=20, decimal_places=2)),
+				models.Value(0),
+				output_field=models.DecimalField(max_digits=20, decimal_places=2),
+			) + models.F("archived_total")
+		)
+		totals_changed.send(sender=Sale, pks=pks)
+		return updated
+
+	def rebuild_archived_totals(self):
+		"""
+		archived_total va archived_count ni arxiv jadvalidan bitta UPDATE da
+		qayta hisoblaydi. total_price o'zgarmaydi: qatorlar arxivga ko'chganda
+		ular elementlar yig'indisidan chiqib, archived_total ga qo'shiladi.
+		"""
+		archived = (
+			ArchivedSaleItem.objects.filter(sale=models.OuterRef("pk"))
+			.order_by()
+			.values("sale")
+		)
+		pks = list(self.values_list("pk", flat=True))
+		return Sale.objects.filter(pk__in=pks).update(
+			archived_total=Coalesce(
+				models.Subquery(archived.annotate(total=models.Sum("total")).values("total"), output_field=models.DecimalField(max_digits=20, decimal_places=2)),
+				models.Value(0),
+				output_field=models.DecimalField(max_digits=20, decimal_places=2),
+			),
+			archived_count=Coalesce(
+				models.Subquery(archived.annotate(items=models.Count("pk")).values("items"), output_field=models.IntegerField()),
+				models.Value(0),
+			),
+		)
+
+
+class Sale(VersionedModel):
 	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 	created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Yaratgan foydalanuvchi")
 	date = models.DateField(unique=True, verbose_name="Sana")
 	description = models.TextField(blank=True, verbose_name="Tavsif")
 	total_price = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True, verbose_name="Jami narx")
+	# Arxivga ko'chirilgan qatorlar (sales.archive) - total_price ularni ham o'z ichiga oladi
+	archived_total = models.DecimalField(max_digits=20, decimal_places=2, default=0, editable=False, verbose_name="Arxivdagi qatorlar jami")
+	archived_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Arxivdagi qatorlar soni")
 	created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
 
+	objects = SaleQuerySet.as_manager()
+
 	class Meta:
 		ordering = ["-created_at"]
 
@@ -54,13 +144,38 @@ class Sale(models.Model):
 		# Total calculation will be handled by SaleAdmin.save_formset
 		super().save(*args, **kwargs)
 
+	totals_fields = ("total_price", "archived_total", "archived_count")
+
+	def update_total_price(self):
+		"""
+		total_price ni elementlar yig'indisidan bitta aggregate() bilan yangilaydi.
+		Changelist shu saqlangan ustunni o'qiydi, shuning uchun u doim mos bo'lishi kerak.
+		Sarlavha avval qulflanadi: parallel saqlash yig'indini o'z qatorlari
+		tasdiqlangandan keyin hisoblaydi (config.concurrency). Arxivdagi qatorlar
+		o'qilmaydi - ularning yig'indisi archived_total da.
+		"""
+		# Tashqi tranzaksiya (admin) ichida savepoint kerak emas
+		with transaction.atomic(savepoint=False):
+			lock_version(Sale, self.pk)
+			total_sum = self.sotuvlar.aggregate(
+				total=models.Sum('total')
+			)['total'] or 0
+			Sale.objects.filter(pk=self.pk).update(
+				total_price=models.Value(total_sum, output_field=models.DecimalField(max_digits=20, decimal_places=2)) + models.F("archived_total"),
+				version=self.version_increment(),
+			)
+		total_sum += self.archived_total
+		if self.total_price != total_sum:
+			self.total_price = total_sum
+			totals_changed.send(sender=Sale, pks=[self.pk])
+
 	class Meta:
 		verbose_name = "Zakaz "
 		verbose_name_plural = "Zakazlar "
 		ordering = ["-created_at"]
 
 
-class SaleItem(models.Model):
+class SaleItem(SavedLineMixin, models.Model):
 	class PaymentStatus(models.TextChoices):
 		UNPAID = 'unpaid', "To'lanmagan"
 		PARTIAL = 'partial', "Qisman"
@@ -72,11 +187,11 @@ class SaleItem(models.Model):
 
 	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 	sale = models.ForeignKey(Sale, on_delete=models.CASCADE, related_name="sotuvlar", verbose_name="Savdo")
-	product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="sale_items", verbose_name="Mahsulot")
+	product = MasterForeignKey(Product, on_delete=models.CASCADE, related_name="sale_items", verbose_name="Mahsulot")
 	quantity = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Miqdor")
 	price = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True, verbose_name="Narx")
 	total = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True, default=0, verbose_name="Jami")
-	buyer = models.ForeignKey(Buyer, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Xaridor")
+	buyer = MasterForeignKey(Buyer, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Xaridor")
 
 	payment_status = models.CharField(
     max_length=10,
@@ -100,9 +215,33 @@ class SaleItem(models.Model):
 
 	created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
 
+	# Paketli saqlashda (formset_saved) qator boshqa xaridorga o'tkazilsa, eski xaridor qarzi ham yangilanadi
+	saved_line_fields = ("buyer_id",)
+
 	class Meta:
 		verbose_name = "[ Zakaz elementi ] "
 		verbose_name_plural = "[ Zakaz elementlari ] "
+		indexes = [
+			# Zakaz ichidagi elementlar sana bo'yicha
+			models.Index(fields=["sale", "created_at"], name="sales_item_sale_created_idx"),
+			# created_at sana filtri va changelist tartibi
+			models.Index(fields=["-created_at"], name="sales_item_created_idx"),
+			# "Yopilmagan zakazlar" - faqat ochiq qatorlar (jadvalning kichik qismi)
+			models.Index(
+				fields=["-created_at"],
+				name="sales_item_open_idx",
+				condition=models.Q(order_status="open"),
+			),
+			# "To'lanmagan zakazlar" - to'lanmagan va qisman to'langan qatorlar
+			models.Index(
+				fields=["-created_at"],
+				name="sales_item_unpaid_idx",
+				condition=~models.Q(payment_status="paid"),
+			),
+			# payment_status list_filter i (order_status=open ni yuqoridagi qisman indeks qamraydi,
+			# closed esa jadvalning katta qismi - u yerda indeks foyda bermaydi)
+			models.Index(fields=["payment_status", "-created_at"], name="sales_item_payment_idx"),
+		]
 
 	def clean(self):
 		total_value = self.total or 0
@@ -118,13 +257,19 @@ class SaleItem(models.Model):
 			if total_value and paid_value >= total_value:
 				raise ValidationError({"buyers_paid": "Qisman to'lov jami summadan kichik bo'lishi kerak."})
 
-	def save(self, *args, **kwargs):
+	# Paketli saqlashda (config.formsets.bulk_save_formset) qayta yoziladigan ustunlar
+	derived_fields = ("total", "buyers_paid")
+
+	def apply_derived_fields(self):
 		if self.quantity and self.price:
 			self.total = self.quantity * self.price
 		else:
 			self.total = 0
 
 		self.clean()
+
+	def save(self, *args, **kwargs):
+		self.apply_derived_fields()
 		super().save(*args, **kwargs)
 
 		# Don't call self.sale.save() here to avoid conflicts with save_formset
@@ -136,6 +281,42 @@ class SaleItem(models.Model):
 		return "Mahsulot tanlanmagan"
 
 
+class ArchivedSaleItem(models.Model):
+	"""
+	Arxivdagi SaleItem: yopilgan va to'liq to'langan, N oydan eski qatorlar
+	(sales.archive). Ustunlar va id SaleItem dagi bilan bir xil; qatorlar
+	faqat o'qiladi. Zakaz jamisi Sale.archived_total da, hisobotlar
+	(reports.models) ikkala jadvaldan yig'iladi.
+	"""
+
+	id = models.UUIDField(primary_key=True, editable=False)
+	sale = models.ForeignKey(Sale, on_delete=models.CASCADE, related_name="archived_items", verbose_name="Savdo")
+	product = MasterForeignKey(Product, on_delete=models.CASCADE, related_name="archived_sale_items", verbose_name="Mahsulot")
+	quantity = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Miqdor")
+	price = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True, verbose_name="Narx")
+	total = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True, default=0, verbose_name="Jami")
+	buyer = MasterForeignKey(Buyer, on_delete=models.SET_NULL, null=True, blank=True, related_name="archived_sale_items", verbose_name="Xaridor")
+	payment_status = models.CharField(max_length=10, choices=SaleItem.PaymentStatus.choices, verbose_name="To'lov holati")
+	buyers_paid = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Xaridor to'lagan summa")
+	order_status = models.CharField(max_length=10, choices=SaleItem.OrderStatus.choices, verbose_name="Zakaz holati")
+	# SaleItem dagi qiymat saqlanadi (auto_now_add emas)
+	created_at = models.DateTimeField(verbose_name="Yaratilgan sana")
+	archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Arxivlangan sana")
+
+	class Meta:
+		verbose_name = "Arxivdagi zakaz elementi "
+		verbose_name_plural = "Arxivdagi zakaz elementlari "
+		indexes = [
+			# Changelist keyset sahifalashi (config.pagination)
+			models.Index(fields=["-created_at"], name="sales_archived_created_idx"),
+		]
+
+	def __str__(self):
+		if self.product:
+			return self.product.product_name
+		return "Mahsulot tanlanmagan"
+
+
 class OpenSaleItem(SaleItem):
 	class Meta:
 		proxy = True
@@ -148,3 +329,127 @@ class UnpaidSaleItem(SaleItem):
 		proxy = True
 		verbose_name = "To'lanmagan zakaz"
 		verbose_name_plural = "To'lanmagan zakazlar"
+
+
+def outstanding_expression():
+	"""Bitta SaleItem bo'yicha xaridor qarzi: jami - to'lagan summa."""
+	return models.ExpressionWrapper(
+		Coalesce(models.F("total"), models.Value(0), output_field=models.DecimalField(max_digits=20, decimal_places=2))
+		- models.F("buyers_paid"),
+		output_field=models.DecimalField(max_digits=20, decimal_places=2),
+	)
+
+
+# Qarz muddatlari - sanaga bog'liq, kun o'tishi bilan eskiradi (aged_on)
+AGING_FIELDS = ("days_0_30", "days_31_60", "days_over_60")
+
+
+class BuyerBalanceQuerySet(models.QuerySet):
+	def compute(self, buyer_ids=None, today=None):
+		"""
+		Xaridorlar qarzini to'lanmagan SaleItem lardan bitta GROUP BY so'rovida hisoblaydi.
+		Qarz muddati zakaz sanasidan (Sale.date) boshlab sanaladi.
+		"""
+		today = today or timezone.localdate()
+		month_ago = today - datetime.timedelta(days=30)
+		two_months_ago = today - datetime.timedelta(days=60)
+		debt = outstanding_expression()
+
+		items = SaleItem.objects.filter(buyer__isnull=False).exclude(payment_status=SaleItem.PaymentStatus.PAID)
+		if buyer_ids is not None:
+			items = items.filter(buyer_id__in=buyer_ids)
+		return (
+			items.order_by()
+			.values("buyer_id")
+			.annotate(
+				outstanding=models.Sum(debt),
+				days_0_30=Coalesce(models.Sum(debt, filter=models.Q(sale__date__gte=month_ago)), models.Value(0), output_field=debt.output_field),
+				days_31_60=Coalesce(models.Sum(debt, filter=models.Q(sale__date__lt=month_ago, sale__date__gte=two_months_ago)), models.Value(0), output_field=debt.output_field),
+				days_over_60=Coalesce(models.Sum(debt, filter=models.Q(sale__date__lt=two_months_ago)), models.Value(0), output_field=debt.output_field),
+				unpaid_items=models.Count("id"),
+				oldest_unpaid_date=models.Min("sale__date"),
+			)
+		)
+
+	def refresh_buyers(self, buyer_ids):
+		"""
+		Berilgan xaridorlar qatorlarini qayta yig'adi: bitta o'qish va bitta upsert.
+		Qarzi qolmagan xaridorlar jadvaldan o'chiriladi.
+		"""
+		buyer_ids = {buyer_id for buyer_id in buyer_ids if buyer_id}
+		if not buyer_ids:
+			return
+
+		today = timezone.localdate()
+		balances = [
+			BuyerBalance(aged_on=today, **row)
+			for row in self.compute(buyer_ids, today)
+			if row["outstanding"]
+		]
+		present = {balance.buyer_id for balance in balances}
+		self.filter(buyer_id__in=buyer_ids - present).delete()
+		if balances:
+			self.bulk_create(
+				balances,
+				update_conflicts=True,
+				unique_fields=["buyer"],
+				update_fields=[
+					"outstanding", "days_0_30", "days_31_60", "days_over_60",
+					"unpaid_items", "oldest_unpaid_date", "aged_on", "updated_at",
+				],
+			)
+
+	def refresh_stale(self):
+		"""
+		Kecha yoki undan oldin hisoblangan qatorlarni bugungi sanaga qayta taqsimlaydi
+		(rebuild_buyer_balances --stale, kuniga bir marta).
+		"""
+		self.refresh_buyers(self.filter(aged_on__lt=timezone.localdate()).values_list("buyer_id", flat=True))
+
+	def age_stale(self, balances, today=None):
+		"""
+		O'qish paytida: eskirgan (aged_on < bugun) qatorlarning qarz muddatlarini
+		bugungi sana bo'yicha hisoblab qo'yadi. Faqat shu xaridorlar uchun bitta
+		GROUP BY; bazaga yozilmaydi. Barcha qatorlar yangi bo'lsa so'rov yo'q.
+		"""
+		today = today or timezone.localdate()
+		stale = [balance for balance in balances if balance.aged_on < today]
+		if stale:
+			current = {row["buyer_id"]: row for row in self.compute([balance.buyer_id for balance in stale], today)}
+			for balance in stale:
+				row = current.get(balance.buyer_id, {})
+				for field in AGING_FIELDS:
+					setattr(balance, field, row.get(field, 0))
+		return balances
+
+
+class BuyerBalance(models.Model):
+	"""
+	Xaridor bo'yicha qarz (debitorlik) - SaleItem saqlanganda va o'chirilganda
+	faqat shu xaridor qatori qayta hisoblanadi (sales.signals). Changelist
+	elementlar jadvalini o'qimaydi.
+	"""
+
+	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+	buyer = models.OneToOneField(Buyer, on_delete=models.CASCADE, related_name="balance", verbose_name="Xaridor")
+	outstanding = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Qarz")
+	days_0_30 = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="0-30 kun")
+	days_31_60 = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="31-60 kun")
+	days_over_60 = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="60+ kun")
+	unpaid_items = models.PositiveIntegerField(default=0, verbose_name="To'lanmagan qatorlar")
+	oldest_unpaid_date = models.DateField(null=True, blank=True, verbose_name="Eng eski qarz sanasi")
+	aged_on = models.DateField(verbose_name="Hisoblangan sana")
+	updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan sana")
+
+	objects = BuyerBalanceQuerySet.as_manager()
+
+	class Meta:
+		verbose_name = "Xaridor qarzi "
+		verbose_name_plural = "Xaridorlar qarzi "
+		ordering = ["-outstanding"]
+		indexes = [
+			models.Index(fields=["-outstanding"], name="sales_balance_outstanding_idx"),
+		]
+
+	def __str__(self):
+		return f"{self.buyer} - {self.outstanding}"
@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from config.signals import formset_saved
+
+from .archive import archiving
+from .models import BuyerBalance, OpenSaleItem, Sale, SaleItem, UnpaidSaleItem
+
+# Proxy modellar (admin dagi "Yopilmagan", "To'lanmagan" ro'yxatlar) o'z nomi bilan signal yuboradi
+ITEM_MODELS = (SaleItem, OpenSaleItem, UnpaidSaleItem)
+
+
+def remember_item_buyer(sender, instance, **kwargs):
+	"""Xaridor o'zgartirilsa, eski xaridor qarzini ham yangilash uchun eslab qoladi."""
+	if instance._state.adding:
+		return
+	instance._balance_old_buyer_id = SaleItem.objects.filter(pk=instance.pk).values_list("buyer_id", flat=True).first()
+
+
+def refresh_on_item_save(sender, instance, **kwargs):
+	BuyerBalance.objects.refresh_buyers([instance.buyer_id, instance.__dict__.pop("_balance_old_buyer_id", None)])
+
+
+def refresh_on_item_delete(sender, instance, **kwargs):
+	# Arxivga ko'chirilgan qator to'langan - qarzga kirmagan
+	if archiving.get():
+		return
+	BuyerBalance.objects.refresh_buyers([instance.buyer_id])
+
+
+def refresh_on_formset_saved(sender, instance, created, changed, **kwargs):
+	"""
+	Paketli saqlash (config.formsets) save() signallarini yubormaydi: yangi va
+	o'zgargan qatorlar xaridorlari, ko'chirilganlarning eski xaridori ham.
+	O'chirilganlar queryset.delete() ning post_delete signalida.
+	"""
+	buyer_ids = {item.buyer_id for item in (*created, *changed)}
+	buyer_ids.update(line[0] for line in (item._get_saved_line() for item in changed) if line)
+	BuyerBalance.objects.refresh_buyers(buyer_ids)
+
+
+def remember_sale_date(sender, instance, update_fields=None, **kwargs):
+	if instance._state.adding:
+		return
+	if update_fields is not None and "date" not in update_fields:
+		return
+	instance._balance_old_date = Sale.objects.filter(pk=instance.pk).values_list("date", flat=True).first()
+
+
+def refresh_on_sale_date_change(sender, instance, **kwargs):
+	# Zakaz sanasi o'zgarsa, uning xaridorlari qarz muddati ham o'zgaradi
+	old_date = instance.__dict__.pop("_balance_old_date", None)
+	if old_date is not None and old_date != instance.date:
+		BuyerBalance.objects.refresh_buyers(instance.sotuvlar.values_list("buyer_id", flat=True))
+
+
+for item_model in ITEM_MODELS:
+	pre_save.connect(remember_item_buyer, sender=item_model)
+	post_save.connect(refresh_on_item_save, sender=item_model)
+	post_delete.connect(refresh_on_item_delete, sender=item_model)
+	formset_saved.connect(refresh_on_formset_saved, sender=item_model)
+pre_save.connect(remember_sale_date, sender=Sale)
+post_save.connect(refresh_on_sale_date_change, sender=Sale)
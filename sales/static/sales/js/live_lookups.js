@@ -0,0 +1,73 @@
+// Zakaz formasida mahsulot va xaridor tanlanganda serverdan tezkor ma'lumot:
+// mahsulotning oxirgi narxi va xaridorning hozirgi qarzi.
+document.addEventListener('DOMContentLoaded', function () {
+    // autocomplete_fields (select2) tanlovni faqat jQuery hodisasi bilan bildiradi -
+    // quyidagi oddiy 'change' tinglovchilariga yetkazamiz
+    if (window.django && django.jQuery) {
+        django.jQuery(document).on('select2:select select2:clear', 'select', function () {
+            this.dispatchEvent(new Event('change', { bubbles: true }));
+        });
+    }
+
+    const cache = {};
+
+    function fetchJson(url) {
+        if (!cache[url]) {
+            cache[url] = fetch(url, { credentials: 'same-origin' })
+                .then(response => response.ok ? response.json() : null)
+                .catch(() => null);
+        }
+        return cache[url];
+    }
+
+    function formatNumber(value) {
+        const number = parseFloat(value) || 0;
+        return number.toLocaleString('ru-RU', { maximumFractionDigits: 2 });
+    }
+
+    function hintFor(select) {
+        let hint = select.parentElement.querySelector('.live-lookup-hint');
+        if (!hint) {
+            hint = document.createElement('div');
+            hint.className = 'live-lookup-hint help';
+            select.parentElement.appendChild(hint);
+        }
+        return hint;
+    }
+
+    function onProductChange(select) {
+        const row = select.closest('tr');
+        const priceInput = row && row.querySelector('input[name$="-price"]');
+        if (!select.value || !priceInput) return;
+
+        fetchJson(`/admin/sales/product/last-price/${select.value}/`).then(data => {
+            if (!data) return;
+            priceInput.placeholder = formatNumber(data.price);
+            hintFor(select).textContent = `Oxirgi narx: ${formatNumber(data.price)} (${data.date})`;
+            if (!priceInput.value) {
+                priceInput.value = data.price;
+                priceInput.dispatchEvent(new Event('input', { bubbles: true }));
+            }
+        });
+    }
+
+    function onBuyerChange(select) {
+        if (!select.value) {
+            hintFor(select).textContent = '';
+            return;
+        }
+        fetchJson(`/admin/sales/buyer/balance/${select.value}/`).then(data => {
+            if (!data) return;
+            hintFor(select).textContent = parseFloat(data.outstanding)
+                ? `Qarz: ${formatNumber(data.outstanding)} (60+ kun: ${formatNumber(data.days_over_60)})`
+                : 'Qarzi yo\'q';
+        });
+    }
+
+    // Yangi qo'shilgan inline qatorlar uchun ham ishlashi uchun document darajasida
+    document.addEventListener('change', function (event) {
+        const target = event.target;
+        if (target.matches('select[name$="-product"]')) onProductChange(target);
+        if (target.matches('select[name$="-buyer"]')) onBuyerChange(target);
+    });
+});
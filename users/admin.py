@@ -1,16 +1,16 @@
 from django.contrib import admin
 from django.contrib.auth.models import Group
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
+from config.search import NormalizedSearchMixin
 from .models import User
 
 
 admin.site.unregister(Group)
 
 @admin.register(User)
-class UserAdmin(DjangoUserAdmin):
+class UserAdmin(NormalizedSearchMixin, DjangoUserAdmin):
     list_display = ('username', 'full_name',  'phone_number', 'is_worker', 'is_staff', 'is_active', 'is_superuser', 'last_login', 'date_joined')
     list_filter = ()
-    search_fields = ()
     readonly_fields = ('date_joined',)  
 
     fieldsets = (
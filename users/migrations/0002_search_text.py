@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+from config.search import add_search_text_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='search_text',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=500, verbose_name='Qidiruv matni'),
+        ),
+        *add_search_text_index('users.User', 'users_user_search_trgm', ('username', 'first_name', 'last_name'), ('phone_number',)),
+    ]
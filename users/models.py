@@ -3,8 +3,10 @@ from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 import uuid
 
+from config.search import SearchTextModel
 
-class User(AbstractUser):
+
+class User(SearchTextModel, AbstractUser):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     username = models.CharField(_("Foydalanuvchi nomi"), max_length=150, unique=True)
     first_name = models.CharField(_("Ism"), max_length=150, blank=True)
@@ -32,6 +34,9 @@ class User(AbstractUser):
         help_text=_("Foydalanuvchining barcha ruxsatlari bor bo'lsa, belgilang.")
     )
 
+    search_text_fields = ("username", "first_name", "last_name")
+    search_digit_fields = ("phone_number",)
+
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
     full_name.short_description = "Ism va familiya"
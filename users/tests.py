@@ -1,3 +1,51 @@
+from django.contrib.auth.models import Permission
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from .models import User
+
+
+class AdminAppListCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("xodim", password="x", is_staff=True)
+        self.client.force_login(self.user)
+
+    def model_names(self):
+        response = self.client.get(reverse("admin:index"))
+        self.assertEqual(response.status_code, 200)
+        return [model["object_name"] for app in response.context_data["app_list"] for model in app["models"]]
+
+    def test_permission_tables_are_read_once(self):
+        self.model_names()
+        with CaptureQueriesContext(connection) as context:
+            self.model_names()
+        self.assertFalse([query for query in context.captured_queries if "auth_permission" in query["sql"]])
+
+    def test_permission_change_invalidates_list(self):
+        self.assertNotIn("Sale", self.model_names())
+        self.user.user_permissions.add(Permission.objects.get(codename="view_sale"))
+        self.assertIn("Sale", self.model_names())
+
+        self.user.is_superuser = True
+        self.user.save()
+        self.assertIn("DailySummary", self.model_names())
+
+    def test_list_is_ordered(self):
+        self.user.is_superuser = True
+        self.user.save()
+        response = self.client.get(reverse("admin:index"))
+        app_labels = [app["app_label"] for app in response.context_data["app_list"]]
+        self.assertEqual(app_labels, ["users", "salary", "sales", "expenses", "reports"])
+
+
+class UserSearchTests(TestCase):
+    def test_search_by_cyrillic_name_and_phone(self):
+        admin = User.objects.create_superuser("admin", password="admin")
+        worker = User.objects.create_user("ali", first_name="Алишер", last_name="Усмонов", phone_number="+998 91 555 44 33")
+        self.client.force_login(admin)
+        for term in ("alisher", "усмон", "5554433"):
+            with self.subTest(term=term):
+                response = self.client.get(reverse("admin:users_user_changelist"), {"q": term})
+                self.assertEqual(list(response.context["cl"].result_list), [worker])